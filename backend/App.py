@@ -9,40 +9,195 @@ Features:
 - Notes (for future study sessions)
 """
 
-from flask import Flask, request, jsonify
+from flask import (Blueprint, Flask, Response, current_app, g, has_request_context, request, jsonify,
+                   make_response, stream_with_context)
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime, timezone
+from flask_sqlalchemy.session import Session
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from werkzeug.exceptions import NotFound
+from werkzeug.local import LocalProxy
+from collections import Counter, OrderedDict, defaultdict
+from datetime import datetime, time, timedelta, timezone
+from time import monotonic, perf_counter, sleep
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import base64
+import bisect
+import click
+import functools
+import hashlib
+import html
+import heapq
+import io
+import json
 import os
+import queue
+import re
+import sqlite3
+import sys
+import threading
 
-# Initialize Flask app
-app = Flask(__name__)
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
 
-# Configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///studyflow.db')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+def load_config():
+    """Settings read from the environment; create_app() overrides take precedence"""
+    return {
+        'SQLALCHEMY_DATABASE_URI': os.environ.get('DATABASE_URL', 'sqlite:///studyflow.db'),
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+        'FRONTEND_URL': os.environ.get('FRONTEND_URL', '*'),
+
+        # Longest allowed time block; bounds the index range scanned for overlaps
+        'MAX_SESSION_HOURS': float(os.environ.get('MAX_SESSION_HOURS', 24)),
+
+        # Live update broker: 'memory' (per worker) or 'database' (shared by all workers)
+        'EVENT_BROKER': os.environ.get('EVENT_BROKER', 'memory'),
+
+        # In-process cache of rendered GET responses (0 disables either limit)
+        'RESPONSE_CACHE_SIZE': int(os.environ.get('RESPONSE_CACHE_SIZE', 512)),
+        'RESPONSE_CACHE_TTL': float(os.environ.get('RESPONSE_CACHE_TTL', 30)),
+
+        # Per-request metrics at /api/metrics, and stack samples of requests slower
+        # than PROFILE_SLOW_MS written to PROFILE_DIR (both off by default)
+        'METRICS_ENABLED': os.environ.get('METRICS_ENABLED', 'false').lower() == 'true',
+        'PROFILE_SLOW_MS': float(os.environ.get('PROFILE_SLOW_MS', 0)),
+        'PROFILE_INTERVAL_MS': float(os.environ.get('PROFILE_INTERVAL_MS', 5)),
+        'PROFILE_DIR': os.environ.get('PROFILE_DIR', 'profiles'),
+
+        # SQLite connection pragmas. WAL lets readers in other gunicorn workers carry
+        # on while one connection writes, and synchronous=NORMAL only fsyncs at WAL
+        # checkpoints. SQLITE_JOURNAL_MODE=DELETE restores the old rollback journal.
+        'SQLITE_JOURNAL_MODE': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'SQLITE_SYNCHRONOUS': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'SQLITE_BUSY_TIMEOUT_MS': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        'SQLITE_MMAP_SIZE': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+
+        # Postgres connection pool, per gunicorn worker
+        'DB_POOL_SIZE': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'DB_MAX_OVERFLOW': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'DB_POOL_TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        'DB_POOL_RECYCLE': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        'DB_POOL_PRE_PING': os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true',
+
+        # Optional read replica: GET requests are served from DATABASE_READ_URL unless
+        # the client wrote within READ_YOUR_WRITES_SECONDS, or the replica is down or
+        # more than REPLICA_MAX_LAG_SECONDS behind (checked every REPLICA_CHECK_INTERVAL)
+        'DATABASE_READ_URL': os.environ.get('DATABASE_READ_URL'),
+        'READ_YOUR_WRITES_SECONDS': float(os.environ.get('READ_YOUR_WRITES_SECONDS', 5)),
+        'REPLICA_MAX_LAG_SECONDS': float(os.environ.get('REPLICA_MAX_LAG_SECONDS', 5)),
+        'REPLICA_CHECK_INTERVAL': float(os.environ.get('REPLICA_CHECK_INTERVAL', 2)),
+
+        # `flask archive` moves completed items, sessions and deadlines older than
+        # ARCHIVE_AFTER_DAYS into the archive tables, ARCHIVE_BATCH_SIZE rows per transaction
+        'ARCHIVE_AFTER_DAYS': int(os.environ.get('ARCHIVE_AFTER_DAYS', 365)),
+        'ARCHIVE_BATCH_SIZE': int(os.environ.get('ARCHIVE_BATCH_SIZE', 500)),
+    }
+
+
+def configure_database(config):
+    """Derive the Flask-SQLAlchemy engine settings from the database settings"""
+    # Handle postgres:// vs postgresql:// for Heroku/Render
+    for key in ('SQLALCHEMY_DATABASE_URI', 'DATABASE_READ_URL'):
+        if config[key] and config[key].startswith('postgres://'):
+            config[key] = config[key].replace('postgres://', 'postgresql://', 1)
+
+    if config['DATABASE_READ_URL']:
+        config['SQLALCHEMY_BINDS'] = {'replica': config['DATABASE_READ_URL']}
+
+    if not config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            'pool_size': config['DB_POOL_SIZE'],
+            'max_overflow': config['DB_MAX_OVERFLOW'],
+            'pool_timeout': config['DB_POOL_TIMEOUT'],
+            'pool_recycle': config['DB_POOL_RECYCLE'],
+            'pool_pre_ping': config['DB_POOL_PRE_PING'],
+        }
 
-# Handle postgres:// vs postgresql:// for Heroku/Render
-if app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgres://'):
-    app.config['SQLALCHEMY_DATABASE_URI'] = app.config['SQLALCHEMY_DATABASE_URI'].replace(
-        'postgres://', 'postgresql://', 1
-    )
 
-# Enable CORS for frontend
-CORS(app, origins=['http://localhost:5173', 'http://localhost:8080', 'http://localhost:3000', 
-                   os.environ.get('FRONTEND_URL', '*')])
+def configure_sqlite_connection(config, dbapi_connection, connection_record):
+    """Apply the SQLITE_* pragmas to a new SQLite connection"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    for name in ('SQLITE_JOURNAL_MODE', 'SQLITE_SYNCHRONOUS'):
+        if not re.fullmatch(r'[A-Za-z]+', config[name]):
+            raise ValueError(f'{name} must be a SQLite pragma keyword, got {config[name]!r}')
 
-# Initialize database
-db = SQLAlchemy(app)
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout = {int(config['SQLITE_BUSY_TIMEOUT_MS'])}")
+    cursor.execute(f"PRAGMA journal_mode = {config['SQLITE_JOURNAL_MODE']}")
+    cursor.execute(f"PRAGMA synchronous = {config['SQLITE_SYNCHRONOUS']}")
+    cursor.execute(f"PRAGMA mmap_size = {int(config['SQLITE_MMAP_SIZE'])}")
+    cursor.close()
+
+
+class RoutingSession(Session):
+    """Session that sends statements of replica-routed requests to the read replica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_request_context() and g.get('read_replica'):
+            return self._db.engines['replica']
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+
+# Database and routes are bound to an app by create_app()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+api = Blueprint('api', __name__, cli_group=None)
+
+
+def app_state(name):
+    """Proxy to the current app's instance of a per-app object made by create_app()"""
+    return LocalProxy(lambda: current_app.extensions['studyflow'][name])
 
 
 # =============================================================================
 # DATABASE MODELS
 # =============================================================================
 
+def next_sync_seq(context):
+    """
+    Column default for sync_seq: the change sequence number of this transaction.
+
+    The first synced write in a transaction bumps the 'sync' counter row in
+    resource_versions and every later row in the same transaction reuses the
+    number. The bump holds that row's lock until commit, so numbers become
+    visible in order and /api/sync can hand the counter out as its token.
+    """
+    connection = context.connection
+    transaction = connection.get_transaction()
+    cached = connection.info.get('sync_seq')
+    if cached and cached[0] is transaction:
+        return cached[1]
+    stmt = dialect_insert(ResourceVersion).values(name=SYNC_COUNTER, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['name'],
+        set_={'version': ResourceVersion.version + 1}
+    )
+    seq = connection.execute(stmt.returning(ResourceVersion.version)).scalar_one()
+    connection.info['sync_seq'] = (transaction, seq)
+    return seq
+
+
+def sync_seq_column():
+    # Not part of the API: model_fields() skips columns marked internal
+    return db.Column(db.Integer, default=next_sync_seq, onupdate=next_sync_seq, info={'internal': True})
+
+
 class StudySession(db.Model):
     """Time block study sessions for the calendar view"""
     __tablename__ = 'study_sessions'
+    __table_args__ = (
+        # Calendar window queries: start_time range, ordered by (start_time, id)
+        db.Index('ix_study_sessions_start_time_id', 'start_time', 'id'),
+        # Delta sync: rows changed since a token
+        db.Index('ix_study_sessions_sync_seq', 'sync_seq'),
+        # Never hand a deleted row's id out again on SQLite: tombstones, planner
+        # links and imported UIDs keep referring to it (same for every synced model)
+        {'sqlite_autoincrement': True},
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -61,6 +216,7 @@ class StudySession(db.Model):
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), 
                           onupdate=lambda: datetime.now(timezone.utc))
+    sync_seq = sync_seq_column()
 
     def to_dict(self):
         return {
@@ -77,9 +233,134 @@ class StudySession(db.Model):
         }
 
 
+class SessionRecurrence(db.Model):
+    """
+    Weekly repeating study session, expanded into occurrences on read.
+
+    start_time/end_time describe the first occurrence; later ones fall on
+    `weekdays` (Monday=0) every `interval` weeks at the same time of day, until
+    `until` or `count` occurrences, skipping the starts listed in `exceptions`.
+    """
+    __tablename__ = 'session_recurrences'
+    __table_args__ = (
+        db.Index('ix_session_recurrences_start_time', 'start_time'),
+        db.Index('ix_session_recurrences_sync_seq', 'sync_seq'),
+        {'sqlite_autoincrement': True},
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text, nullable=True)
+    subject = db.Column(db.String(100), nullable=True)
+    color = db.Column(db.String(20), default='purple')
+
+    # First occurrence
+    start_time = db.Column(db.DateTime, nullable=False)
+    end_time = db.Column(db.DateTime, nullable=False)
+
+    # Recurrence rule
+    weekdays = db.Column(db.String(20), nullable=False)  # e.g. "0,2,4" for Mon/Wed/Fri
+    interval = db.Column(db.Integer, nullable=False, default=1)  # every N weeks
+    until = db.Column(db.DateTime, nullable=True)
+    count = db.Column(db.Integer, nullable=True)
+    exceptions = db.Column(db.Text, nullable=True)  # JSON list of skipped occurrence starts
+
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc),
+                          onupdate=lambda: datetime.now(timezone.utc))
+    sync_seq = sync_seq_column()
+
+    @property
+    def weekday_list(self):
+        return sorted(int(day) for day in self.weekdays.split(','))
+
+    @property
+    def exception_list(self):
+        return [datetime.fromisoformat(value) for value in json.loads(self.exceptions or '[]')]
+
+    def occurrences(self, window_start, window_end):
+        """
+        Yield (start, end) of occurrences inside [window_start, window_end], in order.
+
+        Jumps straight to the week containing window_start, so the cost is
+        proportional to the occurrences in the window, not the rule's history.
+        """
+        days = self.weekday_list
+        duration = self.end_time - self.start_time
+        period = timedelta(weeks=self.interval or 1)
+        first_weekday = self.start_time.weekday()
+        # Same time of day on the Monday of the first occurrence's week
+        anchor = self.start_time - timedelta(days=first_weekday)
+        first_period_days = [day for day in days if day >= first_weekday]
+        exceptions = set(self.exception_list)
+
+        number = 0 if window_start <= anchor else (window_start - anchor) // period
+        # Occurrences before this period still count towards `count`
+        index = len(first_period_days) + (number - 1) * len(days) if number > 0 else 0
+
+        while True:
+            period_start = anchor + number * period
+            for day in (first_period_days if number == 0 else days):
+                start = period_start + timedelta(days=day)
+                if self.count is not None and index >= self.count:
+                    return
+                if (self.until is not None and start > self.until) or start + duration > window_end:
+                    return
+                index += 1
+                if start >= window_start and start not in exceptions:
+                    yield start, start + duration
+            number += 1
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'subject': self.subject,
+            'color': self.color,
+            'start_time': self.start_time.isoformat() if self.start_time else None,
+            'end_time': self.end_time.isoformat() if self.end_time else None,
+            'weekdays': self.weekday_list,
+            'interval': self.interval,
+            'until': self.until.isoformat() if self.until else None,
+            'count': self.count,
+            'exceptions': [value.isoformat() for value in self.exception_list],
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    def occurrence_dict(self, start, fields=None):
+        """One expanded occurrence, shaped like StudySession.to_dict() (limited to fields)"""
+        value = {
+            'id': f'r{self.id}:{start.isoformat()}',
+            'recurrence_id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'subject': self.subject,
+            'color': self.color,
+            'start_time': start.isoformat(),
+            'end_time': (start + (self.end_time - self.start_time)).isoformat(),
+            'is_completed': False,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+        if fields is not None:
+            value = {key: value[key] for key in ('recurrence_id', *fields)}
+        return value
+
+
 class Deadline(db.Model):
     """Deadlines with countdown timers"""
     __tablename__ = 'deadlines'
+    __table_args__ = (
+        # Deadline list ordered by (due_date, id), optionally filtered by status or subject
+        db.Index('ix_deadlines_due_date_id', 'due_date', 'id'),
+        db.Index('ix_deadlines_is_completed_due_date_id', 'is_completed', 'due_date', 'id'),
+        db.Index('ix_deadlines_subject_due_date_id', 'subject', 'due_date', 'id'),
+        db.Index('ix_deadlines_sync_seq', 'sync_seq'),
+        {'sqlite_autoincrement': True},
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -98,6 +379,7 @@ class Deadline(db.Model):
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc),
                           onupdate=lambda: datetime.now(timezone.utc))
+    sync_seq = sync_seq_column()
 
     def to_dict(self):
         return {
@@ -117,6 +399,17 @@ class Deadline(db.Model):
 class StudyItem(db.Model):
     """Study checklist items with progress tracking"""
     __tablename__ = 'study_items'
+    __table_args__ = (
+        # Checklist ordered by (order, created_at, id), optionally filtered;
+        # (subject, is_completed) also serves the progress GROUP BY
+        db.Index('ix_study_items_order_created_at_id', 'order', 'created_at', 'id'),
+        db.Index('ix_study_items_subject_is_completed', 'subject', 'is_completed'),
+        db.Index('ix_study_items_subject_order', 'subject', 'order', 'created_at', 'id'),
+        db.Index('ix_study_items_is_completed_order', 'is_completed', 'order', 'created_at', 'id'),
+        db.Index('ix_study_items_deadline_id_order', 'deadline_id', 'order', 'created_at', 'id'),
+        db.Index('ix_study_items_sync_seq', 'sync_seq'),
+        {'sqlite_autoincrement': True},
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -134,6 +427,7 @@ class StudyItem(db.Model):
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc),
                           onupdate=lambda: datetime.now(timezone.utc))
+    sync_seq = sync_seq_column()
     completed_at = db.Column(db.DateTime, nullable=True)
 
     def to_dict(self):
@@ -154,6 +448,16 @@ class StudyItem(db.Model):
 class Note(db.Model):
     """Notes for future study sessions"""
     __tablename__ = 'notes'
+    __table_args__ = (
+        # Notes newest first by (created_at, id), optionally filtered by subject or session
+        db.Index('ix_notes_created_at_id', 'created_at', 'id'),
+        db.Index('ix_notes_subject_created_at_id', 'subject', 'created_at', 'id'),
+        db.Index('ix_notes_session_id_created_at_id', 'session_id', 'created_at', 'id'),
+        # show_today (show_date IS NULL OR show_date < tomorrow) and the upcoming window
+        db.Index('ix_notes_show_date_id', 'show_date', 'id'),
+        db.Index('ix_notes_sync_seq', 'sync_seq'),
+        {'sqlite_autoincrement': True},
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -170,6 +474,7 @@ class Note(db.Model):
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc),
                           onupdate=lambda: datetime.now(timezone.utc))
+    sync_seq = sync_seq_column()
 
     def to_dict(self):
         return {
@@ -187,12 +492,18 @@ class Note(db.Model):
 class Subject(db.Model):
     """Classes/subjects for organization"""
     __tablename__ = 'subjects'
+    __table_args__ = (
+        # Delta sync: rows changed since a token
+        db.Index('ix_subjects_sync_seq', 'sync_seq'),
+        {'sqlite_autoincrement': True},
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False, unique=True)
     color = db.Column(db.String(20), default='purple')
     
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    sync_seq = sync_seq_column()
 
     def to_dict(self):
         return {
@@ -203,419 +514,4186 @@ class Subject(db.Model):
         }
 
 
-# =============================================================================
-# API ROUTES - STUDY SESSIONS
-# =============================================================================
+class SubjectProgress(db.Model):
+    """
+    Materialized per-subject checklist counters behind /api/items/progress.
 
-@app.route('/api/sessions', methods=['GET'])
-def get_sessions():
-    """Get all study sessions, optionally filtered by date range"""
-    start = request.args.get('start')
-    end = request.args.get('end')
-    
-    query = StudySession.query
-    
-    if start:
-        query = query.filter(StudySession.start_time >= datetime.fromisoformat(start))
-    if end:
-        query = query.filter(StudySession.end_time <= datetime.fromisoformat(end))
-    
-    sessions = query.order_by(StudySession.start_time).all()
-    return jsonify([s.to_dict() for s in sessions])
+    Kept in sync by the study item write handlers in the same transaction.
+    Items without a subject are counted under the empty-string key.
+    """
+    __tablename__ = 'subject_progress'
 
+    subject = db.Column(db.String(100), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    completed = db.Column(db.Integer, nullable=False, default=0)
 
-@app.route('/api/sessions', methods=['POST'])
-def create_session():
-    """Create a new study session"""
-    data = request.get_json()
-    
-    session = StudySession(
-        title=data['title'],
-        description=data.get('description'),
-        subject=data.get('subject'),
-        color=data.get('color', 'purple'),
-        start_time=datetime.fromisoformat(data['start_time']),
-        end_time=datetime.fromisoformat(data['end_time']),
-        is_completed=data.get('is_completed', False)
+
+class DailyStats(db.Model):
+    """
+    Materialized per-day, per-subject study totals behind /api/analytics.
+
+    Kept in sync by the session and study item write handlers in the same
+    transaction. Days are UTC dates; sessions crossing midnight are split
+    between days. Rows without a subject are counted under the empty-string key.
+    """
+    __tablename__ = 'daily_stats'
+    __table_args__ = (
+        db.Index('ix_daily_stats_subject_day', 'subject', 'day'),
     )
-    
-    db.session.add(session)
-    db.session.commit()
-    
-    return jsonify(session.to_dict()), 201
 
+    day = db.Column(db.Date, primary_key=True)
+    subject = db.Column(db.String(100), primary_key=True)
+    planned_seconds = db.Column(db.Integer, nullable=False, default=0)  # all sessions
+    studied_seconds = db.Column(db.Integer, nullable=False, default=0)  # completed sessions
+    items_completed = db.Column(db.Integer, nullable=False, default=0)
 
-@app.route('/api/sessions/<int:id>', methods=['GET'])
-def get_session(id):
-    """Get a single study session"""
-    session = StudySession.query.get_or_404(id)
-    return jsonify(session.to_dict())
 
+class ResourceVersion(db.Model):
+    """
+    Write counter per resource ('sessions', 'notes', ...) that list ETags are
+    built from, plus the delta sync change sequence (SYNC_COUNTER)
+    """
+    __tablename__ = 'resource_versions'
 
-@app.route('/api/sessions/<int:id>', methods=['PUT'])
-def update_session(id):
-    """Update a study session (including moving time blocks)"""
-    session = StudySession.query.get_or_404(id)
-    data = request.get_json()
-    
-    if 'title' in data:
-        session.title = data['title']
-    if 'description' in data:
-        session.description = data['description']
-    if 'subject' in data:
-        session.subject = data['subject']
-    if 'color' in data:
-        session.color = data['color']
-    if 'start_time' in data:
-        session.start_time = datetime.fromisoformat(data['start_time'])
-    if 'end_time' in data:
-        session.end_time = datetime.fromisoformat(data['end_time'])
-    if 'is_completed' in data:
-        session.is_completed = data['is_completed']
-    
-    db.session.commit()
-    return jsonify(session.to_dict())
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
 
 
-@app.route('/api/sessions/<int:id>', methods=['DELETE'])
-def delete_session(id):
-    """Delete a study session"""
-    session = StudySession.query.get_or_404(id)
-    db.session.delete(session)
-    db.session.commit()
-    return '', 204
+class Tombstone(db.Model):
+    """Record of a hard-deleted row, so delta sync can tell clients to drop it"""
+    __tablename__ = 'tombstones'
+    __table_args__ = (
+        # Pruning tombstones older than TOMBSTONE_RETENTION
+        db.Index('ix_tombstones_deleted_at', 'deleted_at'),
+        db.Index('ix_tombstones_sync_seq', 'sync_seq'),
+    )
 
+    id = db.Column(db.Integer, primary_key=True)
+    resource = db.Column(db.String(50), nullable=False)  # e.g. 'sessions'
+    row_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    sync_seq = sync_seq_column()
 
-# =============================================================================
-# API ROUTES - DEADLINES
-# =============================================================================
 
-@app.route('/api/deadlines', methods=['GET'])
-def get_deadlines():
-    """Get all deadlines, optionally filtered"""
-    completed = request.args.get('completed')
-    subject = request.args.get('subject')
-    
-    query = Deadline.query
-    
-    if completed is not None:
-        query = query.filter(Deadline.is_completed == (completed.lower() == 'true'))
-    if subject:
-        query = query.filter(Deadline.subject == subject)
-    
-    deadlines = query.order_by(Deadline.due_date).all()
-    return jsonify([d.to_dict() for d in deadlines])
+class ChangeEvent(db.Model):
+    """Change events relayed between gunicorn workers by DatabaseEventBroker"""
+    __tablename__ = 'change_events'
+    __table_args__ = (
+        # Pruning events older than EVENT_RETENTION
+        db.Index('ix_change_events_created_at', 'created_at'),
+    )
 
+    id = db.Column(db.Integer, primary_key=True)
+    resource = db.Column(db.String(50), nullable=False)
+    op = db.Column(db.String(10), nullable=False)  # created, updated, deleted
+    row_id = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
 
-@app.route('/api/deadlines', methods=['POST'])
-def create_deadline():
-    """Create a new deadline"""
-    data = request.get_json()
-    
-    deadline = Deadline(
-        title=data['title'],
-        description=data.get('description'),
-        subject=data.get('subject'),
-        color=data.get('color', 'orange'),
-        due_date=datetime.fromisoformat(data['due_date']),
-        priority=data.get('priority', 'medium'),
-        is_completed=data.get('is_completed', False)
+
+class PlannedSession(db.Model):
+    """
+    Link from a planner-generated study session to the deadline it works towards.
+
+    No foreign keys (SQLite doesn't enforce them here), so every path that
+    deletes or archives sessions drops their links with unlink_sessions().
+    """
+    __tablename__ = 'planned_sessions'
+    __table_args__ = (
+        db.Index('ix_planned_sessions_deadline_id', 'deadline_id'),
     )
-    
-    db.session.add(deadline)
-    db.session.commit()
-    
-    return jsonify(deadline.to_dict()), 201
 
+    session_id = db.Column(db.Integer, primary_key=True)
+    deadline_id = db.Column(db.Integer, nullable=False)
 
-@app.route('/api/deadlines/<int:id>', methods=['GET'])
-def get_deadline(id):
-    """Get a single deadline"""
-    deadline = Deadline.query.get_or_404(id)
-    return jsonify(deadline.to_dict())
 
+class ImportedEvent(db.Model):
+    """Calendar UID (hashed) of each event created by an .ics import, so re-imports skip it"""
+    __tablename__ = 'imported_events'
 
-@app.route('/api/deadlines/<int:id>', methods=['PUT'])
-def update_deadline(id):
-    """Update a deadline"""
-    deadline = Deadline.query.get_or_404(id)
-    data = request.get_json()
-    
-    if 'title' in data:
-        deadline.title = data['title']
-    if 'description' in data:
-        deadline.description = data['description']
-    if 'subject' in data:
-        deadline.subject = data['subject']
-    if 'color' in data:
-        deadline.color = data['color']
-    if 'due_date' in data:
-        deadline.due_date = datetime.fromisoformat(data['due_date'])
-    if 'priority' in data:
-        deadline.priority = data['priority']
-    if 'is_completed' in data:
-        deadline.is_completed = data['is_completed']
-    
-    db.session.commit()
-    return jsonify(deadline.to_dict())
+    uid_hash = db.Column(db.String(64), primary_key=True)  # sha256 of the UID
+    resource = db.Column(db.String(50), nullable=False)  # sessions, recurrences or deadlines
+    row_id = db.Column(db.Integer, nullable=False)
 
 
-@app.route('/api/deadlines/<int:id>', methods=['DELETE'])
-def delete_deadline(id):
-    """Delete a deadline"""
-    deadline = Deadline.query.get_or_404(id)
-    db.session.delete(deadline)
-    db.session.commit()
-    return '', 204
+def archive_model(model, name, *indexes):
+    """
+    ORM class for the archive copy of model's table: the same columns, ids
+    kept and no foreign keys, plus archived_at. to_dict() matches model's.
+    Keys are copied as plain str (orjson rejects str subclasses as dict keys).
+    """
+    columns = [
+        db.Column(column.name, column.type, key=column.key, primary_key=column.primary_key,
+                  autoincrement=False, nullable=column.nullable, info=column.info)
+        for column in model.__table__.columns
+    ]
+    table = db.Table(f'archived_{model.__tablename__}', db.metadata, *columns,
+                     db.Column('archived_at', db.DateTime, key='archived_at', nullable=False), *indexes)
+    return type(name, (db.Model,), {
+        '__doc__': f'{model.__name__} rows moved out of {model.__tablename__} by `flask archive`',
+        '__table__': table,
+        'to_dict': lambda self: dict(model.to_dict(self), archived_at=self.archived_at.isoformat()),
+    })
+
+
+ArchivedStudySession = archive_model(
+    StudySession, 'ArchivedStudySession',
+    db.Index('ix_archived_study_sessions_start_time_id', 'start_time', 'id'),
+)
+ArchivedDeadline = archive_model(
+    Deadline, 'ArchivedDeadline',
+    db.Index('ix_archived_deadlines_due_date_id', 'due_date', 'id'),
+)
+ArchivedStudyItem = archive_model(
+    StudyItem, 'ArchivedStudyItem',
+    db.Index('ix_archived_study_items_order_created_at_id', 'order', 'created_at', 'id'),
+)
 
 
 # =============================================================================
-# API ROUTES - STUDY ITEMS (Checklist)
+# ERROR HANDLING
 # =============================================================================
 
-@app.route('/api/items', methods=['GET'])
-def get_items():
-    """Get all study items"""
-    completed = request.args.get('completed')
-    subject = request.args.get('subject')
-    deadline_id = request.args.get('deadline_id')
-    
-    query = StudyItem.query
-    
-    if completed is not None:
-        query = query.filter(StudyItem.is_completed == (completed.lower() == 'true'))
-    if subject:
-        query = query.filter(StudyItem.subject == subject)
-    if deadline_id:
-        query = query.filter(StudyItem.deadline_id == int(deadline_id))
-    
-    items = query.order_by(StudyItem.order, StudyItem.created_at).all()
-    return jsonify([i.to_dict() for i in items])
+class ApiError(Exception):
+    """Client error returned as a JSON body ({'message': ...}) with a status code"""
 
+    def __init__(self, message, status_code=400, errors=None):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.errors = errors
 
-@app.route('/api/items', methods=['POST'])
-def create_item():
-    """Create a new study item"""
-    data = request.get_json()
-    
-    # Get max order for new item
-    max_order = db.session.query(db.func.max(StudyItem.order)).scalar() or 0
-    
-    item = StudyItem(
-        title=data['title'],
-        description=data.get('description'),
-        subject=data.get('subject'),
-        is_completed=data.get('is_completed', False),
-        order=data.get('order', max_order + 1),
-        deadline_id=data.get('deadline_id')
-    )
-    
-    db.session.add(item)
-    db.session.commit()
-    
-    return jsonify(item.to_dict()), 201
 
+@api.app_errorhandler(ApiError)
+def handle_api_error(error):
+    # Drop anything the handler flushed before it gave up
+    db.session.rollback()
+    body = {'message': error.message}
+    if error.errors is not None:
+        body['errors'] = error.errors
+    return jsonify(body), error.status_code
 
-@app.route('/api/items/<int:id>', methods=['PUT'])
-def update_item(id):
-    """Update a study item (including marking complete)"""
-    item = StudyItem.query.get_or_404(id)
-    data = request.get_json()
-    
-    if 'title' in data:
-        item.title = data['title']
-    if 'description' in data:
-        item.description = data['description']
-    if 'subject' in data:
-        item.subject = data['subject']
-    if 'order' in data:
-        item.order = data['order']
-    if 'deadline_id' in data:
-        item.deadline_id = data['deadline_id']
-    if 'is_completed' in data:
-        item.is_completed = data['is_completed']
-        if data['is_completed']:
-            item.completed_at = datetime.now(timezone.utc)
-        else:
-            item.completed_at = None
-    
-    db.session.commit()
-    return jsonify(item.to_dict())
 
+def parse_datetime_arg(name, default=None):
+    """Parse an ISO date/datetime query argument, or return default if absent"""
+    value = request.args.get(name)
+    if not value:
+        return default
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ApiError(f'{name} must be an ISO date or datetime')
 
-@app.route('/api/items/<int:id>', methods=['DELETE'])
-def delete_item(id):
-    """Delete a study item"""
-    item = StudyItem.query.get_or_404(id)
-    db.session.delete(item)
+
+def parse_timezone(value):
+    """tzinfo for an IANA zone name (e.g. Europe/Berlin) or a ±HH:MM offset; empty means UTC"""
+    if not value:
+        return timezone.utc
+    try:
+        match = re.fullmatch(r'([+-])(\d{2}):(\d{2})', value)
+        if match:
+            offset = timedelta(hours=int(match[2]), minutes=int(match[3]))
+            return timezone(-offset if match[1] == '-' else offset)
+        return ZoneInfo(value)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ApiError('tz must be an IANA time zone name or a UTC offset like +02:00')
+
+
+def start_of_day(day):
+    """Naive midnight of a date, matching how DateTime columns are stored"""
+    return datetime.combine(day, time.min)
+
+
+def naive_utc(value):
+    """Convert an aware datetime to naive UTC, matching how DateTime columns are stored"""
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+# =============================================================================
+# METRICS & PROFILING
+# =============================================================================
+
+# With METRICS_ENABLED, request hooks and SQLAlchemy engine events record per
+# route latency, query count, SQL time, serialization time and response size,
+# served in Prometheus text format at /api/metrics. With PROFILE_SLOW_MS set, a
+# sampler thread snapshots the stacks of in-flight requests, and requests
+# slower than the threshold are written to PROFILE_DIR as folded stacks
+# (input for flamegraph.pl or speedscope). Nothing is registered unless
+# enabled. Like the response cache, each gunicorn worker keeps its own numbers.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+RESPONSE_SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    """Prometheus-style histogram: counts per upper bound, plus sum and count"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last slot is +Inf
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def render(self, name, labels):
+        lines, total = [], 0
+        for bound, count in zip((*self.buckets, '+Inf'), self.counts):
+            total += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {total}')
+        lines.append(f'{name}_sum{{{labels}}} {self.sum}')
+        lines.append(f'{name}_count{{{labels}}} {total}')
+        return lines
+
+
+class RequestMetrics:
+    """Per-route request metrics, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}  # (method, route) -> {'duration': Histogram, ...}
+        self._statuses = Counter()  # (method, route, status) -> requests
+
+    def observe(self, method, route, status, duration, queries, sql_seconds, serialize_seconds, size):
+        with self._lock:
+            metrics = self._routes.get((method, route))
+            if metrics is None:
+                metrics = self._routes[(method, route)] = {
+                    'duration': Histogram(LATENCY_BUCKETS),
+                    'queries': Histogram(QUERY_COUNT_BUCKETS),
+                    'size': Histogram(RESPONSE_SIZE_BUCKETS),
+                    'sql_seconds': 0.0,
+                    'serialize_seconds': 0.0,
+                }
+            metrics['duration'].observe(duration)
+            metrics['queries'].observe(queries)
+            metrics['size'].observe(size)
+            metrics['sql_seconds'] += sql_seconds
+            metrics['serialize_seconds'] += serialize_seconds
+            self._statuses[(method, route, status)] += 1
+
+    def render(self):
+        histograms = (
+            ('duration', 'studyflow_request_duration_seconds', 'Request latency'),
+            ('queries', 'studyflow_request_db_queries', 'SQL statements executed per request'),
+            ('size', 'studyflow_response_size_bytes', 'Response body size (0 for streams)'),
+        )
+        counters = (
+            ('sql_seconds', 'studyflow_request_db_seconds_total', 'Time spent executing SQL'),
+            ('serialize_seconds', 'studyflow_request_serialization_seconds_total', 'Time spent encoding JSON'),
+        )
+        with self._lock:
+            routes = sorted(self._routes.items())
+            lines = [
+                '# HELP studyflow_requests_total Requests by route and status',
+                '# TYPE studyflow_requests_total counter',
+            ]
+            for (method, route, status), count in sorted(self._statuses.items()):
+                lines.append(f'studyflow_requests_total{{method="{method}",route="{route}",status="{status}"}} {count}')
+            for key, name, help in histograms:
+                lines += [f'# HELP {name} {help}', f'# TYPE {name} histogram']
+                for (method, route), metrics in routes:
+                    lines += metrics[key].render(name, f'method="{method}",route="{route}"')
+            for key, name, help in counters:
+                lines += [f'# HELP {name} {help}', f'# TYPE {name} counter']
+                for (method, route), metrics in routes:
+                    lines.append(f'{name}{{method="{method}",route="{route}"}} {metrics[key]}')
+        return '\n'.join(lines) + '\n'
+
+
+class SlowRequestProfiler:
+    """
+    Sampling profiler for slow requests.
+
+    A daemon thread wakes every `interval` seconds and records the stack of each
+    in-flight request thread. When a request finishes slower than `threshold`
+    its samples are written out in the folded format (one `frame;frame;frame
+    count` line per distinct stack); faster requests' samples are dropped.
+    """
+
+    def __init__(self, threshold, interval, directory):
+        self.threshold = threshold
+        self.interval = interval
+        self.directory = directory
+        self._active = {}  # thread ident -> Counter of folded stacks
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start_request(self):
+        with self._lock:
+            self._active[threading.get_ident()] = Counter()
+            if self._thread is None:
+                # Started lazily so it runs in each gunicorn worker, not the master
+                self._thread = threading.Thread(target=self._sample, daemon=True)
+                self._thread.start()
+
+    def finish_request(self, duration, label):
+        with self._lock:
+            samples = self._active.pop(threading.get_ident(), None)
+        if samples and duration >= self.threshold:
+            self.write(samples, label, duration)
+
+    def write(self, samples, label, duration):
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S.%f')
+        name = re.sub(r'[^A-Za-z0-9]+', '_', label).strip('_')
+        path = os.path.join(self.directory, f'{stamp}-{name}-{round(duration * 1000)}ms.folded')
+        with open(path, 'w') as output:
+            for stack, count in samples.most_common():
+                output.write(f'{stack} {count}\n')
+
+    @staticmethod
+    def fold(frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+            frame = frame.f_back
+        return ';'.join(reversed(stack))
+
+    def _sample(self):
+        while True:
+            sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    continue
+                frames = sys._current_frames()
+                for ident, samples in self._active.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        samples[self.fold(frame)] += 1
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider, adding encode time to the request's metrics"""
+
+    def dumps(self, obj, **kwargs):
+        started = perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            record_serialization(perf_counter() - started)
+
+
+def record_serialization(seconds):
+    stats = g.get('metrics') if has_request_context() else None
+    if stats is not None:
+        stats['serialize'] += seconds
+
+
+def request_label():
+    """Bounded-cardinality route label: the URL rule, not the concrete path"""
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+
+request_metrics = app_state('request_metrics')
+slow_request_profiler = app_state('slow_request_profiler')
+
+
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.metrics_started = perf_counter()
+
+
+def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+    stats = g.get('metrics') if has_request_context() else None
+    if stats is not None and context is not None:
+        stats['queries'] += 1
+        stats['sql'] += perf_counter() - context.metrics_started
+
+
+def start_request_metrics():
+    g.metrics = {'started': perf_counter(), 'queries': 0, 'sql': 0.0, 'serialize': 0.0}
+
+
+def finish_request_metrics(response):
+    stats = g.pop('metrics', None)
+    if stats is not None:
+        request_metrics.observe(
+            request.method, request_label(), response.status_code,
+            perf_counter() - stats['started'], stats['queries'], stats['sql'], stats['serialize'],
+            0 if response.is_streamed else len(response.get_data())
+        )
+    return response
+
+
+def get_metrics():
+    """Request metrics for this worker in the Prometheus text format"""
+    return Response(request_metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+def start_profiling():
+    g.profile_started = perf_counter()
+    slow_request_profiler.start_request()
+
+
+def finish_profiling(response):
+    if 'profile_started' in g:
+        slow_request_profiler.finish_request(
+            perf_counter() - g.pop('profile_started'), f'{request.method} {request_label()}'
+        )
+    return response
+
+
+def init_metrics(app):
+    """Register the metrics hooks, engine events and /api/metrics on an app (in its app context)"""
+    app.json = TimedJSONProvider(app)
+    for engine in db.engines.values():
+        db.event.listen(engine, 'before_cursor_execute', start_query_timer)
+        db.event.listen(engine, 'after_cursor_execute', stop_query_timer)
+    app.before_request(start_request_metrics)
+    app.after_request(finish_request_metrics)
+    app.add_url_rule('/api/metrics', 'get_metrics', get_metrics, methods=['GET'])
+
+
+def init_profiler(app):
+    """Register the slow request profiler hooks on an app"""
+    app.before_request(start_profiling)
+    app.after_request(finish_profiling)
+
+
+# =============================================================================
+# READ REPLICA ROUTING
+# =============================================================================
+
+# With DATABASE_READ_URL set, GET requests run every statement on the replica
+# (RoutingSession), except endpoints that must see the newest commits and
+# requests from clients that wrote moments ago. Clients report how long ago
+# they last wrote in X-Last-Write-Age (milliseconds), which avoids depending on
+# their clock. Responses say where they were read in X-Read-Source.
+
+# Delta sync tokens carry the primary's change sequence; a lagging replica would
+# answer them with nothing new and hand back an older sequence
+PRIMARY_ONLY_ENDPOINTS = {'api.get_sync', 'api.health_check'}
+
+# 0 when the standby has replayed everything it received, else the age of the
+# last replayed transaction; NULL on a server that is not a standby
+REPLICA_LAG_SQL = """
+    SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END
+"""
+
+
+class ReplicaMonitor:
+    """Whether the replica is reachable and caught up, re-checked at most every check_interval"""
+
+    def __init__(self, check_interval, max_lag):
+        self.check_interval = check_interval
+        self.max_lag = max_lag
+        self.healthy = False
+        self.lag = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def available(self):
+        with self._lock:
+            if self._checked_at is None or monotonic() - self._checked_at >= self.check_interval:
+                self.healthy = self._check()
+                self._checked_at = monotonic()
+            return self.healthy
+
+    def mark_down(self):
+        """Stop routing to the replica until the next check"""
+        with self._lock:
+            self.healthy = False
+            self._checked_at = monotonic()
+
+    def _check(self):
+        try:
+            with db.engines['replica'].connect() as connection:
+                if connection.dialect.name == 'postgresql':
+                    lag = connection.exec_driver_sql(REPLICA_LAG_SQL).scalar()
+                else:
+                    lag = connection.exec_driver_sql('SELECT 0').scalar()
+        except OperationalError as error:
+            current_app.logger.warning('Read replica unavailable: %s', error)
+            self.lag = None
+            return False
+        self.lag = float(lag or 0)
+        if self.lag > self.max_lag:
+            current_app.logger.warning('Read replica is %.1fs behind, reading from the primary', self.lag)
+            return False
+        return True
+
+
+def wrote_recently():
+    """True if the client says it wrote within READ_YOUR_WRITES_SECONDS"""
+    try:
+        age = float(request.headers.get('X-Last-Write-Age', 'inf')) / 1000
+    except ValueError:
+        return False
+    return age < current_app.config['READ_YOUR_WRITES_SECONDS']
+
+
+replica_monitor = app_state('replica_monitor')
+
+
+def route_reads():
+    g.read_replica = (
+        request.method in ('GET', 'HEAD')
+        and request.endpoint not in PRIMARY_ONLY_ENDPOINTS
+        and not wrote_recently()
+        and replica_monitor.available()
+    )
+
+
+def add_read_source(response):
+    if request.method in ('GET', 'HEAD'):
+        response.headers['X-Read-Source'] = 'replica' if g.get('read_replica') else 'primary'
+    return response
+
+
+def replica_failed(context):
+    # A replica that dies between checks fails this request; stop routing
+    # the following ones to it right away
+    if (has_request_context() and g.get('read_replica')
+            and isinstance(context.sqlalchemy_exception, OperationalError)):
+        replica_monitor.mark_down()
+
+
+def init_replica_routing(app):
+    """Register read routing on an app with a replica bind (in its app context)"""
+    app.before_request(route_reads)
+    app.after_request(add_read_source)
+    db.event.listen(db.engines['replica'], 'handle_error', replica_failed)
+
+
+# =============================================================================
+# SERIALIZATION
+# =============================================================================
+
+# Read endpoints select plain column tuples instead of hydrating ORM objects,
+# and hand datetimes straight to orjson, which formats a whole response in C.
+# Without orjson the stdlib encoder produces the same output, just slower.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Models whose to_dict() is exactly their columns, so a row of column values
+# serializes the same as the hydrated object (the archive copies add only
+# archived_at, which is a column too)
+COLUMN_MODELS = (StudySession, Deadline, StudyItem, Note, Subject,
+                 ArchivedStudySession, ArchivedDeadline, ArchivedStudyItem)
+
+
+def encode_default(value):
+    """Encode values the stdlib json module can't (datetimes, as isoformat())"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def dumps(value):
+    """Serialize a value to compact JSON bytes"""
+    if not (has_request_context() and current_app.config['METRICS_ENABLED']):
+        return encode_json(value)
+    started = perf_counter()
+    try:
+        return encode_json(value)
+    finally:
+        record_serialization(perf_counter() - started)
+
+
+def encode_json(value):
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(',', ':'), default=encode_default).encode()
+
+
+def json_response(value, status=200):
+    """Like jsonify(), but encoded with dumps()"""
+    return Response(dumps(value), status=status, mimetype='application/json')
+
+
+def model_fields(model):
+    """Names of a model's columns, in to_dict() order"""
+    return [column.key for column in model.__table__.columns if not column.info.get('internal')]
+
+
+def parse_fields(model):
+    """
+    Parse ?fields=id,title into column names of model.
+
+    Returns None when the argument is absent (every column). Lets list views
+    skip heavy text columns like Note.content or description.
+    """
+    value = request.args.get('fields')
+    if value is None:
+        return None
+    columns = model_fields(model)
+    fields = list(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+    unknown = [name for name in fields if name not in columns]
+    if not fields or unknown:
+        raise ApiError(f'fields must be a comma-separated list of: {", ".join(columns)}')
+    return fields
+
+
+def select_fields(query, model, fields, extra=()):
+    """Narrow an ORM query to column tuples: fields first, then any extra columns"""
+    names = fields + [name for name in extra if name not in fields]
+    return query.with_entities(*[getattr(model, name) for name in names])
+
+
+def row_dict(fields, row):
+    """Dict of the leading `fields` values of a column tuple"""
+    return dict(zip(fields, row))
+
+
+def serialize_query(query, model, fields=None):
+    """All rows of a query as dicts, via column tuples where the model allows it"""
+    if model not in COLUMN_MODELS:
+        return [row.to_dict() for row in query]
+    fields = fields or model_fields(model)
+    return [row_dict(fields, row) for row in select_fields(query, model, fields)]
+
+
+# =============================================================================
+# PAGINATION
+# =============================================================================
+
+# List endpoints return pages of at most `limit` rows. The cursor is an opaque
+# token holding the sort key of the last row on the previous page, so the next
+# page is a keyset seek on an ordered index instead of an OFFSET scan.
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 500
+
+# Rows fetched from the database per round trip when streaming NDJSON
+STREAM_BATCH_SIZE = 500
+
+
+def encode_cursor(values):
+    """Encode the sort key of a row as an opaque URL-safe cursor"""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    """Decode a cursor back into sort key values for the given columns"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list) or len(payload) != len(columns):
+            raise ValueError(cursor)
+        return [
+            datetime.fromisoformat(value)
+            if value is not None and isinstance(column.type, db.DateTime) else value
+            for value, column in zip(payload, columns)
+        ]
+    except (ValueError, TypeError):
+        raise ApiError('Invalid cursor')
+
+
+def parse_limit(value):
+    """Parse the ?limit= argument, clamped to MAX_PAGE_LIMIT"""
+    if value is None:
+        return DEFAULT_PAGE_LIMIT
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ApiError('limit must be an integer')
+    if limit < 1:
+        raise ApiError('limit must be positive')
+    return min(limit, MAX_PAGE_LIMIT)
+
+
+def wants_stream():
+    """True if the client asked for an NDJSON stream (?stream=1 or Accept header)"""
+    if request.args.get('stream', '').lower() in ('1', 'true'):
+        return True
+    best = request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson'])
+    return best == 'application/x-ndjson'
+
+
+def stream_rows(query, render):
+    """
+    Stream every row of an ordered query as newline-delimited JSON.
+
+    Rows are fetched STREAM_BATCH_SIZE at a time and written out one line each,
+    so memory stays flat no matter how many rows (or how large Note.content) match.
+    """
+    return stream_dicts(render(row) for row in query.yield_per(STREAM_BATCH_SIZE))
+
+
+def stream_dicts(dicts):
+    """Stream an iterable of dicts as newline-delimited JSON"""
+    def generate():
+        for value in dicts:
+            yield dumps(value) + b'\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+def order_query(query, order_columns, descending=False):
+    """Apply a list's sort order, as returned with its query by the *_query() helpers"""
+    if descending:
+        return query.order_by(*[column.desc() for column in order_columns])
+    return query.order_by(*order_columns)
+
+
+def paginate(query, order_columns, descending=False):
+    """
+    Order a query by order_columns and return one keyset page as a response.
+
+    The last column must be unique (the primary key) so the sort key is a total
+    order. Clients that really need every row can opt in with ?all=true, which
+    returns the old bare list, or ask for a streamed NDJSON response.
+
+    Column models are read as column tuples limited to ?fields= (plus the sort
+    key columns the cursor needs) rather than as ORM objects.
+    """
+    model = order_columns[0].class_
+    if model in COLUMN_MODELS:
+        fields = parse_fields(model) or model_fields(model)
+        query = select_fields(query, model, fields, [column.key for column in order_columns])
+        render = functools.partial(row_dict, fields)
+    else:
+        render = model.to_dict
+
+    query = order_query(query, order_columns, descending)
+
+    if wants_stream():
+        return stream_rows(query, render)
+
+    if request.args.get('all', '').lower() == 'true':
+        return json_response([render(row) for row in query.all()])
+
+    limit = parse_limit(request.args.get('limit'))
+    cursor = request.args.get('cursor')
+    if cursor:
+        key = db.tuple_(*order_columns)
+        values = tuple(decode_cursor(cursor, order_columns))
+        query = query.filter(key < values if descending else key > values)
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([getattr(rows[-1], column.key) for column in order_columns])
+
+    return json_response({
+        'items': [render(row) for row in rows],
+        'next_cursor': next_cursor
+    })
+
+
+# =============================================================================
+# RESPONSE CACHE
+# =============================================================================
+
+class ResponseCache:
+    """
+    Bounded LRU cache of rendered GET responses with a TTL.
+
+    Entries are grouped in namespaces ('sessions', 'deadlines', ...) that write
+    handlers invalidate after they commit. Each gunicorn worker has its own
+    cache and only sees its own invalidations; cached() keys entries on the
+    ETag, which comes from the shared resource versions, so a write in another
+    worker turns this worker's copy into a miss.
+    """
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # (namespace, key) -> (expires_at, value)
+        self._generations = Counter()
+        self._lock = threading.Lock()
+        self.hits = Counter()
+        self.misses = Counter()
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.ttl > 0
+
+    def generation(self, namespace):
+        """Token to pass to set() so a response rendered before a write is not stored"""
+        with self._lock:
+            return self._generations[namespace]
+
+    def get(self, namespace, key):
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None or entry[0] <= monotonic():
+                self.misses[namespace] += 1
+                return None
+            self._entries.move_to_end((namespace, key))
+            self.hits[namespace] += 1
+            return entry[1]
+
+    def set(self, namespace, key, generation, value):
+        with self._lock:
+            if self._generations[namespace] != generation:
+                return
+            self._entries[(namespace, key)] = (monotonic() + self.ttl, value)
+            self._entries.move_to_end((namespace, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *namespaces):
+        """Drop every cached response in the given namespaces"""
+        with self._lock:
+            for namespace in namespaces:
+                self._generations[namespace] += 1
+            for entry_key in [k for k in self._entries if k[0] in namespaces]:
+                del self._entries[entry_key]
+
+    def stats(self):
+        with self._lock:
+            hits, misses = sum(self.hits.values()), sum(self.misses.values())
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': round(hits / (hits + misses), 3) if hits + misses else 0,
+                'evictions': self.evictions,
+                'by_namespace': {
+                    namespace: {'hits': self.hits[namespace], 'misses': self.misses[namespace]}
+                    for namespace in sorted(self.hits.keys() | self.misses.keys())
+                }
+            }
+
+
+response_cache = app_state('response_cache')
+
+
+def cached(namespace):
+    """
+    Serve a GET handler from response_cache, keyed on endpoint, query args and
+    the ETag that @conditional (applied outside this) computed for the request.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            # Entries may have been rendered from a lagging replica, so clients
+            # that just wrote skip the cache along with the replica
+            if (not response_cache.enabled or wants_stream()
+                    or (current_app.config['DATABASE_READ_URL'] and wrote_recently())):
+                return view(*args, **kwargs)
+
+            key = (request.endpoint, tuple(sorted(kwargs.items())),
+                   tuple(sorted(request.args.items(multi=True))), g.get('etag'))
+            hit = response_cache.get(namespace, key)
+            if hit is not None:
+                body, mimetype = hit
+                return Response(body, mimetype=mimetype)
+
+            generation = response_cache.generation(namespace)
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                response_cache.set(namespace, key, generation, (response.get_data(), response.mimetype))
+            return response
+        return wrapper
+    return decorator
+
+
+# =============================================================================
+# CHANGE TRACKING & CONDITIONAL GET
+# =============================================================================
+
+# Write handlers call mark_changed() before committing. That bumps the
+# resource's ResourceVersion row inside the same transaction (so every worker
+# sees the new list ETag) and drops this worker's cached responses once the
+# commit succeeds.
+
+def dialect_insert(model):
+    """INSERT construct supporting on_conflict_do_update for the active database"""
+    insert = sqlite_insert if db.engine.dialect.name == 'sqlite' else postgresql_insert
+    return insert(model)
+
+
+def mark_changed(*namespaces):
+    """Record that the current transaction writes the given resources"""
+    for name in namespaces:
+        stmt = dialect_insert(ResourceVersion).values(name=name, version=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['name'],
+            set_={'version': ResourceVersion.version + 1}
+        )
+        db.session.execute(stmt)
+    db.session.info.setdefault('changed_namespaces', set()).update(namespaces)
+
+
+@db.event.listens_for(db.session, 'after_commit')
+def invalidate_changed(session):
+    response_cache.invalidate(*session.info.pop('changed_namespaces', ()))
+    events = session.info.pop('change_events', None)
+    if events:
+        # The write is already committed; a lost event only delays live
+        # updates until the client's next /api/sync, so never fail the request
+        try:
+            event_broker.publish(events)
+        except Exception:
+            current_app.logger.exception('Publishing %d change event(s) failed', len(events))
+
+
+@db.event.listens_for(db.session, 'after_rollback')
+def discard_changed(session):
+    session.info.pop('changed_namespaces', None)
+    session.info.pop('change_events', None)
+
+
+def record_deletes(resource, ids):
+    """Write tombstones for hard-deleted rows in the current transaction"""
+    now = datetime.now(timezone.utc)
+    db.session.execute(
+        db.insert(Tombstone),
+        [{'resource': resource, 'row_id': id, 'deleted_at': now} for id in ids]
+    )
+    queue_events(resource, 'deleted', ids)
+
+
+def make_etag(*parts):
+    return hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+
+
+def collection_etag(namespace, **kwargs):
+    """
+    ETag for a list response: the resource version plus everything else the
+    body depends on (query args, stream vs JSON, and today's date for the
+    date-relative note filters). One primary-key lookup, no rows loaded.
+
+    namespace may be a tuple for responses built from several resources.
+    """
+    namespaces = namespace if isinstance(namespace, tuple) else (namespace,)
+    versions = dict(db.session.query(ResourceVersion.name, ResourceVersion.version).filter(
+        ResourceVersion.name.in_(namespaces)
+    ).all())
+    return make_etag(
+        namespaces, [versions.get(name, 0) for name in namespaces], request.endpoint,
+        sorted(request.args.items(multi=True)), wants_stream(),
+        datetime.now(timezone.utc).date().isoformat()
+    )
+
+
+def row_etag(model, id):
+    """ETag for a single row from its updated_at, without loading the row"""
+    row = db.session.query(model.updated_at).filter(model.id == id).first()
+    if row is None:
+        raise NotFound()
+    return make_etag(model.__tablename__, id, row.updated_at.isoformat() if row.updated_at else None)
+
+
+def conditional(etag_for, resource):
+    """
+    Answer If-None-Match with 304 Not Modified when the ETag still matches,
+    before the handler runs. Responses carry the ETag and Cache-Control:
+    no-cache so browsers always revalidate instead of reusing stale data.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = g.etag = etag_for(resource, **kwargs)
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
+
+
+# =============================================================================
+# TIME BLOCK CONFLICTS
+# =============================================================================
+
+# Sessions are never longer than MAX_SESSION_HOURS, so everything overlapping
+# [start, end) starts within [start - MAX_SESSION_HOURS, end). That turns an
+# overlap lookup into one range seek on ix_study_sessions_start_time_id:
+# O(log n + k) no matter how much history there is.
+
+MAX_FREE_SLOT_DAYS = 92
+
+
+def max_session_length():
+    return timedelta(hours=current_app.config['MAX_SESSION_HOURS'])
+
+
+def validate_session_times(start, end):
+    if end <= start:
+        raise ApiError('end_time must be after start_time')
+    if end - start > max_session_length():
+        raise ApiError(f"Sessions cannot be longer than {current_app.config['MAX_SESSION_HOURS']:g} hours")
+
+
+def validate_bulk_session_times(indexed_rows):
+    """validate_session_times() for (index, row) pairs of a bulk request, as per-row errors"""
+    errors = []
+    for index, row in indexed_rows:
+        try:
+            validate_session_times(row['start_time'], row['end_time'])
+        except ApiError as error:
+            errors.append({'index': index, 'message': error.message})
+    if errors:
+        raise ApiError('Invalid rows', errors=errors)
+
+
+def overlong_session_ids():
+    """Ids of stored sessions longer than MAX_SESSION_HOURS, which overlap checks can miss"""
+    query = db.session.query(StudySession.id, StudySession.start_time, StudySession.end_time)
+    return [
+        row.id for row in query.execution_options(yield_per=5000)
+        if row.end_time - row.start_time > max_session_length()
+    ]
+
+
+def overlapping_sessions_query(start, end, exclude_id=None):
+    """One-off sessions overlapping [start, end): (query, order_columns, descending)"""
+    query = db.session.query(
+        StudySession.id, StudySession.title, StudySession.start_time, StudySession.end_time
+    ).filter(
+        StudySession.start_time >= start - max_session_length(),
+        StudySession.start_time < end,
+        StudySession.end_time > start
+    )
+    if exclude_id is not None:
+        query = query.filter(StudySession.id != exclude_id)
+    return query, [StudySession.start_time, StudySession.id], False
+
+
+def busy_intervals(start, end, exclude_id=None):
+    """
+    Sessions and recurrence occurrences overlapping [start, end), sorted by start.
+
+    Returns dicts with id, title, start_time and end_time (datetimes).
+    """
+    busy = [row._asdict() for row in order_query(*overlapping_sessions_query(start, end, exclude_id))]
+
+    rules = SessionRecurrence.query.filter(
+        SessionRecurrence.start_time < end,
+        db.or_(SessionRecurrence.until == None, SessionRecurrence.until >= start - max_session_length())
+    ).all()
+    for rule in rules:
+        duration = rule.end_time - rule.start_time
+        for occurrence_start, occurrence_end in rule.occurrences(start - duration, end + duration):
+            if occurrence_start < end and occurrence_end > start:
+                busy.append({
+                    'id': f'r{rule.id}:{occurrence_start.isoformat()}',
+                    'title': rule.title,
+                    'start_time': occurrence_start,
+                    'end_time': occurrence_end
+                })
+
+    busy.sort(key=lambda interval: interval['start_time'])
+    return busy
+
+
+def check_conflicts(start, end, exclude_id=None):
+    """Raise 409 listing the blocks that overlap [start, end)"""
+    conflicts = busy_intervals(start, end, exclude_id)
+    if conflicts:
+        raise ApiError('Time block overlaps existing sessions', 409, errors=[
+            {
+                'id': conflict['id'],
+                'message': f"overlaps '{conflict['title']}'",
+                'start_time': conflict['start_time'].isoformat(),
+                'end_time': conflict['end_time'].isoformat()
+            }
+            for conflict in conflicts
+        ])
+
+
+def check_bulk_conflicts(rows, checked):
+    """
+    check_conflicts() for a bulk write, as a 409 with per-row errors.
+
+    rows are the batch's sessions at their new times (with ids on update). The
+    rows at the `checked` indexes must not overlap a stored block, other than
+    the batch's own rows, or another row of the batch. Stored blocks are read
+    once for the span of the checked rows.
+    """
+    checked = list(checked)
+    if not checked:
+        return
+    start = min(rows[index]['start_time'] for index in checked)
+    end = max(rows[index]['end_time'] for index in checked)
+    batch_ids = {row['id'] for row in rows if 'id' in row}
+    blocks = [block for block in busy_intervals(start, end) if block['id'] not in batch_ids]
+    blocks += [
+        {'index': index, 'title': row['title'], 'start_time': row['start_time'], 'end_time': row['end_time']}
+        for index, row in enumerate(rows)
+    ]
+    blocks.sort(key=lambda block: block['start_time'])
+    starts = [block['start_time'] for block in blocks]
+    longest = max(block['end_time'] - block['start_time'] for block in blocks)
+
+    errors = []
+    for index in checked:
+        row = rows[index]
+        candidates = blocks[bisect.bisect_left(starts, row['start_time'] - longest):
+                            bisect.bisect_left(starts, row['end_time'])]
+        overlaps = [block for block in candidates
+                    if block['end_time'] > row['start_time'] and block.get('index') != index]
+        if overlaps:
+            errors.append({
+                'index': index,
+                'message': 'overlaps ' + ', '.join(f"'{block['title']}'" for block in overlaps),
+                'overlaps': [
+                    dict(block, start_time=block['start_time'].isoformat(), end_time=block['end_time'].isoformat())
+                    for block in overlaps
+                ]
+            })
+    if errors:
+        raise ApiError('Time blocks overlap existing sessions or each other', 409, errors=errors)
+
+
+def free_intervals(start, end, availability, zone=timezone.utc):
+    """
+    Sweep the sorted busy intervals in [start, end) and yield the free
+    (start, end) gaps in time order, clipped to `availability`: seven lists of
+    (day_start, day_end) times of day in `zone`, Monday first. Times in and
+    out are naive UTC.
+    """
+    def at(day, moment):
+        return naive_utc(datetime.combine(day, moment, tzinfo=zone))
+
+    def clip(gap_start, gap_end):
+        # Clip the gap to each availability window of each local day it touches
+        day = gap_start.replace(tzinfo=timezone.utc).astimezone(zone).date()
+        while at(day, time.min) < gap_end:
+            for day_start, day_end in availability[day.weekday()]:
+                slot_start = max(gap_start, at(day, day_start))
+                slot_end = min(gap_end, at(day, day_end))
+                if slot_end > slot_start:
+                    yield slot_start, slot_end
+            day += timedelta(days=1)
+
+    free_from = start
+    for interval in busy_intervals(start, end):
+        if interval['start_time'] > free_from:
+            yield from clip(free_from, interval['start_time'])
+        free_from = max(free_from, interval['end_time'])
+    if free_from < end:
+        yield from clip(free_from, end)
+
+
+def free_slots(start, end, duration, day_start, day_end, zone=timezone.utc):
+    """
+    Gaps of at least `duration` in [start, end) that fall inside the daily
+    availability window [day_start, day_end) (times of day in `zone`).
+    """
+    return [
+        {'start_time': slot_start.isoformat(), 'end_time': slot_end.isoformat()}
+        for slot_start, slot_end in free_intervals(start, end, [[(day_start, day_end)]] * 7, zone)
+        if slot_end - slot_start >= duration
+    ]
+
+
+# =============================================================================
+# LIVE UPDATES (SERVER-SENT EVENTS)
+# =============================================================================
+
+# Committed writes are published as {'resource', 'op', 'id'} events to every
+# /api/events subscriber, so clients refetch only what changed. ORM inserts and
+# updates are picked up from the session automatically; deletes come from
+# record_deletes() and Core bulk writes call queue_events() themselves.
+
+EVENT_QUEUE_SIZE = 1000
+EVENT_KEEPALIVE_SECONDS = 15
+EVENT_POLL_SECONDS = 0.5
+EVENT_RETENTION = timedelta(hours=1)
+EVENT_PRUNE_SECONDS = 60
+
+
+class Subscription:
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=EVENT_QUEUE_SIZE)
+        self.overflowed = False
+
+
+class EventBroker:
+    """In-process fan-out: every subscriber in this worker gets every event published in it"""
+
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        subscription = Subscription()
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, events):
+        self._fan_out(events)
+
+    def _fan_out(self, events):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                for event in events:
+                    subscription.queue.put_nowait(event)
+            except queue.Full:
+                # Too slow to keep up: drop it, the client resyncs on reconnect
+                subscription.overflowed = True
+                self.unsubscribe(subscription)
+
+
+class DatabaseEventBroker(EventBroker):
+    """
+    Stand-in for an external broker across gunicorn workers: events are
+    appended to the change_events table and one poller thread per worker
+    fans new rows out to that worker's subscribers.
+    """
+
+    def __init__(self, app):
+        super().__init__()
+        self.app = app
+        self._poller = None
+        self._last_id = None
+        self._pruned_at = monotonic()
+
+    def publish(self, events):
+        now = datetime.now(timezone.utc)
+        with db.engine.begin() as connection:
+            connection.execute(db.insert(ChangeEvent), [
+                {'resource': event['resource'], 'op': event['op'], 'row_id': event['id'], 'created_at': now}
+                for event in events
+            ])
+
+    def subscribe(self):
+        with self._lock:
+            if self._poller is None:
+                # Started lazily so it is created after gunicorn forks the worker
+                self._poller = threading.Thread(target=self._poll, name='event-poller', daemon=True)
+                self._poller.start()
+        return super().subscribe()
+
+    def _poll(self):
+        with self.app.app_context():
+            with db.engine.connect() as connection:
+                self._last_id = connection.execute(db.select(db.func.max(ChangeEvent.id))).scalar() or 0
+            while True:
+                sleep(EVENT_POLL_SECONDS)
+                try:
+                    self._poll_once()
+                except Exception:
+                    self.app.logger.exception('Polling change events failed')
+
+    def _poll_once(self):
+        with db.engine.connect() as connection:
+            rows = connection.execute(
+                db.select(ChangeEvent.id, ChangeEvent.resource, ChangeEvent.op, ChangeEvent.row_id)
+                .where(ChangeEvent.id > self._last_id)
+                .order_by(ChangeEvent.id)
+            ).all()
+        if rows:
+            self._last_id = rows[-1].id
+            self._fan_out([{'resource': r.resource, 'op': r.op, 'id': r.row_id} for r in rows])
+
+        # Polls are read-only; only prune (a write) every EVENT_PRUNE_SECONDS
+        if monotonic() - self._pruned_at >= EVENT_PRUNE_SECONDS:
+            self._pruned_at = monotonic()
+            with db.engine.begin() as connection:
+                connection.execute(db.delete(ChangeEvent).where(
+                    ChangeEvent.created_at < naive_utc(datetime.now(timezone.utc)) - EVENT_RETENTION
+                ))
+
+
+EVENT_RESOURCES = {
+    StudySession: 'sessions',
+    SessionRecurrence: 'recurrences',
+    Deadline: 'deadlines',
+    StudyItem: 'items',
+    Note: 'notes',
+    Subject: 'subjects',
+}
+
+event_broker = app_state('event_broker')
+
+
+def queue_events(resource, op, ids):
+    """Queue change events to publish when the current transaction commits"""
+    db.session.info.setdefault('change_events', []).extend(
+        {'resource': resource, 'op': op, 'id': id} for id in ids
+    )
+
+
+@db.event.listens_for(db.session, 'after_flush')
+def collect_events(session, flush_context):
+    for obj in session.new:
+        resource = EVENT_RESOURCES.get(type(obj))
+        if resource:
+            queue_events(resource, 'created', [obj.id])
+    for obj in session.dirty:
+        resource = EVENT_RESOURCES.get(type(obj))
+        if resource and session.is_modified(obj):
+            queue_events(resource, 'updated', [obj.id])
+
+
+@api.route('/api/events', methods=['GET'])
+def get_events():
+    """
+    Server-Sent Events stream of committed changes.
+
+    Each event is `event: change` with data {"resource", "op", "id"}. No replay:
+    after reconnecting, clients catch up with /api/sync. Every open stream holds
+    a worker thread, so run gunicorn with threaded or async workers.
+    """
+    broker = event_broker._get_current_object()  # the stream outlives the app context
+    subscription = broker.subscribe()
+
+    def generate():
+        try:
+            yield 'retry: 3000\n\n'
+            while not subscription.overflowed:
+                try:
+                    event = subscription.queue.get(timeout=EVENT_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                yield f"event: change\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+        finally:
+            broker.unsubscribe(subscription)
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+# =============================================================================
+# API ROUTES - STUDY SESSIONS
+# =============================================================================
+
+def sessions_query(model=StudySession, start=None, end=None):
+    """Sessions within [start, end), either end optional: (query, order_columns, descending)"""
+    query = model.query
+    if start:
+        query = query.filter(model.start_time >= start)
+    if end:
+        query = query.filter(model.end_time <= end)
+    return query, [model.start_time, model.id], False
+
+
+@api.route('/api/sessions', methods=['GET'])
+@conditional(collection_etag, 'sessions')
+@cached('sessions')
+def get_sessions():
+    """
+    Get a page of study sessions, optionally filtered by date range.
+
+    When both start and end are given, occurrences of recurring sessions in
+    that window are expanded and merged in start_time order. ?archived=true
+    reads archived sessions instead (without recurrences).
+    """
+    start = naive_utc(parse_datetime_arg('start'))
+    end = naive_utc(parse_datetime_arg('end'))
+    model = ArchivedStudySession if wants_archive() else StudySession
+    
+    query, order_columns, descending = sessions_query(model, start, end)
+    if start and end and model is StudySession:
+        return paginate_session_window(query, start, end)
+    return paginate(query, order_columns, descending)
+
+
+@api.route('/api/sessions', methods=['POST'])
+def create_session():
+    """Create a new study session (409 if it overlaps another, unless allow_overlap)"""
+    data = request.get_json()
+    
+    session = StudySession(
+        title=data['title'],
+        description=data.get('description'),
+        subject=data.get('subject'),
+        color=data.get('color', 'purple'),
+        start_time=naive_utc(datetime.fromisoformat(data['start_time'])),
+        end_time=naive_utc(datetime.fromisoformat(data['end_time'])),
+        is_completed=data.get('is_completed', False)
+    )
+    
+    validate_session_times(session.start_time, session.end_time)
+    if not data.get('allow_overlap'):
+        check_conflicts(session.start_time, session.end_time)
+    
+    db.session.add(session)
+    apply_stat_deltas([], session_stats(session))
+    mark_changed('sessions')
+    db.session.commit()
+    
+    return jsonify(session.to_dict()), 201
+
+
+def free_slots_now():
+    """Default start of a free-slot search: the current minute"""
+    return naive_utc(datetime.now(timezone.utc)).replace(second=0, microsecond=0)
+
+
+def free_slots_etag(namespace):
+    """collection_etag(), plus the resolved start when the search begins now"""
+    etag = collection_etag(namespace)
+    if 'start' not in request.args:
+        etag = make_etag(etag, free_slots_now().isoformat())
+    return etag
+
+
+@api.route('/api/sessions/free-slots', methods=['GET'])
+@conditional(free_slots_etag, 'sessions')
+def get_free_slots():
+    """
+    Find free time between start and end (default: the next 7 days) that can
+    fit `duration` minutes (default 60), within day_start-day_end each day
+    (default 08:00-22:00) in time zone `tz` (default UTC).
+    """
+    start = naive_utc(parse_datetime_arg('start', free_slots_now()))
+    end = naive_utc(parse_datetime_arg('end', start + timedelta(days=7)))
+    if end <= start:
+        raise ApiError('end must be after start')
+    if end - start > timedelta(days=MAX_FREE_SLOT_DAYS):
+        raise ApiError(f'Search windows are limited to {MAX_FREE_SLOT_DAYS} days')
+
+    try:
+        duration = timedelta(minutes=int(request.args.get('duration', 60)))
+        day_start = time.fromisoformat(request.args.get('day_start', '08:00'))
+        day_end = time.fromisoformat(request.args.get('day_end', '22:00'))
+    except ValueError:
+        raise ApiError('duration must be minutes; day_start and day_end must be HH:MM')
+    if duration <= timedelta(0):
+        raise ApiError('duration must be positive')
+    zone = parse_timezone(request.args.get('tz'))
+
+    return jsonify(free_slots(start, end, duration, day_start, day_end, zone))
+
+
+@api.route('/api/sessions/<int:id>', methods=['GET'])
+@conditional(row_etag, StudySession)
+def get_session(id):
+    """Get a single study session"""
+    session = StudySession.query.get_or_404(id)
+    return jsonify(session.to_dict())
+
+
+@api.route('/api/sessions/<int:id>', methods=['PUT'])
+def update_session(id):
+    """Update a study session (including moving time blocks; 409 on overlap unless allow_overlap)"""
+    session = StudySession.query.get_or_404(id)
+    data = request.get_json()
+    before = session_stats(session)
+    
+    if 'title' in data:
+        session.title = data['title']
+    if 'description' in data:
+        session.description = data['description']
+    if 'subject' in data:
+        session.subject = data['subject']
+    if 'color' in data:
+        session.color = data['color']
+    if 'start_time' in data:
+        session.start_time = naive_utc(datetime.fromisoformat(data['start_time']))
+    if 'end_time' in data:
+        session.end_time = naive_utc(datetime.fromisoformat(data['end_time']))
+    if 'is_completed' in data:
+        session.is_completed = data['is_completed']
+    
+    if 'start_time' in data or 'end_time' in data:
+        validate_session_times(session.start_time, session.end_time)
+        if not data.get('allow_overlap'):
+            check_conflicts(session.start_time, session.end_time, exclude_id=session.id)
+    
+    apply_stat_deltas(before, session_stats(session))
+    mark_changed('sessions')
+    db.session.commit()
+    return jsonify(session.to_dict())
+
+
+@api.route('/api/sessions/<int:id>', methods=['DELETE'])
+def delete_session(id):
+    """Delete a study session"""
+    session = StudySession.query.get_or_404(id)
+    db.session.delete(session)
+    unlink_sessions([session.id])
+    record_deletes('sessions', [session.id])
+    apply_stat_deltas(session_stats(session), [])
+    mark_changed('sessions')
+    db.session.commit()
+    return '', 204
+
+
+# =============================================================================
+# API ROUTES - RECURRING SESSIONS
+# =============================================================================
+
+# Windowed session lists merge one-off sessions and recurrence occurrences by
+# the key (start_time, recurrence_id, id): one-offs use recurrence_id 0 and
+# occurrences use id 0, so the key is unique and cursors work across both.
+
+def occurrence_stream(rule, window_start, window_end, fields=None):
+    for start, _ in rule.occurrences(window_start, window_end):
+        yield (start, rule.id, 0), functools.partial(rule.occurrence_dict, start, fields)
+
+
+def session_window_rows(query, window_start, window_end, after=None, limit=None, fields=None):
+    """
+    Lazily merge one-off sessions and expanded occurrences, after an optional cursor key.
+
+    One-offs are read as column tuples limited to fields (default: all columns).
+    """
+    if after:
+        after_start, after_rule, after_id = after
+        if after_rule == 0:
+            query = query.filter(db.tuple_(StudySession.start_time, StudySession.id) > (after_start, after_id))
+        else:
+            query = query.filter(StudySession.start_time > after_start)
+        window_start = max(window_start, after_start)
+
+    columns = fields or model_fields(StudySession)
+    query = select_fields(query, StudySession, columns, ('start_time', 'id'))
+    query = query.order_by(StudySession.start_time, StudySession.id)
+    if limit is not None:
+        query = query.limit(limit)
+    one_offs = (
+        ((row.start_time, 0, row.id), functools.partial(row_dict, columns, row))
+        for row in query.yield_per(STREAM_BATCH_SIZE)
+    )
+
+    rules = SessionRecurrence.query.filter(
+        SessionRecurrence.start_time <= window_end,
+        db.or_(SessionRecurrence.until == None, SessionRecurrence.until >= window_start)
+    ).order_by(SessionRecurrence.id).all()
+
+    merged = heapq.merge(
+        one_offs,
+        *[occurrence_stream(rule, window_start, window_end, fields) for rule in rules],
+        key=lambda row: row[0]
+    )
+    for key, render in merged:
+        if after is None or key > after:
+            yield key, render
+
+
+def paginate_session_window(query, window_start, window_end):
+    """paginate() for a session window that includes recurrence occurrences"""
+    fields = parse_fields(StudySession)
+    if wants_stream():
+        return stream_dicts(render() for _, render in session_window_rows(
+            query, window_start, window_end, fields=fields))
+    if request.args.get('all', '').lower() == 'true':
+        return json_response([render() for _, render in session_window_rows(
+            query, window_start, window_end, fields=fields)])
+
+    limit = parse_limit(request.args.get('limit'))
+    cursor = request.args.get('cursor')
+    after = None
+    if cursor:
+        after = tuple(decode_cursor(cursor, [StudySession.start_time, SessionRecurrence.id, StudySession.id]))
+
+    rows = []
+    for row in session_window_rows(query, window_start, window_end, after, limit + 1, fields):
+        rows.append(row)
+        if len(rows) > limit:
+            break
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(list(rows[-1][0]))
+
+    return json_response({
+        'items': [render() for _, render in rows],
+        'next_cursor': next_cursor
+    })
+
+
+def recurrence_values(data, partial=False):
+    """Validate recurrence fields from a request body into column values"""
+    values = {}
+    for field in ('title', 'description', 'subject', 'color'):
+        if field in data:
+            values[field] = data[field]
+    try:
+        for field in ('start_time', 'end_time', 'until'):
+            if field in data:
+                values[field] = naive_utc(datetime.fromisoformat(data[field])) if data[field] else None
+    except (TypeError, ValueError):
+        raise ApiError('start_time, end_time and until must be ISO datetimes')
+
+    if not partial:
+        for field in ('title', 'start_time', 'end_time'):
+            if not values.get(field):
+                raise ApiError(f'{field} is required')
+        values.setdefault('color', 'purple')
+
+    if 'weekdays' in data or not partial:
+        weekdays = data.get('weekdays', [values['start_time'].weekday()] if 'start_time' in values else None)
+        if (not isinstance(weekdays, list) or not weekdays
+                or not all(isinstance(day, int) and 0 <= day <= 6 for day in weekdays)):
+            raise ApiError('weekdays must be a non-empty list of integers 0 (Monday) to 6')
+        values['weekdays'] = ','.join(str(day) for day in sorted(set(weekdays)))
+    if 'interval' in data:
+        if not isinstance(data['interval'], int) or data['interval'] < 1:
+            raise ApiError('interval must be a positive integer')
+        values['interval'] = data['interval']
+    if 'count' in data:
+        if data['count'] is not None and (not isinstance(data['count'], int) or data['count'] < 1):
+            raise ApiError('count must be a positive integer')
+        values['count'] = data['count']
+    return values
+
+
+@api.route('/api/recurrences', methods=['GET'])
+@conditional(collection_etag, 'recurrences')
+def get_recurrences():
+    """Get a page of recurring session rules"""
+    return paginate(SessionRecurrence.query, [SessionRecurrence.id])
+
+
+@api.route('/api/recurrences', methods=['POST'])
+def create_recurrence():
+    """Create a recurring study session"""
+    rule = SessionRecurrence(**recurrence_values(request.get_json()))
+    if rule.end_time <= rule.start_time:
+        raise ApiError('end_time must be after start_time')
+    
+    db.session.add(rule)
+    mark_changed('sessions', 'recurrences')
+    db.session.commit()
+    
+    return jsonify(rule.to_dict()), 201
+
+
+@api.route('/api/recurrences/<int:id>', methods=['PUT'])
+def update_recurrence(id):
+    """Update a recurring study session rule (affects every occurrence)"""
+    rule = SessionRecurrence.query.get_or_404(id)
+    for field, value in recurrence_values(request.get_json(), partial=True).items():
+        setattr(rule, field, value)
+    if rule.end_time <= rule.start_time:
+        raise ApiError('end_time must be after start_time')
+    
+    mark_changed('sessions', 'recurrences')
+    db.session.commit()
+    return jsonify(rule.to_dict())
+
+
+@api.route('/api/recurrences/<int:id>/exceptions', methods=['POST'])
+def add_recurrence_exception(id):
+    """Skip one occurrence (e.g. before replacing it with a one-off session)"""
+    rule = SessionRecurrence.query.get_or_404(id)
+    data = request.get_json()
+    try:
+        start = naive_utc(datetime.fromisoformat(data['occurrence_start']))
+    except (KeyError, TypeError, ValueError):
+        raise ApiError('occurrence_start must be an ISO datetime')
+    
+    exceptions = set(rule.exception_list)
+    exceptions.add(start)
+    rule.exceptions = json.dumps(sorted(value.isoformat() for value in exceptions))
+    
+    mark_changed('sessions', 'recurrences')
+    db.session.commit()
+    return jsonify(rule.to_dict())
+
+
+@api.route('/api/recurrences/<int:id>/detach', methods=['POST'])
+def detach_occurrence(id):
+    """
+    Replace one occurrence with a one-off session, in one transaction.
+
+    Takes occurrence_start plus any session fields (start_time, end_time,
+    title, is_completed, ...); missing fields are copied from the occurrence.
+    The occurrence is skipped before the conflict check, so the session may
+    overlap the time it replaces. On any error nothing is written.
+    """
+    rule = SessionRecurrence.query.get_or_404(id)
+    data = request.get_json() or {}
+    try:
+        occurrence_start = naive_utc(datetime.fromisoformat(data['occurrence_start']))
+        start = naive_utc(datetime.fromisoformat(data['start_time'])) if data.get('start_time') else None
+        end = naive_utc(datetime.fromisoformat(data['end_time'])) if data.get('end_time') else None
+    except (KeyError, TypeError, ValueError):
+        raise ApiError('occurrence_start, start_time and end_time must be ISO datetimes')
+    duration = rule.end_time - rule.start_time
+    if (occurrence_start, occurrence_start + duration) not in rule.occurrences(occurrence_start,
+                                                                              occurrence_start + duration):
+        raise ApiError(f'No occurrence starts at {occurrence_start.isoformat()}', 404)
+
+    rule.exceptions = with_exceptions(rule.exceptions, [occurrence_start])
+    session = StudySession(
+        title=data.get('title', rule.title),
+        description=data.get('description', rule.description),
+        subject=data.get('subject', rule.subject),
+        color=data.get('color', rule.color),
+        start_time=start or occurrence_start,
+        end_time=end or (start or occurrence_start) + duration,
+        is_completed=data.get('is_completed', False)
+    )
+    validate_session_times(session.start_time, session.end_time)
+    if not data.get('allow_overlap'):
+        check_conflicts(session.start_time, session.end_time)
+
+    db.session.add(session)
+    apply_stat_deltas([], session_stats(session))
+    mark_changed('sessions', 'recurrences')
+    db.session.commit()
+    return jsonify(session.to_dict()), 201
+
+
+@api.route('/api/recurrences/<int:id>', methods=['DELETE'])
+def delete_recurrence(id):
+    """Delete a recurring study session and all its occurrences"""
+    rule = SessionRecurrence.query.get_or_404(id)
+    db.session.delete(rule)
+    record_deletes('recurrences', [rule.id])
+    mark_changed('sessions', 'recurrences')
+    db.session.commit()
+    return '', 204
+
+
+# =============================================================================
+# API ROUTES - DEADLINES
+# =============================================================================
+
+def deadlines_query(model=Deadline, completed=None, subject=None):
+    """Deadlines, soonest first: (query, order_columns, descending)"""
+    query = model.query
+    if completed is not None:
+        query = query.filter(model.is_completed == completed)
+    if subject:
+        query = query.filter(model.subject == subject)
+    return query, [model.due_date, model.id], False
+
+
+@api.route('/api/deadlines', methods=['GET'])
+@conditional(collection_etag, 'deadlines')
+@cached('deadlines')
+def get_deadlines():
+    """Get a page of deadlines, optionally filtered (?archived=true for archived ones)"""
+    completed = request.args.get('completed')
+    model = ArchivedDeadline if wants_archive() else Deadline
+    return paginate(*deadlines_query(
+        model,
+        completed=None if completed is None else completed.lower() == 'true',
+        subject=request.args.get('subject')
+    ))
+
+
+@api.route('/api/deadlines', methods=['POST'])
+def create_deadline():
+    """Create a new deadline"""
+    data = request.get_json()
+    
+    deadline = Deadline(
+        title=data['title'],
+        description=data.get('description'),
+        subject=data.get('subject'),
+        color=data.get('color', 'orange'),
+        due_date=naive_utc(datetime.fromisoformat(data['due_date'])),
+        priority=data.get('priority', 'medium'),
+        is_completed=data.get('is_completed', False)
+    )
+    
+    db.session.add(deadline)
+    mark_changed('deadlines')
+    db.session.commit()
+    
+    return jsonify(deadline.to_dict()), 201
+
+
+@api.route('/api/deadlines/<int:id>', methods=['GET'])
+@conditional(row_etag, Deadline)
+def get_deadline(id):
+    """Get a single deadline"""
+    deadline = Deadline.query.get_or_404(id)
+    return jsonify(deadline.to_dict())
+
+
+@api.route('/api/deadlines/<int:id>', methods=['PUT'])
+def update_deadline(id):
+    """Update a deadline"""
+    deadline = Deadline.query.get_or_404(id)
+    data = request.get_json()
+    
+    if 'title' in data:
+        deadline.title = data['title']
+    if 'description' in data:
+        deadline.description = data['description']
+    if 'subject' in data:
+        deadline.subject = data['subject']
+    if 'color' in data:
+        deadline.color = data['color']
+    if 'due_date' in data:
+        deadline.due_date = naive_utc(datetime.fromisoformat(data['due_date']))
+    if 'priority' in data:
+        deadline.priority = data['priority']
+    if 'is_completed' in data:
+        deadline.is_completed = data['is_completed']
+    
+    mark_changed('deadlines')
+    db.session.commit()
+    return jsonify(deadline.to_dict())
+
+
+@api.route('/api/deadlines/<int:id>', methods=['DELETE'])
+def delete_deadline(id):
+    """Delete a deadline"""
+    deadline = Deadline.query.get_or_404(id)
+    db.session.delete(deadline)
+    record_deletes('deadlines', [deadline.id])
+    mark_changed('deadlines')
+    db.session.commit()
+    return '', 204
+
+
+# =============================================================================
+# API ROUTES - STUDY ITEMS (Checklist)
+# =============================================================================
+
+def items_query(model=StudyItem, completed=None, subject=None, deadline_id=None):
+    """Checklist items in checklist order: (query, order_columns, descending)"""
+    query = model.query
+    if completed is not None:
+        query = query.filter(model.is_completed == completed)
+    if subject:
+        query = query.filter(model.subject == subject)
+    if deadline_id:
+        query = query.filter(model.deadline_id == deadline_id)
+    return query, [model.order, model.created_at, model.id], False
+
+
+@api.route('/api/items', methods=['GET'])
+@conditional(collection_etag, 'items')
+def get_items():
+    """Get a page of study items (?archived=true for archived ones)"""
+    completed = request.args.get('completed')
+    deadline_id = request.args.get('deadline_id')
+    model = ArchivedStudyItem if wants_archive() else StudyItem
+    return paginate(*items_query(
+        model,
+        completed=None if completed is None else completed.lower() == 'true',
+        subject=request.args.get('subject'),
+        deadline_id=int(deadline_id) if deadline_id else None
+    ))
+
+
+def adjust_progress(subject, total=0, completed=0):
+    """Add deltas to a subject's progress counters in the current transaction"""
+    stmt = dialect_insert(SubjectProgress).values(subject=subject or '', total=total, completed=completed)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['subject'],
+        set_={
+            'total': SubjectProgress.total + total,
+            'completed': SubjectProgress.completed + completed
+        }
+    )
+    db.session.execute(stmt)
+
+
+def count_progress():
+    """Recount per-subject progress from study_items and archived_study_items: {subject: (total, completed)}"""
+    rows = []
+    for model in (StudyItem, ArchivedStudyItem):
+        rows += db.session.query(
+            model.subject,
+            db.func.count(model.id),
+            db.func.sum(db.case((model.is_completed == True, 1), else_=0))
+        ).group_by(model.subject).all()
+
+    counts = {}
+    for subject, total_count, completed_count in rows:
+        # NULL and '' subjects share a counter row
+        prev_total, prev_completed = counts.get(subject or '', (0, 0))
+        counts[subject or ''] = (prev_total + total_count, prev_completed + (completed_count or 0))
+    return counts
+
+
+def progress_drift(counts):
+    """Subjects whose stored counters differ from a fresh count_progress()"""
+    stored = {p.subject: (p.total, p.completed) for p in SubjectProgress.query.all()}
+    return sorted(
+        subject for subject in counts.keys() | stored.keys()
+        if counts.get(subject, (0, 0)) != stored.get(subject, (0, 0))
+    )
+
+
+def rebuild_progress():
+    """Replace the progress counters with a fresh count. Returns the subjects that drifted."""
+    counts = count_progress()
+    drifted = progress_drift(counts)
+
+    SubjectProgress.query.delete()
+    db.session.add_all(
+        SubjectProgress(subject=subject, total=total, completed=completed)
+        for subject, (total, completed) in counts.items()
+    )
+    mark_changed('progress')
+    db.session.commit()
+    return drifted
+
+
+# Checklist order keys are sparse: new items go ORDER_GAP after the last one and
+# a move takes the midpoint between its new neighbours, so it writes one row.
+# When two neighbours' keys are adjacent the whole list is respaced in batches.
+ORDER_GAP = 1024
+REBALANCE_BATCH_SIZE = 500
+
+ITEM_ORDER = (StudyItem.order, StudyItem.created_at, StudyItem.id)
+
+
+def next_item_order():
+    """Order key for an item appended to the end of the checklist"""
+    # MAX over the leading column of ix_study_items_order_created_at_id is an index seek
+    max_order = db.session.query(db.func.max(StudyItem.order)).scalar()
+    return 0 if max_order is None else max_order + ORDER_GAP
+
+
+def adjacent_item(item, exclude_id, later=True):
+    """The item right after (or before) `item` in checklist order, skipping exclude_id"""
+    key = db.tuple_(*ITEM_ORDER)
+    values = (item.order, item.created_at, item.id)
+    query = StudyItem.query.filter(StudyItem.id != exclude_id)
+    if later:
+        query = query.filter(key > values).order_by(*ITEM_ORDER)
+    else:
+        query = query.filter(key < values).order_by(*[column.desc() for column in ITEM_ORDER])
+    return query.first()
+
+
+def order_between(after, before):
+    """An order key strictly between two neighbours (either may be None), or None if there is no room"""
+    if after is None:
+        return before.order - ORDER_GAP
+    if before is None:
+        return after.order + ORDER_GAP
+    if before.order - after.order < 2:
+        return None
+    return (after.order + before.order) // 2
+
+
+def rebalance_item_order():
+    """Respace every item ORDER_GAP apart, keeping the current sequence. Returns the row count."""
+    ids = db.session.scalars(db.select(StudyItem.id).order_by(*ITEM_ORDER)).all()
+    now = datetime.now(timezone.utc)
+    for start in range(0, len(ids), REBALANCE_BATCH_SIZE):
+        db.session.execute(db.update(StudyItem), [
+            {'id': id, 'order': (start + n) * ORDER_GAP, 'updated_at': now}
+            for n, id in enumerate(ids[start:start + REBALANCE_BATCH_SIZE])
+        ])
+    # Bulk UPDATE by primary key leaves loaded objects stale
+    db.session.expire_all()
+    queue_events('items', 'updated', ids)
+    return len(ids)
+
+
+@api.route('/api/items', methods=['POST'])
+def create_item():
+    """Create a new study item"""
+    data = request.get_json()
+    
+    item = StudyItem(
+        title=data['title'],
+        description=data.get('description'),
+        subject=data.get('subject'),
+        is_completed=data.get('is_completed', False),
+        order=data['order'] if data.get('order') is not None else next_item_order(),
+        deadline_id=data.get('deadline_id'),
+        completed_at=datetime.now(timezone.utc) if data.get('is_completed') else None
+    )
+    
+    db.session.add(item)
+    adjust_progress(item.subject, total=1, completed=int(bool(item.is_completed)))
+    apply_stat_deltas([], item_stats(item))
+    mark_changed('items', 'progress')
+    db.session.commit()
+    
+    return jsonify(item.to_dict()), 201
+
+
+@api.route('/api/items/<int:id>', methods=['PUT'])
+def update_item(id):
+    """Update a study item (including marking complete)"""
+    item = StudyItem.query.get_or_404(id)
+    data = request.get_json()
+    old_subject, old_completed = item.subject, bool(item.is_completed)
+    before = item_stats(item)
+    
+    if 'title' in data:
+        item.title = data['title']
+    if 'description' in data:
+        item.description = data['description']
+    if 'subject' in data:
+        item.subject = data['subject']
+    if 'order' in data:
+        item.order = data['order']
+    if 'deadline_id' in data:
+        item.deadline_id = data['deadline_id']
+    if 'is_completed' in data:
+        item.is_completed = data['is_completed']
+        if data['is_completed']:
+            item.completed_at = datetime.now(timezone.utc)
+        else:
+            item.completed_at = None
+    
+    new_completed = bool(item.is_completed)
+    if (item.subject or '') != (old_subject or ''):
+        adjust_progress(old_subject, total=-1, completed=-int(old_completed))
+        adjust_progress(item.subject, total=1, completed=int(new_completed))
+    elif new_completed != old_completed:
+        adjust_progress(item.subject, completed=1 if new_completed else -1)
+    apply_stat_deltas(before, item_stats(item))
+    
+    mark_changed('items', 'progress')
+    db.session.commit()
+    return jsonify(item.to_dict())
+
+
+@api.route('/api/items/<int:id>/move', methods=['POST'])
+def move_item(id):
+    """
+    Move an item between two neighbours: {"after_id": A, "before_id": B}.
+
+    Either neighbour may be left out to place the item directly after A or
+    directly before B. Only the moved item is written unless A and B have no
+    free key between them, in which case the list is respaced first.
+    """
+    item = StudyItem.query.get_or_404(id)
+    data = request.get_json() or {}
+    after_id, before_id = data.get('after_id'), data.get('before_id')
+    if after_id is None and before_id is None:
+        raise ApiError('after_id or before_id is required')
+    if id in (after_id, before_id):
+        raise ApiError('An item cannot be moved next to itself')
+
+    def load(neighbour_id, name):
+        if neighbour_id is None:
+            return None
+        if not isinstance(neighbour_id, int) or isinstance(neighbour_id, bool):
+            raise ApiError(f'{name} must be an item id')
+        neighbour = db.session.get(StudyItem, neighbour_id)
+        if neighbour is None:
+            raise ApiError(f'Item {neighbour_id} not found', 404)
+        return neighbour
+
+    after, before = load(after_id, 'after_id'), load(before_id, 'before_id')
+    if after is None:
+        after = adjacent_item(before, id, later=False)
+    elif before is None:
+        before = adjacent_item(after, id)
+    elif (after.order, after.created_at, after.id) >= (before.order, before.created_at, before.id):
+        raise ApiError('after_id must come before before_id')
+
+    order = order_between(after, before)
+    if order is None:
+        rebalance_item_order()
+        order = order_between(after, before)
+    item.order = order
+
+    mark_changed('items')
+    db.session.commit()
+    return jsonify(item.to_dict())
+
+
+@api.route('/api/items/<int:id>', methods=['DELETE'])
+def delete_item(id):
+    """Delete a study item"""
+    item = StudyItem.query.get_or_404(id)
+    db.session.delete(item)
+    record_deletes('items', [item.id])
+    adjust_progress(item.subject, total=-1, completed=-int(bool(item.is_completed)))
+    apply_stat_deltas(item_stats(item), [])
+    mark_changed('items', 'progress')
+    db.session.commit()
+    return '', 204
+
+
+@api.route('/api/items/progress', methods=['GET'])
+@conditional(collection_etag, 'progress')
+@cached('progress')
+def get_progress():
+    """Get overall progress statistics from the materialized subject counters"""
+    return jsonify(progress_stats())
+
+
+def progress_stats():
+    """Overall and per-subject progress from the materialized subject counters"""
+    total = 0
+    completed = 0
+    by_subject = {}
+    for progress in SubjectProgress.query.all():
+        total += progress.total
+        completed += progress.completed
+        if progress.subject and progress.total > 0:
+            by_subject[progress.subject] = {
+                'total': progress.total,
+                'completed': progress.completed,
+                'percentage': round(progress.completed / progress.total * 100, 1)
+            }
+    
+    return {
+        'total': total,
+        'completed': completed,
+        'percentage': round(completed / total * 100, 1) if total > 0 else 0,
+        'by_subject': by_subject
+    }
+
+
+# =============================================================================
+# API ROUTES - NOTES
+# =============================================================================
+
+def notes_query(subject=None, session_id=None, show_today=False):
+    """Notes, newest first: (query, order_columns, descending)"""
+    query = Note.query
+    if subject:
+        query = query.filter(Note.subject == subject)
+    if session_id:
+        query = query.filter(Note.session_id == session_id)
+    if show_today:
+        query = query.filter(visible_today())
+    return query, [Note.created_at, Note.id], True
+
+
+@api.route('/api/notes', methods=['GET'])
+@conditional(collection_etag, 'notes')
+def get_notes():
+    """Get a page of notes, newest first"""
+    session_id = request.args.get('session_id')
+    return paginate(*notes_query(
+        subject=request.args.get('subject'),
+        session_id=int(session_id) if session_id else None,
+        show_today=bool(request.args.get('show_today'))
+    ))
+
+
+def visible_today():
+    """Filter for notes without a show_date or whose show_date is today or earlier"""
+    # Range on the raw column (not date(show_date)) so ix_notes_show_date_id applies
+    tomorrow = start_of_day(datetime.now(timezone.utc).date() + timedelta(days=1))
+    return db.or_(
+        Note.show_date == None,
+        Note.show_date < tomorrow
+    )
+
+
+@api.route('/api/notes/upcoming', methods=['GET'])
+@conditional(collection_etag, 'notes')
+def get_upcoming_notes():
+    """
+    Get notes that become visible within [start, end), soonest first.
+
+    Defaults to the week starting tomorrow; notes for today and earlier are
+    already returned by ?show_today=true.
+    """
+    tomorrow = start_of_day(datetime.now(timezone.utc).date() + timedelta(days=1))
+    start = naive_utc(parse_datetime_arg('start', tomorrow))
+    end = naive_utc(parse_datetime_arg('end', start + timedelta(days=7)))
+
+    return paginate(*upcoming_notes_query(start, end, request.args.get('subject')))
+
+
+def upcoming_notes_query(start, end, subject=None):
+    """Notes becoming visible within [start, end), soonest first: (query, order_columns, descending)"""
+    query = Note.query.filter(Note.show_date >= start, Note.show_date < end)
+    if subject:
+        query = query.filter(Note.subject == subject)
+    return query, [Note.show_date, Note.id], False
+
+
+@api.route('/api/notes', methods=['POST'])
+def create_note():
+    """Create a new note"""
+    data = request.get_json()
+    
+    note = Note(
+        title=data['title'],
+        content=data['content'],
+        subject=data.get('subject'),
+        session_id=data.get('session_id'),
+        show_date=naive_utc(datetime.fromisoformat(data['show_date'])) if data.get('show_date') else None
+    )
+    
+    db.session.add(note)
+    mark_changed('notes')
+    db.session.commit()
+    
+    return jsonify(note.to_dict()), 201
+
+
+@api.route('/api/notes/<int:id>', methods=['PUT'])
+def update_note(id):
+    """Update a note"""
+    note = Note.query.get_or_404(id)
+    data = request.get_json()
+    
+    if 'title' in data:
+        note.title = data['title']
+    if 'content' in data:
+        note.content = data['content']
+    if 'subject' in data:
+        note.subject = data['subject']
+    if 'session_id' in data:
+        note.session_id = data['session_id']
+    if 'show_date' in data:
+        note.show_date = naive_utc(datetime.fromisoformat(data['show_date'])) if data['show_date'] else None
+    
+    mark_changed('notes')
+    db.session.commit()
+    return jsonify(note.to_dict())
+
+
+@api.route('/api/notes/<int:id>', methods=['DELETE'])
+def delete_note(id):
+    """Delete a note"""
+    note = Note.query.get_or_404(id)
+    db.session.delete(note)
+    record_deletes('notes', [note.id])
+    mark_changed('notes')
+    db.session.commit()
+    return '', 204
+
+
+# =============================================================================
+# API ROUTES - SUBJECTS
+# =============================================================================
+
+@api.route('/api/subjects', methods=['GET'])
+@conditional(collection_etag, 'subjects')
+@cached('subjects')
+def get_subjects():
+    """Get all subjects (optionally limited to ?fields=)"""
+    subjects = Subject.query.order_by(Subject.name)
+    return json_response(serialize_query(subjects, Subject, parse_fields(Subject)))
+
+
+@api.route('/api/subjects', methods=['POST'])
+def create_subject():
+    """Create a new subject"""
+    data = request.get_json()
+    
+    subject = Subject(
+        name=data['name'],
+        color=data.get('color', 'purple')
+    )
+    
+    db.session.add(subject)
+    mark_changed('subjects')
+    db.session.commit()
+    
+    return jsonify(subject.to_dict()), 201
+
+
+@api.route('/api/subjects/<int:id>', methods=['DELETE'])
+def delete_subject(id):
+    """Delete a subject"""
+    subject = Subject.query.get_or_404(id)
+    db.session.delete(subject)
+    record_deletes('subjects', [subject.id])
+    mark_changed('subjects')
+    db.session.commit()
+    return '', 204
+
+
+# =============================================================================
+# API ROUTES - BULK WRITES
+# =============================================================================
+
+# POST/PUT/DELETE /api/<resource>/bulk take a JSON array and apply it in one
+# transaction with one executemany-style statement. The batch is validated up
+# front: if any row is invalid nothing is written and the 400 response lists
+# an {'index', 'message'} error per bad row. Sessions that would overlap a
+# stored block or another row of the batch get a 409 with the same per-row
+# errors, unless ?allow_overlap=true.
+
+MAX_BULK_ROWS = 1000
+
+# Writable fields per resource: required fields, then optional fields with the
+# defaults used on create
+BULK_FIELDS = {
+    'sessions': {
+        'required': ('title', 'start_time', 'end_time'),
+        'defaults': {'description': None, 'subject': None, 'color': 'purple', 'is_completed': False}
+    },
+    'deadlines': {
+        'required': ('title', 'due_date'),
+        'defaults': {'description': None, 'subject': None, 'color': 'orange',
+                     'priority': 'medium', 'is_completed': False}
+    },
+    'items': {
+        'required': ('title',),
+        'defaults': {'description': None, 'subject': None, 'is_completed': False,
+                     'order': None, 'deadline_id': None}
+    },
+}
+
+BULK_MODELS = {'sessions': StudySession, 'deadlines': Deadline, 'items': StudyItem}
+
+FIELD_TYPES = {
+    'title': str, 'description': str, 'subject': str, 'color': str, 'priority': str,
+    'is_completed': bool, 'order': int, 'deadline_id': int,
+    'start_time': datetime, 'end_time': datetime, 'due_date': datetime,
+}
+
+
+def parse_bulk_row(data, fields, partial):
+    """Validate one bulk row and return its column values; raises ValueError"""
+    if not isinstance(data, dict):
+        raise ValueError('row must be an object')
+
+    values = {}
+    for field in fields['required'] + tuple(fields['defaults']):
+        if field not in data:
+            if field in fields['required'] and not partial:
+                raise ValueError(f'{field} is required')
+            if not partial:
+                values[field] = fields['defaults'][field]
+            continue
+
+        value = data[field]
+        expected = FIELD_TYPES[field]
+        if value is None:
+            if field in fields['required']:
+                raise ValueError(f'{field} must not be null')
+        elif expected is datetime:
+            if not isinstance(value, str):
+                raise ValueError(f'{field} must be an ISO datetime')
+            value = naive_utc(datetime.fromisoformat(value))
+        elif not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+            raise ValueError(f'{field} must be of type {expected.__name__}')
+        values[field] = value
+
+    if 'start_time' in values and 'end_time' in values and values['end_time'] <= values['start_time']:
+        raise ValueError('end_time must be after start_time')
+    return values
+
+
+def parse_bulk_rows(resource, partial=False):
+    """Validate the request's JSON array for a bulk create (or update, with ids)"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, list):
+        raise ApiError('Expected a JSON array of rows')
+    if len(data) > MAX_BULK_ROWS:
+        raise ApiError(f'At most {MAX_BULK_ROWS} rows per request', 413)
+
+    rows, errors, seen_ids = [], [], set()
+    for index, row in enumerate(data):
+        try:
+            values = parse_bulk_row(row, BULK_FIELDS[resource], partial)
+            if partial:
+                id = row.get('id')
+                if not isinstance(id, int) or isinstance(id, bool):
+                    raise ValueError('id is required')
+                if id in seen_ids:
+                    raise ValueError(f'duplicate id {id}')
+                seen_ids.add(id)
+                values['id'] = id
+            rows.append(values)
+        except ValueError as error:
+            errors.append({'index': index, 'message': str(error)})
+
+    if errors:
+        raise ApiError('Invalid rows', errors=errors)
+    return rows
+
+
+def parse_bulk_ids():
+    """Validate the request's JSON array of ids for a bulk delete"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, list):
+        raise ApiError('Expected a JSON array of ids')
+    if len(data) > MAX_BULK_ROWS:
+        raise ApiError(f'At most {MAX_BULK_ROWS} rows per request', 413)
+
+    errors = [
+        {'index': index, 'message': 'id must be an integer'}
+        for index, id in enumerate(data)
+        if not isinstance(id, int) or isinstance(id, bool)
+    ]
+    if errors:
+        raise ApiError('Invalid rows', errors=errors)
+    return list(dict.fromkeys(data))
+
+
+def load_existing(model, ids, *columns):
+    """Fetch {id: row} for the given ids in one query; 404 with per-row errors if any are missing"""
+    rows = {row.id: row for row in db.session.query(model.id, *columns).filter(model.id.in_(ids))}
+    missing = [
+        {'index': index, 'message': f'id {id} not found'}
+        for index, id in enumerate(ids) if id not in rows
+    ]
+    if missing:
+        raise ApiError('Rows not found', 404, errors=missing)
+    return rows
+
+
+def apply_progress_deltas(before, after):
+    """Adjust progress counters for item states (subject, is_completed) turning from before into after"""
+    deltas = defaultdict(lambda: [0, 0])
+    for sign, states in ((-1, before), (1, after)):
+        for subject, is_completed in states:
+            delta = deltas[subject or '']
+            delta[0] += sign
+            delta[1] += sign * int(bool(is_completed))
+    for subject, (total, completed) in deltas.items():
+        if total or completed:
+            adjust_progress(subject, total=total, completed=completed)
+
+
+def allows_bulk_overlap():
+    """?allow_overlap=true: skip the overlap check for bulk session writes"""
+    return request.args.get('allow_overlap', '').lower() == 'true'
+
+
+def bulk_namespaces(resource):
+    return ('items', 'progress') if resource == 'items' else (resource,)
+
+
+@api.route('/api/<any(sessions, deadlines, items):resource>/bulk', methods=['POST'])
+def bulk_create(resource):
+    """Create many sessions, deadlines or items in one transaction"""
+    model = BULK_MODELS[resource]
+    rows = parse_bulk_rows(resource)
+
+    if resource == 'items':
+        # One aggregate for the whole batch instead of one per inserted item
+        next_order = next_item_order()
+        now = datetime.now(timezone.utc)
+        for row in rows:
+            if row['order'] is None:
+                row['order'] = next_order
+                next_order += ORDER_GAP
+            row['completed_at'] = now if row['is_completed'] else None
+        apply_progress_deltas([], [(row['subject'], row['is_completed']) for row in rows])
+        apply_stat_deltas([], [piece for row in rows for piece in item_stats(row)])
+    elif resource == 'sessions':
+        validate_bulk_session_times(enumerate(rows))
+        if not allows_bulk_overlap():
+            check_bulk_conflicts(rows, range(len(rows)))
+        apply_stat_deltas([], [piece for row in rows for piece in session_stats(row)])
+
+    created = []
+    if rows:
+        created = db.session.scalars(
+            db.insert(model).returning(model, sort_by_parameter_order=True), rows
+        ).all()
+        queue_events(resource, 'created', [row.id for row in created])
+    mark_changed(*bulk_namespaces(resource))
+    db.session.commit()
+
+    return jsonify({'results': [row.to_dict() for row in created]}), 201
+
+
+@api.route('/api/<any(sessions, deadlines, items):resource>/bulk', methods=['PUT'])
+def bulk_update(resource):
+    """Update many sessions, deadlines or items (each row needs an id) in one transaction"""
+    model = BULK_MODELS[resource]
+    rows = parse_bulk_rows(resource, partial=True)
+    ids = [row['id'] for row in rows]
+
+    if resource == 'items':
+        existing = load_existing(StudyItem, ids, StudyItem.subject, StudyItem.is_completed,
+                                 StudyItem.completed_at)
+        now = datetime.now(timezone.utc)
+        before, after = [], []
+        for row in rows:
+            old = existing[row['id']]
+            before.append((old.subject, old.is_completed))
+            after.append((row.get('subject', old.subject), row.get('is_completed', old.is_completed)))
+            if 'is_completed' in row:
+                row['completed_at'] = now if row['is_completed'] else None
+        apply_progress_deltas(before, after)
+        apply_stat_deltas(
+            [piece for row in existing.values() for piece in item_stats(row)],
+            [piece for row in rows for piece in item_stats(merged_row(existing[row['id']], row))]
+        )
+    elif resource == 'sessions':
+        existing = load_existing(StudySession, ids, StudySession.title, *STAT_SESSION_COLUMNS)
+        merged = [merged_row(existing[row['id']], row) for row in rows]
+        # Only rows that move are checked, so older over-long sessions can still be renamed
+        moved = [index for index, changes in enumerate(rows) if 'start_time' in changes or 'end_time' in changes]
+        validate_bulk_session_times((index, merged[index]) for index in moved)
+        if not allows_bulk_overlap():
+            check_bulk_conflicts(merged, moved)
+        apply_stat_deltas(
+            [piece for row in existing.values() for piece in session_stats(row)],
+            [piece for row in merged for piece in session_stats(row)]
+        )
+    else:
+        load_existing(model, ids)
+
+    if rows:
+        db.session.execute(db.update(model), rows)
+        queue_events(resource, 'updated', ids)
+    mark_changed(*bulk_namespaces(resource))
+    db.session.commit()
+
+    updated = {row.id: row for row in model.query.filter(model.id.in_(ids))}
+    return jsonify({'results': [updated[id].to_dict() for id in ids]})
+
+
+@api.route('/api/<any(sessions, deadlines, items):resource>/bulk', methods=['DELETE'])
+def bulk_delete(resource):
+    """Delete many sessions, deadlines or items by id in one transaction"""
+    model = BULK_MODELS[resource]
+    ids = parse_bulk_ids()
+
+    if resource == 'items':
+        existing = load_existing(StudyItem, ids, StudyItem.subject, StudyItem.is_completed,
+                                 StudyItem.completed_at)
+        apply_progress_deltas([(row.subject, row.is_completed) for row in existing.values()], [])
+        apply_stat_deltas([piece for row in existing.values() for piece in item_stats(row)], [])
+    elif resource == 'sessions':
+        existing = load_existing(StudySession, ids, *STAT_SESSION_COLUMNS)
+        apply_stat_deltas([piece for row in existing.values() for piece in session_stats(row)], [])
+    else:
+        load_existing(model, ids)
+
+    if ids:
+        db.session.execute(
+            db.delete(model).where(model.id.in_(ids)),
+            execution_options={'synchronize_session': False}
+        )
+        if resource == 'sessions':
+            unlink_sessions(ids)
+        record_deletes(resource, ids)
+    mark_changed(*bulk_namespaces(resource))
+    db.session.commit()
+
+    return jsonify({'deleted': ids})
+
+
+# =============================================================================
+# API ROUTES - PLANNER
+# =============================================================================
+
+# The planner turns open deadlines into study sessions. Each deadline needs
+# item_minutes per open linked study item (or PRIORITY_MINUTES when it has no
+# open items), minus the time already in sessions the planner created for it.
+# Free time is the availability windows minus existing sessions and recurrence
+# occurrences, swept once in time order; a heap of deadlines keyed by
+# (due_date, priority) hands each free interval to the most urgent deadline
+# (earliest deadline first), in blocks of at most block_minutes. That is
+# O((F + B) log D) for F free intervals, B blocks and D deadlines.
+
+MAX_PLAN_DAYS = 184
+MIN_BLOCK_MINUTES = 15
+PRIORITY_RANK = {'high': 0, 'medium': 1, 'low': 2}
+PRIORITY_MINUTES = {'high': 180, 'medium': 120, 'low': 60}
+
+
+def parse_minutes(data, name, default, minimum=1):
+    value = data.get(name, default)
+    if not isinstance(value, int) or isinstance(value, bool) or value < minimum:
+        raise ApiError(f'{name} must be a whole number of minutes, at least {minimum}')
+    return timedelta(minutes=value)
+
+
+def parse_availability(data):
+    """
+    Weekly availability as seven lists of (start, end) times, Monday first.
+
+    `availability` is a list of {"days": [0-6], "start": "HH:MM", "end": "HH:MM"}
+    windows (days defaults to every day); without it every day is
+    day_start-day_end (default 08:00-22:00).
+    """
+    windows = data.get('availability')
+    if windows is None:
+        windows = [{'start': data.get('day_start', '08:00'), 'end': data.get('day_end', '22:00')}]
+    if not isinstance(windows, list) or not windows:
+        raise ApiError('availability must be a non-empty list of windows')
+
+    availability = [[] for _ in range(7)]
+    for window in windows:
+        try:
+            window_start = time.fromisoformat(window['start'])
+            window_end = time.fromisoformat(window['end'])
+            days = window.get('days', range(7))
+            if any(day not in range(7) or isinstance(day, bool) for day in days):
+                raise ValueError
+        except (KeyError, TypeError, ValueError):
+            raise ApiError('availability windows need start and end as HH:MM and days as 0 (Monday) to 6')
+        if window_end <= window_start:
+            raise ApiError('availability windows must end after they start')
+        for day in set(days):
+            availability[day].append((window_start, window_end))
+    # Merge overlapping windows so no free time is handed out twice
+    for day, windows in enumerate(availability):
+        merged = []
+        for window_start, window_end in sorted(windows):
+            if merged and window_start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], window_end))
+            else:
+                merged.append((window_start, window_end))
+        availability[day] = merged
+    return availability
+
+
+def parse_plan_options():
+    """Planner settings from the JSON body; every field is optional"""
+    data = request.get_json(silent=True) or {}
+    now = naive_utc(datetime.now(timezone.utc)).replace(second=0, microsecond=0)
+    try:
+        start = naive_utc(datetime.fromisoformat(data['start'])) if data.get('start') else now
+        end = naive_utc(datetime.fromisoformat(data['end'])) if data.get('end') else start + timedelta(days=MAX_PLAN_DAYS)
+    except (TypeError, ValueError):
+        raise ApiError('start and end must be ISO datetimes')
+    if end <= start:
+        raise ApiError('end must be after start')
+    if end - start > timedelta(days=MAX_PLAN_DAYS):
+        raise ApiError(f'Plans are limited to {MAX_PLAN_DAYS} days')
+
+    deadline_ids = data.get('deadline_ids')
+    if deadline_ids is not None and (
+        not isinstance(deadline_ids, list)
+        or not all(isinstance(id, int) and not isinstance(id, bool) for id in deadline_ids)
+    ):
+        raise ApiError('deadline_ids must be a list of deadline ids')
+
+    options = {
+        'start': start,
+        'end': end,
+        'deadline_ids': deadline_ids,
+        'item_minutes': parse_minutes(data, 'item_minutes', 60),
+        'block': parse_minutes(data, 'block_minutes', 60, MIN_BLOCK_MINUTES),
+        'availability': parse_availability(data),
+        'zone': parse_timezone(data.get('tz')),
+    }
+    if options['block'] > max_session_length():
+        raise ApiError(f"block_minutes cannot be longer than {current_app.config['MAX_SESSION_HOURS']:g} hours")
+    return options
+
+
+def remaining_work(deadlines, item_minutes):
+    """{deadline_id: timedelta of study time still to schedule}"""
+    ids = [deadline.id for deadline in deadlines]
+    open_items = dict(
+        db.session.query(StudyItem.deadline_id, db.func.count(StudyItem.id))
+        .filter(StudyItem.deadline_id.in_(ids), StudyItem.is_completed == False)
+        .group_by(StudyItem.deadline_id)
+    )
+    planned = defaultdict(timedelta)
+    rows = db.session.query(PlannedSession.deadline_id, StudySession.start_time, StudySession.end_time).join(
+        StudySession, StudySession.id == PlannedSession.session_id
+    ).filter(PlannedSession.deadline_id.in_(ids))
+    for deadline_id, session_start, session_end in rows:
+        planned[deadline_id] += session_end - session_start
+
+    work = {}
+    for deadline in deadlines:
+        if open_items.get(deadline.id):
+            needed = item_minutes * open_items[deadline.id]
+        else:
+            needed = timedelta(minutes=PRIORITY_MINUTES.get(deadline.priority, PRIORITY_MINUTES['medium']))
+        work[deadline.id] = needed - planned[deadline.id]
+    return work
+
+
+def unlink_sessions(ids):
+    """Drop the planner links of sessions being deleted, in the current transaction"""
+    db.session.execute(
+        db.delete(PlannedSession).where(PlannedSession.session_id.in_(ids)),
+        execution_options={'synchronize_session': False}
+    )
+
+
+def schedule_blocks(deadlines, remaining, free, block):
+    """
+    Earliest-deadline-first over free (start, end) intervals in time order.
+
+    Fills `remaining` down in place and returns (deadline_id, start, end)
+    blocks. Deadlines left with remaining time didn't fit before their due date.
+    """
+    min_block = timedelta(minutes=MIN_BLOCK_MINUTES)
+    due_dates = {deadline.id: deadline.due_date for deadline in deadlines}
+    jobs = [
+        (deadline.due_date, PRIORITY_RANK.get(deadline.priority, 1), deadline.id)
+        for deadline in deadlines if remaining[deadline.id] > timedelta(0)
+    ]
+    heapq.heapify(jobs)
+
+    blocks = []
+    for slot_start, slot_end in free:
+        if not jobs:
+            break
+        cursor = slot_start
+        while jobs and slot_end - cursor >= min_block:
+            id = jobs[0][2]
+            left = remaining[id]
+            if due_dates[id] - cursor < min(min_block, left):
+                heapq.heappop(jobs)  # out of time; the rest stays unscheduled
+                continue
+            length = min(block, left, slot_end - cursor, due_dates[id] - cursor)
+            blocks.append((id, cursor, cursor + length))
+            remaining[id] = left - length
+            cursor += length
+            if remaining[id] <= timedelta(0):
+                heapq.heappop(jobs)
+    return blocks
+
+
+def build_plan(options):
+    """Proposed session rows and unscheduled deadlines for parse_plan_options() settings"""
+    query = Deadline.query.filter(
+        Deadline.is_completed == False,
+        Deadline.due_date > options['start'],
+        Deadline.due_date <= options['end']
+    )
+    if options['deadline_ids'] is not None:
+        query = query.filter(Deadline.id.in_(options['deadline_ids']))
+    deadlines = query.order_by(Deadline.due_date, Deadline.id).all()
+
+    remaining = remaining_work(deadlines, options['item_minutes'])
+    blocks = []
+    if deadlines:
+        horizon = deadlines[-1].due_date
+        free = free_intervals(options['start'], horizon, options['availability'], options['zone'])
+        blocks = schedule_blocks(deadlines, remaining, free, options['block'])
+
+    by_id = {deadline.id: deadline for deadline in deadlines}
+    sessions = [
+        {
+            'title': f'Study: {by_id[id].title}',
+            'subject': by_id[id].subject,
+            'color': by_id[id].color or 'purple',
+            'start_time': block_start,
+            'end_time': block_end,
+            'deadline_id': id,
+        }
+        for id, block_start, block_end in blocks
+    ]
+    unscheduled = [
+        {
+            'deadline_id': deadline.id,
+            'title': deadline.title,
+            'due_date': deadline.due_date.isoformat(),
+            'remaining_minutes': int(remaining[deadline.id].total_seconds() // 60),
+        }
+        for deadline in deadlines if remaining[deadline.id] > timedelta(0)
+    ]
+    return sessions, unscheduled
+
+
+@api.route('/api/planner/preview', methods=['POST'])
+def preview_plan():
+    """
+    Propose study sessions for open deadlines without saving them.
+
+    Body (all optional): start, end (ISO, default now and MAX_PLAN_DAYS later),
+    deadline_ids, item_minutes (per open linked item, default 60),
+    block_minutes (longest session, default 60), and availability or
+    day_start/day_end. Returns {sessions, unscheduled}.
+    """
+    sessions, unscheduled = build_plan(parse_plan_options())
+    for session in sessions:
+        session['start_time'] = session['start_time'].isoformat()
+        session['end_time'] = session['end_time'].isoformat()
+    return json_response({'sessions': sessions, 'unscheduled': unscheduled})
+
+
+@api.route('/api/planner/commit', methods=['POST'])
+def commit_plan():
+    """
+    Plan like /api/planner/preview and save the sessions in one transaction.
+
+    The plan is recomputed from the current data, and saved sessions count
+    towards their deadline, so committing again only fills what is missing.
+    """
+    sessions, unscheduled = build_plan(parse_plan_options())
+    created, deadline_ids = [], []
+    if sessions:
+        deadline_ids = [session.pop('deadline_id') for session in sessions]
+        created = db.session.scalars(
+            db.insert(StudySession).returning(StudySession, sort_by_parameter_order=True), sessions
+        ).all()
+        apply_stat_deltas([], [piece for session in created for piece in session_stats(session)])
+        db.session.execute(db.insert(PlannedSession), [
+            {'session_id': session.id, 'deadline_id': deadline_id}
+            for session, deadline_id in zip(created, deadline_ids)
+        ])
+        queue_events('sessions', 'created', [session.id for session in created])
+    mark_changed('sessions')
+    db.session.commit()
+
+    return json_response({
+        'sessions': [
+            dict(session.to_dict(), deadline_id=deadline_id)
+            for session, deadline_id in zip(created, deadline_ids)
+        ],
+        'unscheduled': unscheduled,
+    }, 201)
+
+
+# =============================================================================
+# API ROUTES - ANALYTICS
+# =============================================================================
+
+# Hours studied and items completed come from the daily_stats rollups, which
+# every session and item write adjusts by the difference between the rows'
+# contributions before and after. A chart reads one row per (day, subject) in
+# its range, a seek on the primary key, however much history there is.
+# Recurring sessions are expanded on read and not counted.
+
+MAX_ANALYTICS_DAYS = 731
+ANALYTICS_BUCKETS = {
+    'day': lambda day: day,
+    'week': lambda day: day - timedelta(days=day.weekday()),
+    'month': lambda day: day.replace(day=1),
+}
+STAT_SESSION_COLUMNS = (StudySession.subject, StudySession.start_time, StudySession.end_time,
+                        StudySession.is_completed)
+
+
+def row_value(row, name):
+    """A field of an ORM object, a result row or a bulk row dict"""
+    return row[name] if isinstance(row, dict) else getattr(row, name)
+
+
+def merged_row(existing, changes):
+    """A load_existing() row with a bulk update's changes applied"""
+    return dict(existing._asdict(), **changes)
+
+
+def session_stats(session):
+    """A session's ((day, subject), (planned, studied, items)) contributions, split at midnight"""
+    start = naive_utc(row_value(session, 'start_time'))
+    end = naive_utc(row_value(session, 'end_time'))
+    subject = row_value(session, 'subject') or ''
+    completed = bool(row_value(session, 'is_completed'))
+
+    pieces = []
+    while start < end:
+        next_day = start_of_day(start.date() + timedelta(days=1))
+        seconds = int((min(end, next_day) - start).total_seconds())
+        pieces.append(((start.date(), subject), (seconds, seconds if completed else 0, 0)))
+        start = next_day
+    return pieces
+
+
+def item_stats(item):
+    """A study item's contribution: one completion on the day it was completed"""
+    completed_at = row_value(item, 'completed_at')
+    if completed_at is None:
+        return []
+    return [((naive_utc(completed_at).date(), row_value(item, 'subject') or ''), (0, 0, 1))]
+
+
+def apply_stat_deltas(before, after):
+    """Adjust the daily rollups for contributions turning from before into after, in one statement"""
+    deltas = defaultdict(lambda: [0, 0, 0])
+    for sign, pieces in ((-1, before), (1, after)):
+        for key, values in pieces:
+            delta = deltas[key]
+            for index, value in enumerate(values):
+                delta[index] += sign * value
+
+    rows = [
+        {'day': day, 'subject': subject, 'planned_seconds': planned,
+         'studied_seconds': studied, 'items_completed': items}
+        for (day, subject), (planned, studied, items) in deltas.items()
+        if planned or studied or items
+    ]
+    if rows:
+        stmt = dialect_insert(DailyStats)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['day', 'subject'],
+            set_={
+                name: getattr(DailyStats, name) + getattr(stmt.excluded, name)
+                for name in ('planned_seconds', 'studied_seconds', 'items_completed')
+            }
+        )
+        db.session.execute(stmt, rows)
+
+
+def count_stats():
+    """Recompute the daily rollups from the raw tables: {(day, subject): (planned, studied, items)}"""
+    totals = defaultdict(lambda: [0, 0, 0])
+
+    def add(pieces):
+        for key, values in pieces:
+            total = totals[key]
+            for index, value in enumerate(values):
+                total[index] += value
+
+    # Archived rows keep counting towards their days
+    for sessions in (StudySession, ArchivedStudySession):
+        columns = [getattr(sessions, column.key) for column in STAT_SESSION_COLUMNS]
+        for row in db.session.query(*columns).yield_per(STREAM_BATCH_SIZE):
+            add(session_stats(row))
+    for items in (StudyItem, ArchivedStudyItem):
+        completed = db.session.query(items.subject, items.completed_at).filter(items.completed_at != None)
+        for row in completed.yield_per(STREAM_BATCH_SIZE):
+            add(item_stats(row))
+    return {key: tuple(values) for key, values in totals.items() if any(values)}
+
+
+def stats_drift(counts):
+    """(day, subject) rollups that differ from a fresh count_stats()"""
+    stored = {
+        (row.day, row.subject): (row.planned_seconds, row.studied_seconds, row.items_completed)
+        for row in DailyStats.query
+    }
+    return sorted(
+        key for key in counts.keys() | stored.keys()
+        if counts.get(key, (0, 0, 0)) != stored.get(key, (0, 0, 0))
+    )
+
+
+def rebuild_stats():
+    """Replace the daily rollups with a fresh count. Returns the (day, subject) keys that drifted."""
+    counts = count_stats()
+    drifted = stats_drift(counts)
+
+    DailyStats.query.delete()
+    rows = [
+        {'day': day, 'subject': subject, 'planned_seconds': planned,
+         'studied_seconds': studied, 'items_completed': items}
+        for (day, subject), (planned, studied, items) in counts.items()
+    ]
+    if rows:
+        db.session.execute(db.insert(DailyStats), rows)
+    mark_changed('sessions', 'items')
+    db.session.commit()
+    return drifted
+
+
+@api.route('/api/analytics', methods=['GET'])
+@conditional(collection_etag, ('sessions', 'items'))
+def get_analytics():
+    """
+    Study time and completions per day, week or month between start and end.
+
+    start/end are dates (default: the 30 days up to today, end exclusive) and
+    bucket is day, week (from Monday) or month. Every bucket in the range is
+    listed, with per-subject figures under by_subject; ?subject= narrows
+    everything to one subject.
+    """
+    today = datetime.now(timezone.utc).date()
+    end = parse_datetime_arg('end', start_of_day(today + timedelta(days=1))).date()
+    start = parse_datetime_arg('start', start_of_day(end - timedelta(days=30))).date()
+    bucket = request.args.get('bucket', 'day')
+    subject = request.args.get('subject')
+    if bucket not in ANALYTICS_BUCKETS:
+        raise ApiError(f'bucket must be one of: {", ".join(ANALYTICS_BUCKETS)}')
+    if end <= start:
+        raise ApiError('end must be after start')
+    if (end - start).days > MAX_ANALYTICS_DAYS:
+        raise ApiError(f'Analytics ranges are limited to {MAX_ANALYTICS_DAYS} days')
+
+    bucket_of = ANALYTICS_BUCKETS[bucket]
+    buckets = {}
+    day = bucket_of(start)
+    while day < end:
+        buckets[day] = {'start': day.isoformat(), 'planned_hours': 0, 'studied_hours': 0,
+                        'items_completed': 0, 'by_subject': {}}
+        day = bucket_of(day + timedelta(days=31 if bucket == 'month' else 7 if bucket == 'week' else 1))
+
+    query = DailyStats.query.filter(DailyStats.day >= start, DailyStats.day < end)
+    if subject:
+        query = query.filter(DailyStats.subject == subject)
+    totals = {'planned_hours': 0, 'studied_hours': 0, 'items_completed': 0}
+    for row in query:
+        values = {'planned_hours': row.planned_seconds / 3600, 'studied_hours': row.studied_seconds / 3600,
+                  'items_completed': row.items_completed}
+        target = buckets[bucket_of(row.day)]
+        per_subject = target['by_subject'].setdefault(row.subject, dict.fromkeys(values, 0)) if row.subject else None
+        for name, value in values.items():
+            target[name] += value
+            totals[name] += value
+            if per_subject is not None:
+                per_subject[name] += value
+
+    def rounded(values):
+        return dict(values, planned_hours=round(values['planned_hours'], 2),
+                    studied_hours=round(values['studied_hours'], 2))
+
+    return json_response({
+        'bucket': bucket,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'totals': rounded(totals),
+        'buckets': [
+            dict(rounded(values), by_subject={name: rounded(figures) for name, figures in values['by_subject'].items()})
+            for values in buckets.values()
+        ],
+    })
+
+
+# =============================================================================
+# API ROUTES - ICALENDAR
+# =============================================================================
+
+# GET /api/calendar.ics streams sessions, recurring sessions and deadlines as
+# one VCALENDAR, STREAM_BATCH_SIZE rows at a time, so memory stays flat however
+# long the history is. Calendar apps poll feeds every few minutes; the
+# collection ETag answers an unchanged feed with a 304 without reading a row.
+#
+# POST /api/calendar/import reads an .ics body line by line and inserts
+# IMPORT_BATCH_SIZE events per transaction. Imported events are remembered by
+# (UID, RECURRENCE-ID), so importing the same file again only adds events that
+# are new. An event with a RECURRENCE-ID moves one occurrence of the recurring
+# event with its UID: the occurrence becomes an exception of the series and
+# the event a one-off session, in whichever order the two arrive.
+
+ICS_PRODID = '-//StudyFlow//Planner//EN'
+ICS_WEEKDAYS = ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')
+ICS_PRIORITY = {'high': 1, 'medium': 5, 'low': 9}
+ICS_DURATION = re.compile(r'^([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$')
+IMPORT_BATCH_SIZE = 500
+MAX_IMPORT_ERRORS = 100
+
+
+def ics_text(value):
+    """Escape a TEXT property value"""
+    return (value or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,') \
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+
+
+def ics_time(value):
+    return naive_utc(value).strftime('%Y%m%dT%H%M%SZ')
+
+
+def ics_line(name, value):
+    """One content line with CRLF, folded at 75 octets without splitting UTF-8 characters"""
+    line = f'{name}:{value}'.encode()
+    parts = []
+    while len(line) > 75:
+        cut = 75 if not parts else 74
+        while line[cut] & 0xC0 == 0x80:
+            cut -= 1
+        parts.append(line[:cut])
+        line = line[cut:]
+    parts.append(line)
+    return b'\r\n '.join(parts) + b'\r\n'
+
+
+def ics_event(uid, stamp, start, end, title, description=None, subject=None, extra=()):
+    """A VEVENT as bytes; end=None leaves out DTEND, which makes it zero-length"""
+    lines = [
+        ('BEGIN', 'VEVENT'),
+        ('UID', uid),
+        ('DTSTAMP', ics_time(stamp or datetime.now(timezone.utc))),
+        ('DTSTART', ics_time(start)),
+    ]
+    if end is not None:
+        # RFC 5545 requires DTEND to be later than DTSTART
+        lines.append(('DTEND', ics_time(end)))
+    lines.append(('SUMMARY', ics_text(title)))
+    if description:
+        lines.append(('DESCRIPTION', ics_text(description)))
+    if subject:
+        lines.append(('CATEGORIES', ics_text(subject)))
+    lines.extend(extra)
+    lines.append(('END', 'VEVENT'))
+    return b''.join(ics_line(name, value) for name, value in lines)
+
+
+def recurrence_rule(rule):
+    """RRULE value for a SessionRecurrence"""
+    parts = ['FREQ=WEEKLY', f'INTERVAL={rule.interval or 1}',
+             'BYDAY=' + ','.join(ICS_WEEKDAYS[day] for day in rule.weekday_list)]
+    if rule.until is not None and rule.count is not None:
+        # RRULE allows only one of them, so end at whichever comes first
+        duration = rule.end_time - rule.start_time
+        last = None
+        for last, _ in rule.occurrences(rule.start_time, rule.until + duration):
+            pass
+        parts.append(f'UNTIL={ics_time(last or rule.start_time)}')
+    elif rule.until is not None:
+        parts.append(f'UNTIL={ics_time(rule.until)}')
+    elif rule.count is not None:
+        parts.append(f'COUNT={rule.count}')
+    return ';'.join(parts)
+
+
+def calendar_chunks(types):
+    """Yield the feed in chunks of up to STREAM_BATCH_SIZE events"""
+    yield b''.join(ics_line(name, value) for name, value in (
+        ('BEGIN', 'VCALENDAR'), ('VERSION', '2.0'), ('PRODID', ICS_PRODID),
+        ('CALSCALE', 'GREGORIAN'), ('X-WR-CALNAME', 'StudyFlow'),
+    ))
+
+    def events():
+        if 'sessions' in types:
+            sessions = db.session.query(
+                StudySession.id, StudySession.title, StudySession.description, StudySession.subject,
+                StudySession.start_time, StudySession.end_time, StudySession.updated_at
+            ).order_by(StudySession.start_time, StudySession.id)
+            for row in sessions.yield_per(STREAM_BATCH_SIZE):
+                yield ics_event(f'session-{row.id}@studyflow', row.updated_at, row.start_time, row.end_time,
+                                row.title, row.description, row.subject)
+            for rule in SessionRecurrence.query.order_by(SessionRecurrence.id).yield_per(STREAM_BATCH_SIZE):
+                extra = [('RRULE', recurrence_rule(rule))]
+                if rule.exception_list:
+                    extra.append(('EXDATE', ','.join(ics_time(value) for value in rule.exception_list)))
+                yield ics_event(f'recurrence-{rule.id}@studyflow', rule.updated_at, rule.start_time,
+                                rule.end_time, rule.title, rule.description, rule.subject, extra)
+        if 'deadlines' in types:
+            deadlines = db.session.query(
+                Deadline.id, Deadline.title, Deadline.description, Deadline.subject, Deadline.due_date,
+                Deadline.priority, Deadline.updated_at
+            ).order_by(Deadline.due_date, Deadline.id)
+            for row in deadlines.yield_per(STREAM_BATCH_SIZE):
+                # Zero-length (no DTEND) and transparent: a marker that doesn't block time
+                yield ics_event(f'deadline-{row.id}@studyflow', row.updated_at, row.due_date, None,
+                                row.title, row.description, row.subject,
+                                [('PRIORITY', ICS_PRIORITY.get(row.priority, 5)), ('TRANSP', 'TRANSPARENT')])
+
+    chunk = []
+    for event in events():
+        chunk.append(event)
+        if len(chunk) >= STREAM_BATCH_SIZE:
+            yield b''.join(chunk)
+            chunk = []
+    chunk.append(ics_line('END', 'VCALENDAR'))
+    yield b''.join(chunk)
+
+
+@api.route('/api/calendar.ics', methods=['GET'])
+@conditional(collection_etag, ('sessions', 'recurrences', 'deadlines'))
+def get_calendar_feed():
+    """
+    iCalendar feed of sessions (recurring ones as RRULEs) and deadlines.
+
+    ?types=sessions or ?types=deadlines limits it to one of them.
+    """
+    types = set(filter(None, request.args.get('types', 'sessions,deadlines').split(',')))
+    if not types or not types <= {'sessions', 'deadlines'}:
+        raise ApiError('types must be a comma-separated list of: sessions, deadlines')
+    return Response(stream_with_context(calendar_chunks(types)), mimetype='text/calendar', headers={
+        'Content-Disposition': 'inline; filename="studyflow.ics"'
+    })
+
+
+def unfold_lines(stream):
+    """Yield (line number, logical line) from a byte stream, joining folded continuation lines"""
+    pending, pending_number = None, 0
+    for number, raw in enumerate(stream, 1):
+        line = raw.decode('utf-8', 'replace').rstrip('\r\n')
+        if line[:1] in (' ', '\t') and pending is not None:
+            pending += line[1:]
+            continue
+        if pending:
+            yield pending_number, pending
+        pending, pending_number = line, number
+    if pending:
+        yield pending_number, pending
+
+
+def parse_content_line(line):
+    """Split NAME;PARAM=VALUE:value into (NAME, {PARAM: VALUE}, value); raises ValueError"""
+    quoted = False
+    for index, char in enumerate(line):
+        if char == '"':
+            quoted = not quoted
+        elif char == ':' and not quoted:
+            break
+    else:
+        raise ValueError('expected NAME:value')
+    name, *params = line[:index].split(';')
+    return name.upper(), {
+        key.upper(): value.strip('"')
+        for key, _, value in (param.partition('=') for param in params)
+    }, line[index + 1:]
+
+
+def ics_components(lines, errors):
+    """
+    Yield (line number, 'VEVENT' or 'VTODO', {NAME: [(params, value), ...]})
+    for each top-level event and to-do. Unparseable lines go to errors.
+    """
+    stack, props, start_number = [], None, 0
+    for number, line in lines:
+        try:
+            name, params, value = parse_content_line(line)
+        except ValueError as error:
+            if stack:
+                errors.append({'line': number, 'message': str(error)})
+                continue
+            name = value = ''
+        if not stack and (name, value.upper()) != ('BEGIN', 'VCALENDAR'):
+            raise ApiError('Expected an iCalendar (.ics) body starting with BEGIN:VCALENDAR')
+
+        if name == 'BEGIN':
+            stack.append(value.upper())
+            if len(stack) == 2 and stack[-1] in ('VEVENT', 'VTODO'):
+                props, start_number = defaultdict(list), number
+        elif name == 'END':
+            if stack and stack[-1] == value.upper():
+                stack.pop()
+            if props is not None and len(stack) == 1:
+                yield start_number, value.upper(), props
+                props = None
+        elif props is not None and len(stack) == 2:
+            props[name].append((params, value))
+
+
+def ics_unescape(value):
+    return re.sub(r'\\([\\;,nN])', lambda match: '\n' if match.group(1) in 'nN' else match.group(1), value)
+
+
+def ics_datetime(params, value):
+    """(naive UTC datetime, is_date) from a DATE or DATE-TIME value"""
+    if params.get('VALUE') == 'DATE' or len(value) == 8:
+        return datetime.strptime(value, '%Y%m%d'), True
+    moment = datetime.strptime(value.rstrip('Z'), '%Y%m%dT%H%M%S')
+    if not value.endswith('Z') and params.get('TZID'):
+        try:
+            moment = naive_utc(moment.replace(tzinfo=ZoneInfo(params['TZID'])))
+        except (ZoneInfoNotFoundError, ValueError):
+            pass  # unknown zone: read it as floating time, like the rest of the app (UTC)
+    return moment, False
+
+
+def ics_duration(value):
+    match = ICS_DURATION.match(value)
+    if not match:
+        raise ValueError(f'invalid DURATION {value}')
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    duration = timedelta(weeks=int(weeks or 0), days=int(days or 0), hours=int(hours or 0),
+                         minutes=int(minutes or 0), seconds=int(seconds or 0))
+    return -duration if sign == '-' else duration
+
+
+def ics_recurrence(rrule, start, exdates):
+    """SessionRecurrence rule columns for a weekly (or daily) RRULE; raises ValueError"""
+    parts = dict(part.partition('=')[::2] for part in rrule.upper().split(';'))
+    freq = parts.pop('FREQ', None)
+    interval = int(parts.pop('INTERVAL', 1))
+    parts.pop('WKST', None)
+    if freq == 'DAILY' and interval == 1 and 'BYDAY' not in parts:
+        freq, parts['BYDAY'] = 'WEEKLY', ','.join(ICS_WEEKDAYS)
+    if freq != 'WEEKLY' or interval < 1 or set(parts) - {'BYDAY', 'UNTIL', 'COUNT'}:
+        raise ValueError('only weekly RRULEs (FREQ=WEEKLY with INTERVAL, BYDAY, UNTIL or COUNT) are supported')
+
+    weekdays = [start.weekday()]
+    if parts.get('BYDAY'):
+        weekdays = [ICS_WEEKDAYS.index(day) for day in parts['BYDAY'].split(',')]
+    until = None
+    if parts.get('UNTIL'):
+        until, is_date = ics_datetime({}, parts['UNTIL'])
+        if is_date:
+            until += timedelta(days=1) - timedelta(seconds=1)
+    return {
+        'weekdays': ','.join(str(day) for day in sorted(set(weekdays))),
+        'interval': interval,
+        'until': until,
+        'count': int(parts['COUNT']) if parts.get('COUNT') else None,
+        'exceptions': json.dumps(sorted(value.isoformat() for value in exdates)) if exdates else None,
+    }
+
+
+def ics_row(kind, props):
+    """
+    (resource, column values, UID, RECURRENCE-ID) for one component, or None
+    to skip it; raises ValueError for events that can't be imported.
+
+    Timed events become sessions (recurring ones recurrences); to-dos and
+    zero-length events, like the deadlines in our own feed, become deadlines.
+    A cancelled occurrence of a recurring event has resource None: it only
+    removes the occurrence from the series.
+    """
+    def text(name, limit=None):
+        values = props.get(name)
+        value = ics_unescape(values[0][1]) if values else None
+        return value[:limit] if value and limit else value
+
+    uid = text('UID')
+    recurrence_id = ics_datetime(*props['RECURRENCE-ID'][0])[0] if props.get('RECURRENCE-ID') else None
+    if text('STATUS', 20) in ('CANCELLED', 'CANCELED'):
+        return (None, None, uid, recurrence_id) if uid and recurrence_id else None
+    common = {
+        'title': text('SUMMARY', 200) or '(untitled)',
+        'description': text('DESCRIPTION'),
+        'subject': (text('CATEGORIES') or '').split(',')[0][:100] or None,
+    }
+
+    if kind == 'VTODO':
+        due = props.get('DUE') or props.get('DTSTART')
+        if not due:
+            raise ValueError('to-do has no DUE date')
+        due_date, _ = ics_datetime(*due[0])
+        priority = int(text('PRIORITY') or 0)
+        return 'deadlines', dict(
+            common, color='orange', due_date=due_date, is_completed=text('STATUS') == 'COMPLETED',
+            priority='high' if 1 <= priority <= 4 else 'low' if priority >= 6 else 'medium'
+        ), uid, recurrence_id
+
+    if not props.get('DTSTART'):
+        raise ValueError('event has no DTSTART')
+    start, is_date = ics_datetime(*props['DTSTART'][0])
+    if is_date:
+        raise ValueError('all-day events are not imported')
+    if props.get('DTEND'):
+        end, _ = ics_datetime(*props['DTEND'][0])
+    elif props.get('DURATION'):
+        end = start + ics_duration(props['DURATION'][0][1])
+    else:
+        end = start
+
+    if end == start:
+        priority = int(text('PRIORITY') or 0)
+        return 'deadlines', dict(
+            common, color='orange', due_date=start, is_completed=False,
+            priority='high' if 1 <= priority <= 4 else 'low' if priority >= 6 else 'medium'
+        ), uid, recurrence_id
+    if end < start:
+        raise ValueError('event ends before it starts')
+    if end - start > max_session_length():
+        raise ValueError(f"event is longer than {current_app.config['MAX_SESSION_HOURS']:g} hours")
+
+    values = dict(common, color='purple', start_time=start, end_time=end)
+    if props.get('RRULE'):
+        exdates = [
+            ics_datetime(params, value)[0]
+            for params, values in props.get('EXDATE', []) for value in values.split(',')
+        ]
+        rule = ics_recurrence(props['RRULE'][0][1], start, exdates)
+        return 'recurrences', dict(values, **rule), uid, recurrence_id
+    return 'sessions', dict(values, is_completed=False), uid, recurrence_id
+
+
+IMPORT_MODELS = {'sessions': StudySession, 'recurrences': SessionRecurrence, 'deadlines': Deadline}
+
+
+def import_hash(uid, recurrence_id=None):
+    """ImportedEvent key of an event: its UID, plus the RECURRENCE-ID for a moved occurrence"""
+    key = uid if recurrence_id is None else f'{uid}\nRECURRENCE-ID:{recurrence_id.isoformat()}'
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def with_exceptions(exceptions, starts):
+    """SessionRecurrence.exceptions JSON with the occurrence starts added"""
+    values = {datetime.fromisoformat(value) for value in json.loads(exceptions or '[]')} | set(starts)
+    return json.dumps(sorted(value.isoformat() for value in values))
+
+
+def import_batch(batch, counts, moved):
+    """
+    Insert one batch of (resource, values, uid_hash, series) in a single
+    transaction, skipping known events.
+
+    series is (master uid_hash, original start) for an event that moves or
+    cancels one occurrence of a recurring event. moved collects those starts
+    per master across batches: they are merged into the master's row when it
+    is inserted, or added to its exceptions once it has been imported.
+    """
+    hashes = [uid_hash for _, _, uid_hash, _ in batch if uid_hash]
+    seen = set(db.session.scalars(db.select(ImportedEvent.uid_hash).where(ImportedEvent.uid_hash.in_(hashes))))
+
+    by_resource = defaultdict(list)
+    for resource, values, uid_hash, series in batch:
+        if series:
+            moved[series[0]].add(series[1])
+        if uid_hash in seen:
+            counts['skipped'] += 1
+            continue
+        if uid_hash:
+            seen.add(uid_hash)
+        if resource:
+            by_resource[resource].append((values, uid_hash))
+
+    for resource, entries in by_resource.items():
+        model = IMPORT_MODELS[resource]
+        if resource == 'recurrences':
+            for values, uid_hash in entries:
+                if uid_hash in moved:
+                    values['exceptions'] = with_exceptions(values['exceptions'], moved.pop(uid_hash))
+        created = db.session.scalars(
+            db.insert(model).returning(model, sort_by_parameter_order=True), [values for values, _ in entries]
+        ).all()
+        links = [
+            {'uid_hash': uid_hash, 'resource': resource, 'row_id': row.id}
+            for row, (_, uid_hash) in zip(created, entries) if uid_hash
+        ]
+        if links:
+            db.session.execute(db.insert(ImportedEvent), links)
+        if resource == 'sessions':
+            apply_stat_deltas([], [piece for row in created for piece in session_stats(row)])
+        queue_events(resource, 'created', [row.id for row in created])
+        mark_changed(*(('sessions', 'recurrences') if resource == 'recurrences' else (resource,)))
+        counts[resource] += len(created)
+
+    if moved:
+        masters = db.session.query(ImportedEvent.uid_hash, SessionRecurrence).join(
+            SessionRecurrence, SessionRecurrence.id == ImportedEvent.row_id
+        ).filter(ImportedEvent.resource == 'recurrences', ImportedEvent.uid_hash.in_(list(moved)))
+        for uid_hash, rule in masters.all():
+            exceptions = with_exceptions(rule.exceptions, moved.pop(uid_hash))
+            if exceptions != rule.exceptions:
+                rule.exceptions = exceptions
+                mark_changed('sessions', 'recurrences')
     db.session.commit()
-    return '', 204
 
 
-@app.route('/api/items/progress', methods=['GET'])
-def get_progress():
-    """Get overall progress statistics"""
-    total = StudyItem.query.count()
-    completed = StudyItem.query.filter(StudyItem.is_completed == True).count()
-    
-    # Progress by subject
-    subjects_progress = db.session.query(
-        StudyItem.subject,
-        db.func.count(StudyItem.id).label('total'),
-        db.func.sum(db.case((StudyItem.is_completed == True, 1), else_=0)).label('completed')
-    ).group_by(StudyItem.subject).all()
-    
-    by_subject = {}
-    for subject, total_count, completed_count in subjects_progress:
-        if subject:
-            by_subject[subject] = {
-                'total': total_count,
-                'completed': completed_count or 0,
-                'percentage': round((completed_count or 0) / total_count * 100, 1) if total_count > 0 else 0
-            }
-    
-    return jsonify({
-        'total': total,
-        'completed': completed,
-        'percentage': round(completed / total * 100, 1) if total > 0 else 0,
-        'by_subject': by_subject
+@api.route('/api/calendar/import', methods=['POST'])
+def import_calendar():
+    """
+    Import an .ics file (the raw body, or a multipart upload named `file`).
+
+    Events are committed IMPORT_BATCH_SIZE at a time, so a failure part way
+    keeps the batches before it. Events that can't be imported are listed
+    under errors (the first MAX_IMPORT_ERRORS) and skipped.
+    """
+    upload = request.files.get('file')
+    # The raw WSGI stream reads lines a byte at a time; buffer it
+    stream = upload.stream if upload else io.BufferedReader(request.stream)
+    errors = []
+    counts = Counter({'sessions': 0, 'recurrences': 0, 'deadlines': 0, 'skipped': 0})
+    moved = defaultdict(set)
+
+    batch = []
+    for number, kind, props in ics_components(unfold_lines(stream), errors):
+        try:
+            parsed = ics_row(kind, props)
+        except (ValueError, IndexError) as error:
+            errors.append({'line': number, 'message': str(error) or 'invalid value'})
+            continue
+        if parsed is None:
+            counts['skipped'] += 1
+            continue
+        resource, values, uid, recurrence_id = parsed
+        series = (import_hash(uid), recurrence_id) if uid and recurrence_id else None
+        batch.append((resource, values, import_hash(uid, recurrence_id) if uid else None, series))
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            import_batch(batch, counts, moved)
+            batch = []
+    if batch:
+        import_batch(batch, counts, moved)
+
+    skipped = counts.pop('skipped')
+    return json_response({
+        'created': dict(counts),
+        'skipped': skipped,
+        'errors': errors[:MAX_IMPORT_ERRORS],
+        'error_count': len(errors),
+    }, 201)
+
+
+# =============================================================================
+# API ROUTES - DASHBOARD
+# =============================================================================
+
+def snapshot(view):
+    """
+    On Postgres, run the whole request (the ETag lookup in @conditional too)
+    in one REPEATABLE READ snapshot. It must wrap everything that queries, as
+    the isolation level only applies before the session's first statement.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if db.engine.dialect.name == 'postgresql':
+            db.session.connection(execution_options={'isolation_level': 'REPEATABLE READ'})
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@api.route('/api/dashboard', methods=['GET'])
+@snapshot
+@conditional(collection_etag, ('sessions', 'deadlines', 'items', 'progress', 'notes', 'subjects'))
+def get_dashboard():
+    """
+    Everything the main page needs for one week in a single response.
+
+    `week` is the first day of the week (default: this week's Monday), whose
+    days run midnight to midnight in time zone `tz` (default UTC). Returns
+    the week's sessions (with recurrence occurrences), open deadlines, notes
+    visible today, subjects, checklist items and progress, read with one query
+    per collection in a single transaction (one snapshot on Postgres).
+    """
+    zone = parse_timezone(request.args.get('tz'))
+    today = datetime.now(zone).date()
+    first_day = parse_datetime_arg('week', start_of_day(today - timedelta(days=today.weekday()))).date()
+    week_start = naive_utc(datetime.combine(first_day, time.min, tzinfo=zone))
+    week_end = naive_utc(datetime.combine(first_day + timedelta(days=7), time.min, tzinfo=zone))
+
+    sessions, _, _ = sessions_query(StudySession, week_start, week_end)
+    deadlines = order_query(*deadlines_query(completed=False))
+    notes = order_query(*notes_query(show_today=True))
+    items = order_query(*items_query())
+
+    return json_response({
+        'week': {'start': week_start.isoformat(), 'end': week_end.isoformat()},
+        'sessions': [render() for _, render in session_window_rows(sessions, week_start, week_end)],
+        'deadlines': serialize_query(deadlines, Deadline),
+        'notes': serialize_query(notes, Note),
+        'subjects': serialize_query(Subject.query.order_by(Subject.name), Subject),
+        'items': serialize_query(items, StudyItem),
+        'progress': progress_stats()
     })
 
 
 # =============================================================================
-# API ROUTES - NOTES
+# API ROUTES - DELTA SYNC
 # =============================================================================
 
-@app.route('/api/notes', methods=['GET'])
-def get_notes():
-    """Get all notes"""
-    subject = request.args.get('subject')
-    session_id = request.args.get('session_id')
-    show_today = request.args.get('show_today')
-    
-    query = Note.query
-    
-    if subject:
-        query = query.filter(Note.subject == subject)
-    if session_id:
-        query = query.filter(Note.session_id == int(session_id))
-    if show_today:
-        today = datetime.now(timezone.utc).date()
-        query = query.filter(
-            db.or_(
-                Note.show_date == None,
-                db.func.date(Note.show_date) <= today
-            )
-        )
-    
-    notes = query.order_by(Note.created_at.desc()).all()
-    return jsonify([n.to_dict() for n in notes])
+# Every write to a synced table stamps the row (or the tombstone of a deleted
+# row) with sync_seq, a number from a database-side counter bumped once per
+# transaction; see next_sync_seq(). A sync token holds the counter value the
+# previous sync read, and rows or tombstones stamped with a larger number are
+# returned. Unlike a wall-clock token this doesn't depend on worker clocks or
+# on how long a transaction took to commit.
 
+SYNC_COUNTER = 'sync'
+TOMBSTONE_RETENTION = timedelta(days=30)
 
-@app.route('/api/notes', methods=['POST'])
-def create_note():
-    """Create a new note"""
-    data = request.get_json()
-    
-    note = Note(
-        title=data['title'],
-        content=data['content'],
-        subject=data.get('subject'),
-        session_id=data.get('session_id'),
-        show_date=datetime.fromisoformat(data['show_date']) if data.get('show_date') else None
-    )
-    
-    db.session.add(note)
-    db.session.commit()
-    
-    return jsonify(note.to_dict()), 201
+SYNC_RESOURCES = {
+    'sessions': (StudySession, StudySession.sync_seq),
+    'recurrences': (SessionRecurrence, SessionRecurrence.sync_seq),
+    'deadlines': (Deadline, Deadline.sync_seq),
+    'items': (StudyItem, StudyItem.sync_seq),
+    'notes': (Note, Note.sync_seq),
+    'subjects': (Subject, Subject.sync_seq),
+}
 
 
-@app.route('/api/notes/<int:id>', methods=['PUT'])
-def update_note(id):
-    """Update a note"""
-    note = Note.query.get_or_404(id)
-    data = request.get_json()
-    
-    if 'title' in data:
-        note.title = data['title']
-    if 'content' in data:
-        note.content = data['content']
-    if 'subject' in data:
-        note.subject = data['subject']
-    if 'session_id' in data:
-        note.session_id = data['session_id']
-    if 'show_date' in data:
-        note.show_date = datetime.fromisoformat(data['show_date']) if data['show_date'] else None
-    
-    db.session.commit()
-    return jsonify(note.to_dict())
+def decode_sync_token(token):
+    """
+    (sequence, issued_at) from a sync token, or None for a token issued
+    before changes were sequenced (a bare timestamp), which needs a reset
+    """
+    try:
+        seq, issued_at = decode_cursor(token, [Tombstone.sync_seq, Tombstone.deleted_at])
+    except ApiError:
+        try:
+            decode_cursor(token, [Tombstone.deleted_at])
+        except ApiError:
+            raise ApiError('Invalid sync token')
+        return None
+    if not isinstance(seq, int) or not isinstance(issued_at, datetime):
+        raise ApiError('Invalid sync token')
+    return seq, issued_at
 
 
-@app.route('/api/notes/<int:id>', methods=['DELETE'])
-def delete_note(id):
-    """Delete a note"""
-    note = Note.query.get_or_404(id)
-    db.session.delete(note)
-    db.session.commit()
-    return '', 204
+@api.route('/api/sync', methods=['GET'])
+def get_sync():
+    """
+    Get rows created, updated or deleted since a sync token.
+
+    Without ?since=, or with a token older than the tombstone retention, the
+    response has reset: true and the client must reload everything before
+    syncing from the returned token.
+    """
+    now = naive_utc(datetime.now(timezone.utc))
+    # Read the counter before the rows: anything committed in between is
+    # sent again next time, which clients apply as an idempotent upsert
+    seq = db.session.scalar(
+        db.select(ResourceVersion.version).where(ResourceVersion.name == SYNC_COUNTER)
+    ) or 0
+    response = {'token': encode_cursor([seq, now]), 'reset': False, 'changes': {}, 'deleted': {}}
+
+    since = request.args.get('since')
+    since = decode_sync_token(since) if since else None
+    if not since or since[1] < now - TOMBSTONE_RETENTION:
+        response['reset'] = True
+        return jsonify(response)
+
+    after = since[0]
+    for resource, (model, changed) in SYNC_RESOURCES.items():
+        rows = serialize_query(model.query.filter(changed > after).order_by(changed, model.id), model)
+        if rows:
+            response['changes'][resource] = rows
+
+    tombstones = db.session.query(Tombstone.resource, Tombstone.row_id).filter(
+        Tombstone.sync_seq > after
+    ).order_by(Tombstone.id)
+    for resource, row_id in tombstones:
+        response['deleted'].setdefault(resource, []).append(row_id)
+
+    return json_response(response)
 
 
 # =============================================================================
-# API ROUTES - SUBJECTS
+# FULL-TEXT SEARCH
 # =============================================================================
 
-@app.route('/api/subjects', methods=['GET'])
-def get_subjects():
-    """Get all subjects"""
-    subjects = Subject.query.order_by(Subject.name).all()
-    return jsonify([s.to_dict() for s in subjects])
+# SQLite: one external-content FTS5 table per searchable table, kept in sync
+# by triggers. Postgres: a GIN expression index over to_tsvector(title || body).
+# Either way the database maintains the index on every write, bulk ones included.
 
+# (resource, table, body column)
+SEARCH_SOURCES = [
+    ('notes', 'notes', 'content'),
+    ('sessions', 'study_sessions', 'description'),
+    ('deadlines', 'deadlines', 'description'),
+]
 
-@app.route('/api/subjects', methods=['POST'])
-def create_subject():
-    """Create a new subject"""
-    data = request.get_json()
-    
-    subject = Subject(
-        name=data['name'],
-        color=data.get('color', 'purple')
-    )
-    
-    db.session.add(subject)
-    db.session.commit()
-    
-    return jsonify(subject.to_dict()), 201
+SEARCH_SNIPPET_WORDS = 16
+# The database marks matches with these private-use characters; highlight()
+# escapes the stored text around them, so only our <mark> tags are markup
+MARK_START, MARK_END = '\ue000', '\ue001'
 
 
-@app.route('/api/subjects/<int:id>', methods=['DELETE'])
-def delete_subject(id):
-    """Delete a subject"""
-    subject = Subject.query.get_or_404(id)
-    db.session.delete(subject)
-    db.session.commit()
-    return '', 204
+def search_ddl(dialect):
+    """Idempotent DDL creating the search index for every source"""
+    statements = []
+    for _, table, body in SEARCH_SOURCES:
+        if dialect == 'sqlite':
+            fts = f'{table}_fts'
+            statements += [
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+                f"title, {body}, content='{table}', content_rowid='id', tokenize='porter unicode61')",
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN "
+                f"INSERT INTO {fts}(rowid, title, {body}) VALUES (new.id, new.title, new.{body}); END",
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, title, {body}) VALUES ('delete', old.id, old.title, old.{body}); END",
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF title, {body} ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, title, {body}) VALUES ('delete', old.id, old.title, old.{body}); "
+                f"INSERT INTO {fts}(rowid, title, {body}) VALUES (new.id, new.title, new.{body}); END",
+            ]
+        elif dialect == 'postgresql':
+            statements.append(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_search ON {table} USING gin "
+                f"(to_tsvector('english', coalesce(title, '') || ' ' || coalesce({body}, '')))"
+            )
+    return statements
+
+
+@db.event.listens_for(db.metadata, 'after_create')
+def create_search_index(target, connection, **kw):
+    """Create the search index with the tables; fills FTS tables that did not exist yet"""
+    dialect = connection.dialect.name
+    existing = set()
+    if dialect == 'sqlite':
+        existing = {row[0] for row in connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE '%\\_fts' ESCAPE '\\'"
+        )}
+    for statement in search_ddl(dialect):
+        connection.exec_driver_sql(statement)
+    if dialect == 'sqlite':
+        for _, table, _ in SEARCH_SOURCES:
+            if f'{table}_fts' not in existing:
+                connection.exec_driver_sql(f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')")
+
+
+@db.event.listens_for(db.metadata, 'before_drop')
+def drop_search_index(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        for _, table, _ in SEARCH_SOURCES:
+            connection.exec_driver_sql(f'DROP TABLE IF EXISTS {table}_fts')
+
+
+def fts5_query(text):
+    """Turn free text into a safe FTS5 query: every word must match, the last one as a prefix"""
+    words = re.findall(r'\w+', text)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def highlight(snippet):
+    """HTML for a search snippet: the text escaped, matches wrapped in <mark>"""
+    return html.escape(snippet or '').replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+
+
+def search_rows(text, resources, limit, offset):
+    """Ranked hits (resource, id, title, snippet, score) across the given resources"""
+    sources = [source for source in SEARCH_SOURCES if source[0] in resources]
+    dialect = db.engine.dialect.name
+
+    if dialect == 'sqlite':
+        query = fts5_query(text)
+        if query is None:
+            return []
+        selects = [
+            f"SELECT '{resource}' AS resource, rowid AS id, title, "
+            f"snippet({table}_fts, -1, '{MARK_START}', '{MARK_END}', '…', {SEARCH_SNIPPET_WORDS}) AS snippet, "
+            f"-bm25({table}_fts, 10.0, 1.0) AS score "
+            f"FROM {table}_fts WHERE {table}_fts MATCH :query"
+            for resource, table, _ in sources
+        ]
+        sql = ' UNION ALL '.join(selects) + ' ORDER BY score DESC, id LIMIT :limit OFFSET :offset'
+    else:
+        document = "to_tsvector('english', coalesce(title, '') || ' ' || coalesce({body}, ''))"
+        selects = [
+            f"SELECT '{resource}' AS resource, id, title, coalesce({body}, '') AS body, "
+            f"ts_rank({document.format(body=body)}, q) AS score "
+            f"FROM {table}, websearch_to_tsquery('english', :query) q "
+            f"WHERE {document.format(body=body)} @@ q"
+            for resource, table, body in sources
+        ]
+        # Headlines are expensive, so only build them for the page being returned
+        sql = (
+            "SELECT resource, id, title, ts_headline('english', body, q, "
+            f"'StartSel={MARK_START}, StopSel={MARK_END}, MaxWords={SEARCH_SNIPPET_WORDS}, MinWords=5') AS snippet, score "
+            "FROM (" + ' UNION ALL '.join(selects) + " ORDER BY score DESC, id LIMIT :limit OFFSET :offset) hits, "
+            "websearch_to_tsquery('english', :query) q ORDER BY score DESC, id"
+        )
+        query = text
+
+    return db.session.execute(
+        db.text(sql), {'query': query, 'limit': limit, 'offset': offset}
+    ).mappings().all()
+
+
+@api.route('/api/search', methods=['GET'])
+def search():
+    """
+    Full-text search over note, session and deadline titles and bodies.
+
+    ?q= is the search text, ?types= an optional comma-separated subset of
+    notes,sessions,deadlines. Results are ranked best first and paginated
+    like the list endpoints. Snippets are HTML: the text is escaped and
+    matches are wrapped in <mark>.
+    """
+    text = request.args.get('q', '').strip()
+    if not text:
+        raise ApiError('q is required')
+
+    all_resources = [source[0] for source in SEARCH_SOURCES]
+    resources = request.args.get('types')
+    resources = resources.split(',') if resources else all_resources
+    if not set(resources) <= set(all_resources):
+        raise ApiError(f"types must be a subset of {','.join(all_resources)}")
+
+    limit = parse_limit(request.args.get('limit'))
+    offset = 0
+    cursor = request.args.get('cursor')
+    if cursor:
+        offset = decode_cursor(cursor, [StudySession.id])[0]
+        if not isinstance(offset, int) or offset < 0:
+            raise ApiError('Invalid cursor')
+
+    rows = search_rows(text, resources, limit + 1, offset)
+    return jsonify({
+        'items': [
+            {
+                'resource': row['resource'],
+                'id': row['id'],
+                'title': row['title'],
+                'snippet': highlight(row['snippet']),
+                'score': row['score']
+            }
+            for row in rows[:limit]
+        ],
+        'next_cursor': encode_cursor([offset + limit]) if len(rows) > limit else None
+    })
 
 
 # =============================================================================
 # HEALTH CHECK
 # =============================================================================
 
-@app.route('/api/health', methods=['GET'])
+@api.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint for deployment"""
     return jsonify({'status': 'healthy', 'timestamp': datetime.now(timezone.utc).isoformat()})
 
 
+@api.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """Response cache hit/miss counters for this worker, for sizing the cache"""
+    return jsonify(response_cache.stats())
+
+
+# =============================================================================
+# ARCHIVAL
+# =============================================================================
+
+# `flask archive` (run it from cron) moves rows past the horizon out of the hot
+# tables every list, sync and search query reads, into archived_* tables with
+# the same columns. Each batch is one INSERT ... SELECT plus one DELETE by id
+# in its own transaction, so writers are only held up for a batch at a time.
+# Archived rows leave tombstones, so synced clients drop them, and keep
+# counting in the analytics rollups. List endpoints read the archive with
+# ?archived=true.
+#
+# Archived: completed items completed before the horizon, sessions that ended
+# before it, and deadlines due before it. Sessions that notes point to and
+# deadlines that hot items point to stay, so no foreign key dangles.
+
+ARCHIVE_MODELS = {
+    'items': (StudyItem, ArchivedStudyItem),
+    'sessions': (StudySession, ArchivedStudySession),
+    'deadlines': (Deadline, ArchivedDeadline),
+}
+
+
+def archive_conditions(resource, cutoff):
+    if resource == 'items':
+        return [StudyItem.is_completed == True, StudyItem.completed_at < cutoff]
+    if resource == 'sessions':
+        # start_time bounds the index range; end_time is the real condition
+        return [StudySession.start_time < cutoff, StudySession.end_time < cutoff,
+                ~db.exists().where(Note.session_id == StudySession.id)]
+    return [Deadline.due_date < cutoff, ~db.exists().where(StudyItem.deadline_id == Deadline.id)]
+
+
+def archive_batch(resource, cutoff, batch_size):
+    """Move up to batch_size rows past cutoff into the archive in one transaction. Returns their ids."""
+    model, archive = ARCHIVE_MODELS[resource]
+    ids = db.session.scalars(
+        db.select(model.id).where(*archive_conditions(resource, cutoff)).order_by(model.id).limit(batch_size)
+    ).all()
+    if not ids:
+        return ids
+
+    # Progress counters keep archived items; count_progress() reads both tables
+    columns = list(model.__table__.columns)
+    archived_at = db.literal(naive_utc(datetime.now(timezone.utc)), db.DateTime)
+    db.session.execute(db.insert(archive.__table__).from_select(
+        [column.name for column in columns] + ['archived_at'],
+        db.select(*columns, archived_at).where(model.id.in_(ids))
+    ))
+    db.session.execute(
+        db.delete(model).where(model.id.in_(ids)),
+        execution_options={'synchronize_session': False}
+    )
+    if resource == 'sessions':
+        unlink_sessions(ids)
+    record_deletes(resource, ids)
+    mark_changed(*bulk_namespaces(resource))
+    db.session.commit()
+    return ids
+
+
+def wants_archive():
+    return request.args.get('archived', '').lower() == 'true'
+
+
+@api.cli.command('archive')
+@click.option('--days', type=int, help='Archive rows older than this many days (default: ARCHIVE_AFTER_DAYS).')
+@click.option('--batch-size', type=int, help='Rows per transaction (default: ARCHIVE_BATCH_SIZE).')
+@click.option('--pause', type=float, default=0.0, help='Seconds to sleep between batches.')
+def archive_command(days, batch_size, pause):
+    """Move completed and past items, sessions and deadlines into the archive tables"""
+    days = current_app.config['ARCHIVE_AFTER_DAYS'] if days is None else days
+    batch_size = batch_size or current_app.config['ARCHIVE_BATCH_SIZE']
+    cutoff = naive_utc(datetime.now(timezone.utc)) - timedelta(days=days)
+
+    # Items first, so deadlines whose items were just archived can follow
+    for resource in ARCHIVE_MODELS:
+        moved = 0
+        while True:
+            ids = archive_batch(resource, cutoff, batch_size)
+            moved += len(ids)
+            if len(ids) < batch_size:
+                break
+            sleep(pause)
+        print(f"Archived {moved} {resource}")
+
+
 # =============================================================================
 # DATABASE INITIALIZATION
 # =============================================================================
 
+def add_missing_columns():
+    """
+    Add any declared column missing from an existing table, as nullable.
+
+    create_all() never alters existing tables. Rows that predate a column get
+    NULL, which every column added this way must tolerate (sync_seq: rows
+    older than every sync token). Returns 'table.column' names.
+    """
+    added = []
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            existing = {column['name'] for column in db.inspect(connection).get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(connection.dialect)
+                    connection.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}')
+                    added.append(f'{table.name}.{column.name}')
+    return added
+
+
+def create_indexes():
+    """
+    Create any declared index missing from an existing database.
+
+    create_all() only creates indexes together with new tables, so databases
+    created before an index was added to a model need this to pick it up.
+    Must be called inside an app context. Returns the names of created indexes.
+    """
+    created = []
+    for table in db.metadata.sorted_tables:
+        existing = {index['name'] for index in db.inspect(db.engine).get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if index.name not in existing:
+                index.create(db.engine)
+                created.append(index.name)
+    return created
+
+
+def explain_hot_queries():
+    """
+    EXPLAIN the query shapes used by the list handlers, built with the same
+    *_query() helpers the handlers page through.
+
+    Returns (label, index_used, plan) tuples. On Postgres sequential scans are
+    disabled for the check so the answer does not depend on table size.
+    """
+    today = naive_utc(datetime.now(timezone.utc))
+    shapes = [
+        ('session overlaps', overlapping_sessions_query(today, today)),
+        ('sessions by window', sessions_query(StudySession, today, today)),
+        ('deadlines', deadlines_query()),
+        ('deadlines by status', deadlines_query(completed=False)),
+        ('deadlines by subject', deadlines_query(subject='Math')),
+        ('items', items_query()),
+        ('items by subject', items_query(subject='Math')),
+        ('items by deadline', items_query(deadline_id=1)),
+        ('notes', notes_query()),
+        ('notes by subject', notes_query(subject='Math')),
+        ('notes by session', notes_query(session_id=1)),
+        ('notes shown today', notes_query(show_today=True)),
+        ('upcoming notes', upcoming_notes_query(today, today)),
+    ]
+
+    connection = db.session.connection()
+    postgres = db.engine.dialect.name == 'postgresql'
+    if postgres:
+        connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+
+    results = []
+    for label, list_query in shapes:
+        compiled = order_query(*list_query).statement.compile(dialect=db.engine.dialect)
+        if postgres:
+            params = compiled.params
+            rows = connection.exec_driver_sql('EXPLAIN ' + str(compiled), params).all()
+            plan = '\n'.join(row[0] for row in rows)
+            index_used = 'Index' in plan and ' ix_' in plan
+        else:
+            params = tuple(compiled.params[name] for name in compiled.positiontup)
+            rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + str(compiled), params).all()
+            plan = '\n'.join(row[-1] for row in rows)
+            index_used = 'INDEX ix_' in plan and 'USE TEMP B-TREE' not in plan
+        results.append((label, index_used, plan))
+
+    db.session.rollback()
+    return results
+
+
+@api.cli.command('create-indexes')
+def create_indexes_command():
+    """Add missing indexes to an existing database"""
+    created = create_indexes()
+    for name in created:
+        print(f"Created index {name}")
+    print(f"{len(created)} index(es) created")
+
+
+@api.cli.command('check-indexes')
+def check_indexes_command():
+    """Fail if any hot list query is not planned as an index scan"""
+    failed = False
+    for label, index_used, plan in explain_hot_queries():
+        print(f"[{'ok' if index_used else 'FAIL'}] {label}")
+        if not index_used:
+            failed = True
+            print('    ' + plan.replace('\n', '\n    '))
+    if failed:
+        raise SystemExit(1)
+
+
+@api.cli.command('rebuild-search')
+def rebuild_search_command():
+    """Rebuild the full-text search index from the searchable tables"""
+    with db.engine.begin() as connection:
+        create_search_index(db.metadata, connection)
+        for _, table, _ in SEARCH_SOURCES:
+            if connection.dialect.name == 'sqlite':
+                connection.exec_driver_sql(f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')")
+            else:
+                connection.exec_driver_sql(f'REINDEX INDEX ix_{table}_search')
+    print("Search index rebuilt")
+
+
+@api.cli.command('prune-tombstones')
+def prune_tombstones_command():
+    """Delete tombstones older than the delta sync retention window"""
+    cutoff = naive_utc(datetime.now(timezone.utc)) - TOMBSTONE_RETENTION
+    deleted = Tombstone.query.filter(Tombstone.deleted_at < cutoff).delete()
+    db.session.commit()
+    print(f"{deleted} tombstone(s) pruned")
+
+
+@api.cli.command('rebuild-progress')
+@click.option('--check', is_flag=True, help='Only report drift, do not repair it.')
+def rebuild_progress_command(check):
+    """Recount the /api/items/progress counters from study_items"""
+    drifted = progress_drift(count_progress()) if check else rebuild_progress()
+
+    for subject in drifted:
+        print(f"Drift in subject {subject or '(none)'!r}")
+    print(f"{len(drifted)} subject(s) {'drifted' if check else 'repaired'}")
+    if check and drifted:
+        raise SystemExit(1)
+
+
+@api.cli.command('rebuild-analytics')
+@click.option('--check', is_flag=True, help='Only report drift, do not repair it.')
+def rebuild_analytics_command(check):
+    """Recompute the /api/analytics daily rollups from sessions and items"""
+    drifted = stats_drift(count_stats()) if check else rebuild_stats()
+
+    for day, subject in drifted:
+        print(f"Drift on {day.isoformat()} in subject {subject or '(none)'!r}")
+    print(f"{len(drifted)} day(s) {'drifted' if check else 'repaired'}")
+    if check and drifted:
+        raise SystemExit(1)
+
+
+def upgrade_autoincrement():
+    """
+    Rebuild SQLite tables created before their model set sqlite_autoincrement.
+
+    SQLite can't add AUTOINCREMENT to an existing table, so the rows are copied,
+    ids included, into a new table with the current definition, which then
+    takes the old one's name. Its sequence starts past every id a tombstone or
+    the archive still refers to. Indexes and search triggers go with the old
+    table; init_db() recreates them. Returns the names of the rebuilt tables.
+    """
+    if db.engine.dialect.name != 'sqlite':
+        return []
+    rebuilt = []
+    with db.engine.begin() as connection:
+        for resource, (model, _) in SYNC_RESOURCES.items():
+            table = model.__table__
+            sql = connection.exec_driver_sql(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table.name,)
+            ).scalar()
+            if 'AUTOINCREMENT' in sql.upper():
+                continue
+
+            existing = {row[1] for row in connection.exec_driver_sql(f'PRAGMA table_info({table.name})')}
+            columns = ', '.join(f'"{column.name}"' for column in table.columns if column.name in existing)
+            create = str(db.schema.CreateTable(table).compile(connection)).strip()
+            create = create.replace(f'CREATE TABLE {table.name} ', f'CREATE TABLE {table.name}_new ', 1)
+            connection.exec_driver_sql(create)
+            connection.exec_driver_sql(f'INSERT INTO {table.name}_new ({columns}) SELECT {columns} FROM {table.name}')
+            connection.exec_driver_sql(f'DROP TABLE {table.name}')
+            connection.exec_driver_sql(f'ALTER TABLE {table.name}_new RENAME TO {table.name}')
+
+            used = [db.select(db.func.max(model.id)),
+                    db.select(db.func.max(Tombstone.row_id)).where(Tombstone.resource == resource)]
+            if resource in ARCHIVE_MODELS:
+                used.append(db.select(db.func.max(ARCHIVE_MODELS[resource][1].id)))
+            last_id = max(connection.scalar(query) or 0 for query in used)
+            connection.exec_driver_sql('DELETE FROM sqlite_sequence WHERE name = ?', (table.name,))
+            connection.exec_driver_sql('INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)',
+                                       (table.name, last_id))
+            rebuilt.append(table.name)
+    return rebuilt
+
+
 def init_db():
-    """Initialize the database"""
+    """
+    Create missing tables, columns, indexes and search triggers, give old
+    SQLite tables AUTOINCREMENT ids, and backfill derived data.
+
+    Must be called inside an app context. Safe to re-run; the app itself never
+    calls it, so workers start without touching the schema.
+    """
+    # Only the primary: a read replica gets its schema by replicating it
+    db.create_all(bind_key=None)
+    add_missing_columns()
+    upgrade_autoincrement()
+    create_indexes()
+    # create_all only fires after_create for new tables on a fresh schema
+    with db.engine.begin() as connection:
+        create_search_index(db.metadata, connection)
+    # Databases created before the progress counters existed need one backfill
+    if SubjectProgress.query.first() is None and StudyItem.query.first() is not None:
+        rebuild_progress()
+    # ...and likewise the analytics rollups
+    if DailyStats.query.first() is None and (
+        StudySession.query.first() is not None or StudyItem.query.filter(StudyItem.completed_at != None).first()
+    ):
+        rebuild_stats()
+    # Planner links of sessions deleted before deletes removed them
+    PlannedSession.query.filter(
+        ~db.exists().where(StudySession.id == PlannedSession.session_id)
+    ).delete(synchronize_session=False)
+    db.session.commit()
+
+
+@api.cli.command('rebalance-items')
+def rebalance_items_command():
+    """Respace checklist order keys ORDER_GAP apart"""
+    count = rebalance_item_order()
+    mark_changed('items')
+    db.session.commit()
+    print(f"Respaced {count} item(s)")
+
+
+@api.cli.command('migrate')
+def migrate_command():
+    """Create or upgrade the database schema; run once per deploy"""
+    init_db()
+    print("Database initialized!")
+    overlong = overlong_session_ids()
+    if overlong:
+        print(f"Warning: {len(overlong)} session(s) are longer than MAX_SESSION_HOURS="
+              f"{current_app.config['MAX_SESSION_HOURS']:g} and can be missed by overlap checks "
+              f"and free-slot search; shorten or split them: ids {overlong[:20]}")
+
+
+# =============================================================================
+# APPLICATION FACTORY
+# =============================================================================
+
+def create_app(config=None):
+    """
+    Build an app from the environment, with `config` overriding any setting.
+
+    Nothing here connects to the database or starts a thread: connection pools
+    fill on first use and background threads start on first need, so an app
+    built before gunicorn forks (--preload) is safe to share. Per-app state
+    (response cache, event broker, replica monitor, metrics) lives in
+    app.extensions, so separate apps, e.g. one per test on sqlite://, don't
+    share anything.
+    """
+    app = Flask(__name__)
+    app.config.update(load_config())
+    if config:
+        app.config.update(config)
+    configure_database(app.config)
+
+    # Enable CORS for frontend
+    CORS(app, origins=['http://localhost:5173', 'http://localhost:8080', 'http://localhost:3000',
+                       app.config['FRONTEND_URL']])
+
+    db.init_app(app)
+    app.register_blueprint(api)
+
+    app.extensions['studyflow'] = {
+        'response_cache': ResponseCache(app.config['RESPONSE_CACHE_SIZE'], app.config['RESPONSE_CACHE_TTL']),
+        'event_broker': DatabaseEventBroker(app) if app.config['EVENT_BROKER'] == 'database' else EventBroker(),
+        'replica_monitor': ReplicaMonitor(app.config['REPLICA_CHECK_INTERVAL'],
+                                          app.config['REPLICA_MAX_LAG_SECONDS']),
+        'request_metrics': RequestMetrics(),
+        'slow_request_profiler': SlowRequestProfiler(
+            app.config['PROFILE_SLOW_MS'] / 1000, app.config['PROFILE_INTERVAL_MS'] / 1000,
+            app.config['PROFILE_DIR']
+        ) if app.config['PROFILE_SLOW_MS'] > 0 else None,
+    }
+
     with app.app_context():
-        db.create_all()
-        print("Database initialized!")
+        for engine in db.engines.values():
+            db.event.listen(engine, 'connect', functools.partial(configure_sqlite_connection, app.config))
+        if app.config['METRICS_ENABLED']:
+            init_metrics(app)
+        if app.config['PROFILE_SLOW_MS'] > 0:
+            init_profiler(app)
+        if app.config['DATABASE_READ_URL']:
+            init_replica_routing(app)
+
+    return app
+
+
+def __getattr__(name):
+    # `App:app` (gunicorn, flask --app App) builds the default app on first use,
+    # so importing this module stays cheap and tests can make their own apps
+    if name == 'app':
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 
 # =============================================================================
@@ -623,6 +4701,6 @@ def init_db():
 # =============================================================================
 
 if __name__ == '__main__':
-    init_db()
+    app = create_app()
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port, debug=os.environ.get('FLASK_DEBUG', 'False').lower() == 'true')
\ No newline at end of file
+    app.run(host='0.0.0.0', port=port, debug=os.environ.get('FLASK_DEBUG', 'False').lower() == 'true')
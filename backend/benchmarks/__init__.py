@@ -0,0 +1,8 @@
+"""
+Performance benchmarks for the StudyFlow API.
+
+Run from the backend/ directory, e.g.
+
+    python -m benchmarks.api --scale 5
+    python -m benchmarks.api --http --concurrency 16 --baseline benchmarks/baseline.json
+"""
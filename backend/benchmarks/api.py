@@ -0,0 +1,295 @@
+"""
+Benchmark every API route and compare against a baseline.
+
+Seeds a fresh database (a temporary SQLite file unless --database-url is
+given), then drives each route either in-process through the Flask test client
+or, with --http, with concurrent keep-alive connections against gunicorn.
+Reports p50/p95/p99 latency, throughput and peak RSS per endpoint.
+
+    python -m benchmarks.api --scale 5 --requests 300
+    python -m benchmarks.api --http --workers 4 --concurrency 32
+    python -m benchmarks.api --save-baseline benchmarks/baseline.json
+    python -m benchmarks.api --baseline benchmarks/baseline.json --tolerance 0.2
+
+Exits with status 1 when --baseline is given and an endpoint's p95 regressed
+by more than --tolerance.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from time import perf_counter, sleep
+import argparse
+import http.client
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import threading
+
+from benchmarks import common
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def scenarios(counts):
+    """
+    (name, method, path, body) for every route. path and body may be callables
+    of the iteration number so repeated requests touch different rows.
+    """
+    today = datetime.now(timezone.utc).replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0)
+    week = today - timedelta(days=today.weekday())
+    window = f'start={week.isoformat()}&end={(week + timedelta(days=7)).isoformat()}'
+    month = f'start={week.isoformat()}&end={(week + timedelta(days=31)).isoformat()}'
+
+    def row(count):
+        return lambda i: i % count + 1
+
+    session_id, deadline_id, item_id, note_id = (
+        row(counts['sessions']), row(counts['deadlines']), row(counts['items']), row(counts['notes'])
+    )
+
+    def new_session(i):
+        start = today + timedelta(days=400 + i // 8, hours=8 + i % 8)
+        return {'title': f'Bench {i}', 'subject': 'Subject 0', 'allow_overlap': True,
+                'start_time': start.isoformat(), 'end_time': (start + timedelta(hours=1)).isoformat()}
+
+    def bulk_items(i):
+        return [{'title': f'Bulk {i}.{n}', 'subject': f'Subject {n % counts["subjects"]}'} for n in range(50)]
+
+    return [
+        ('health', 'GET', '/api/health', None),
+        ('sessions', 'GET', '/api/sessions', None),
+        ('sessions week', 'GET', f'/api/sessions?{window}', None),
+        ('sessions month all', 'GET', f'/api/sessions?{month}&all=true', None),
+        ('sessions free-slots', 'GET', f'/api/sessions/free-slots?{window}&duration=60', None),
+        ('session', 'GET', lambda i: f'/api/sessions/{session_id(i)}', None),
+        ('recurrences', 'GET', '/api/recurrences', None),
+        ('deadlines', 'GET', '/api/deadlines', None),
+        ('deadlines open', 'GET', '/api/deadlines?completed=false', None),
+        ('deadline', 'GET', lambda i: f'/api/deadlines/{deadline_id(i)}', None),
+        ('items', 'GET', '/api/items', None),
+        ('items progress', 'GET', '/api/items/progress', None),
+        ('notes', 'GET', '/api/notes', None),
+        ('notes fields', 'GET', '/api/notes?fields=id,title,show_date', None),
+        ('notes upcoming', 'GET', '/api/notes/upcoming', None),
+        ('subjects', 'GET', '/api/subjects', None),
+        ('dashboard', 'GET', '/api/dashboard', None),
+        ('analytics month', 'GET', '/api/analytics', None),
+        ('analytics year weekly', 'GET',
+            f'/api/analytics?start={(today - timedelta(days=365)).date()}&end={today.date()}&bucket=week', None),
+        ('sync', 'GET', '/api/sync', None),
+        ('search', 'GET', '/api/search?q=exam%20review', None),
+        ('calendar feed', 'GET', '/api/calendar.ics', None),
+        ('create session', 'POST', '/api/sessions', new_session),
+        ('update item', 'PUT', lambda i: f'/api/items/{item_id(i)}', lambda i: {'is_completed': i % 2 == 0}),
+        ('move item', 'POST', lambda i: f'/api/items/{item_id(i)}/move', lambda i: {'after_id': item_id(i + 7)}),
+        ('update deadline', 'PUT', lambda i: f'/api/deadlines/{deadline_id(i)}',
+            lambda i: {'priority': ('low', 'medium', 'high')[i % 3]}),
+        ('create note', 'POST', '/api/notes', lambda i: {'title': f'Bench {i}', 'content': 'benchmark note'}),
+        ('update note', 'PUT', lambda i: f'/api/notes/{note_id(i)}', lambda i: {'title': f'Edited {i}'}),
+        ('bulk create items', 'POST', '/api/items/bulk', bulk_items),
+        ('delete note', 'DELETE', lambda i: f'/api/notes/{counts["notes"] - i}', None),
+    ]
+
+
+def resolve(value, i):
+    return value(i) if callable(value) else value
+
+
+def run_in_process(App, scenario, iterations, warmup):
+    """Sequential requests through the Flask test client. Returns (latencies, errors, elapsed)."""
+    name, method, path, body = scenario
+    client = App.app.test_client()
+    latencies, errors = [], 0
+    for i in range(warmup + iterations):
+        url, data = resolve(path, i), resolve(body, i)
+        started = perf_counter()
+        response = client.open(url, method=method, json=data)
+        response.get_data()
+        duration = perf_counter() - started
+        if i >= warmup:
+            latencies.append(duration)
+            errors += response.status_code >= 400
+    return latencies, errors, sum(latencies)
+
+
+def run_http(host, port, scenario, iterations, warmup, concurrency):
+    """
+    Requests from `concurrency` threads, each on its own keep-alive connection.
+    Returns (latencies, errors, wall clock elapsed).
+    """
+    name, method, path, body = scenario
+    counter = iter(range(warmup + iterations))
+    lock = threading.Lock()
+    latencies, errors = [], [0]
+
+    def worker():
+        connection = http.client.HTTPConnection(host, port, timeout=60)
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                break
+            data = resolve(body, i)
+            payload = json.dumps(data).encode() if data is not None else None
+            headers = {'Content-Type': 'application/json'} if payload is not None else {}
+            started = perf_counter()
+            connection.request(method, resolve(path, i), body=payload, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            duration = perf_counter() - started
+            if i >= warmup:
+                with lock:
+                    latencies.append(duration)
+                    errors[0] += response.status >= 400
+        connection.close()
+
+    started = perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        for future in [pool.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    return latencies, errors[0], perf_counter() - started
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_gunicorn(database_url, workers, threads, cache):
+    """Start gunicorn on a free port and wait until /api/health answers"""
+    port = free_port()
+    env = dict(os.environ, DATABASE_URL=database_url)
+    if not cache:
+        env['RESPONSE_CACHE_SIZE'] = '0'
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--workers', str(workers), '--threads', str(threads),
+         '--bind', f'127.0.0.1:{port}', '--log-level', 'warning', 'App:app'],
+        cwd=BACKEND_DIR, env=env
+    )
+    for _ in range(100):
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/api/health')
+            if connection.getresponse().status == 200:
+                return process, port
+        except OSError:
+            sleep(0.1)
+    process.terminate()
+    raise SystemExit('gunicorn did not start')
+
+
+def compare(results, baseline, tolerance):
+    """Return the endpoints whose p95 regressed beyond tolerance"""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get('results', {}).get(name)
+        if before and before['p95_ms'] and result['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append(name)
+        result['baseline_p95_ms'] = before['p95_ms'] if before else None
+    return regressions
+
+
+def print_table(results, regressions):
+    header = f"{'endpoint':<22} {'reqs':>6} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9} {'rss MB':>8}"
+    print(header)
+    print('-' * len(header))
+    for name, r in results.items():
+        line = (f"{name:<22} {r['requests']:>6} {r['errors']:>4} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} "
+                f"{r['p99_ms']:>9.2f} {r['rps']:>9.1f} {r['peak_rss_mb'] if r['peak_rss_mb'] is not None else '-':>8}")
+        if r.get('baseline_p95_ms') is not None:
+            line += f"  (baseline p95 {r['baseline_p95_ms']:.2f})"
+        if name in regressions:
+            line += '  REGRESSED'
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--database-url', help='database to seed and benchmark (default: a temporary SQLite file)')
+    parser.add_argument('--reset', action='store_true', help='drop and recreate every table at --database-url first')
+    parser.add_argument('--scale', type=float, default=1.0, help=f'multiplier for the seeded row counts {common.BASE_COUNTS}')
+    parser.add_argument('--seed', type=int, default=0, help='random seed for the generated data')
+    parser.add_argument('--requests', type=int, default=200, help='timed requests per endpoint')
+    parser.add_argument('--warmup', type=int, default=10, help='untimed requests per endpoint')
+    parser.add_argument('--only', action='append', help='benchmark only endpoints whose name contains this (repeatable)')
+    parser.add_argument('--no-cache', dest='cache', action='store_false', help='disable the response cache')
+    parser.add_argument('--http', action='store_true', help='load-test gunicorn over HTTP instead of the test client')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers (--http)')
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn threads per worker (--http)')
+    parser.add_argument('--concurrency', type=int, default=8, help='concurrent client connections (--http)')
+    parser.add_argument('--baseline', help='baseline JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed p95 slowdown vs the baseline (0.25 = 25%%)')
+    parser.add_argument('--save-baseline', help='write the results to this JSON file')
+    args = parser.parse_args(argv)
+
+    if args.database_url and not args.reset:
+        parser.error('--database-url needs --reset: the benchmark drops and reseeds every table')
+    database_url = args.database_url or common.temp_sqlite_url()
+    App = common.load_app(database_url, cache=args.cache)
+    counts = common.scaled_counts(args.scale)
+
+    started = perf_counter()
+    common.reset_database(App)
+    common.seed(App, counts, args.seed)
+    with App.app.app_context():
+        dialect = App.db.engine.dialect.name
+    print(f"Seeded {counts} into {dialect} in {perf_counter() - started:.1f}s")
+
+    selected = [s for s in scenarios(counts) if not args.only or any(word in s[0] for word in args.only)]
+    server = None
+    if args.http:
+        server, port = start_gunicorn(database_url, args.workers, args.threads, args.cache)
+
+    results = {}
+    try:
+        for scenario in selected:
+            if args.http:
+                latencies, errors, elapsed = run_http('127.0.0.1', port, scenario, args.requests,
+                                                      args.warmup, args.concurrency)
+                rss = common.process_peak_rss_mb(server.pid)
+            else:
+                latencies, errors, elapsed = run_in_process(App, scenario, args.requests, args.warmup)
+                rss = common.peak_rss_mb()
+            results[scenario[0]] = dict(common.summarize(latencies, elapsed), errors=errors, peak_rss_mb=rss)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as handle:
+            regressions = compare(results, json.load(handle), args.tolerance)
+    print_table(results, regressions)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as handle:
+            json.dump({
+                'meta': {
+                    'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                    'python': platform.python_version(),
+                    'machine': platform.machine(),
+                    'dialect': dialect,
+                    'counts': counts,
+                    'mode': 'http' if args.http else 'client',
+                    'concurrency': args.concurrency if args.http else 1,
+                },
+                'results': results,
+            }, handle, indent=2)
+        print(f"Baseline written to {args.save_baseline}")
+
+    if not args.database_url:
+        common.remove_sqlite(database_url)
+
+    if regressions:
+        print(f"{len(regressions)} endpoint(s) regressed: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,192 @@
+"""Shared helpers for the benchmarks: database setup, seeding and statistics"""
+
+from datetime import datetime, timedelta, timezone
+import importlib
+import os
+import random
+import resource
+import tempfile
+
+# Rows seeded per model at --scale 1
+BASE_COUNTS = {
+    'subjects': 12,
+    'sessions': 2000,
+    'recurrences': 10,
+    'deadlines': 300,
+    'items': 1000,
+    'notes': 1000,
+}
+
+SEED_BATCH_SIZE = 1000
+COLORS = ('purple', 'blue', 'green', 'orange', 'red', 'pink')
+PRIORITIES = ('low', 'medium', 'high')
+
+
+def temp_sqlite_url():
+    """URL of a fresh SQLite file in the temp directory"""
+    handle, path = tempfile.mkstemp(prefix='studyflow-bench-', suffix='.db')
+    os.close(handle)
+    os.unlink(path)
+    return f'sqlite:///{path}'
+
+
+def remove_sqlite(url):
+    """Delete a SQLite database file made by temp_sqlite_url() and its WAL files"""
+    path = url.removeprefix('sqlite:///')
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        if os.path.exists(path + suffix):
+            os.unlink(path + suffix)
+
+
+def load_app(database_url, cache=True):
+    """
+    Import App with its default app pointed at database_url.
+
+    App.app is built by create_app() on first access, which starts from
+    load_config(), i.e. the environment. Settings are therefore passed as
+    environment variables (DATABASE_URL here, the SQLITE_*/DB_POOL_* profiles
+    in benchmarks.engine), and must be set before anything touches App.app.
+    """
+    os.environ['DATABASE_URL'] = database_url
+    if not cache:
+        os.environ['RESPONSE_CACHE_SIZE'] = '0'
+    return importlib.import_module('App')
+
+
+def reset_database(App):
+    """Drop and recreate every table"""
+    with App.app.app_context():
+        App.db.drop_all()
+        App.init_db()
+
+
+def scaled_counts(scale):
+    return {name: max(1, int(count * scale)) for name, count in BASE_COUNTS.items()}
+
+
+def insert_batches(App, model, rows):
+    for start in range(0, len(rows), SEED_BATCH_SIZE):
+        App.db.session.execute(App.db.insert(model), rows[start:start + SEED_BATCH_SIZE])
+
+
+def seed(App, counts, seed=0):
+    """
+    Fill an empty database with counts[model] random rows per model.
+
+    Rows are spread over a year centred on today so windowed queries, the
+    dashboard and free-slot searches all see realistic densities. The same
+    seed always produces the same data.
+    """
+    rng = random.Random(seed)
+    today = datetime.now(timezone.utc).replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0)
+    subjects = [f'Subject {i}' for i in range(counts['subjects'])]
+
+    def moment(days=180):
+        return today + timedelta(days=rng.randint(-days, days), hours=rng.randint(8, 20))
+
+    def text(words):
+        return ' '.join(rng.choice(('review', 'chapter', 'exam', 'lab', 'essay', 'practice',
+                                    'problem', 'set', 'lecture', 'notes', 'reading', 'quiz'))
+                        for _ in range(words))
+
+    with App.app.app_context():
+        insert_batches(App, App.Subject, [
+            {'name': name, 'color': rng.choice(COLORS)} for name in subjects
+        ])
+        sessions = []
+        for _ in range(counts['sessions']):
+            start = moment()
+            sessions.append({
+                'title': text(3), 'description': text(12), 'subject': rng.choice(subjects),
+                'color': rng.choice(COLORS), 'start_time': start,
+                'end_time': start + timedelta(minutes=rng.choice((30, 60, 90, 120))),
+                'is_completed': start < today and rng.random() < 0.7,
+            })
+        insert_batches(App, App.StudySession, sessions)
+
+        recurrences = []
+        for _ in range(counts['recurrences']):
+            start = moment(30)
+            recurrences.append({
+                'title': text(2), 'subject': rng.choice(subjects), 'color': rng.choice(COLORS),
+                'start_time': start, 'end_time': start + timedelta(hours=1),
+                'weekdays': str(start.weekday()), 'interval': 1,
+            })
+        insert_batches(App, App.SessionRecurrence, recurrences)
+
+        deadlines = []
+        for _ in range(counts['deadlines']):
+            due = moment()
+            deadlines.append({
+                'title': text(3), 'description': text(10), 'subject': rng.choice(subjects),
+                'color': rng.choice(COLORS), 'due_date': due, 'priority': rng.choice(PRIORITIES),
+                'is_completed': due < today and rng.random() < 0.8,
+            })
+        insert_batches(App, App.Deadline, deadlines)
+
+        items = []
+        for order in range(counts['items']):
+            done = rng.random() < 0.4
+            items.append({
+                'title': text(4), 'description': text(8), 'subject': rng.choice(subjects),
+                'is_completed': done, 'order': order + 1,
+                'deadline_id': rng.randint(1, counts['deadlines']) if rng.random() < 0.5 else None,
+                'completed_at': moment(90) if done else None,
+            })
+        insert_batches(App, App.StudyItem, items)
+
+        notes = []
+        for _ in range(counts['notes']):
+            notes.append({
+                'title': text(3), 'content': text(rng.randint(20, 200)), 'subject': rng.choice(subjects),
+                'session_id': rng.randint(1, counts['sessions']) if rng.random() < 0.3 else None,
+                'show_date': moment(60) if rng.random() < 0.3 else None,
+            })
+        insert_batches(App, App.Note, notes)
+
+        App.db.session.commit()
+        App.rebuild_progress()
+        App.rebuild_stats()
+
+
+def percentile(sorted_samples, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, max(0, round(fraction * len(sorted_samples)) - 1))
+    return sorted_samples[index]
+
+
+def summarize(latencies, elapsed):
+    """p50/p95/p99 in milliseconds and throughput for one endpoint's samples (seconds)"""
+    samples = sorted(latencies)
+    return {
+        'requests': len(samples),
+        'p50_ms': round(percentile(samples, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(samples, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(samples, 0.99) * 1000, 3),
+        'rps': round(len(samples) / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far"""
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def process_peak_rss_mb(pid):
+    """Peak resident set size of another process and its children (Linux /proc)"""
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f'/proc/{current}/status') as status:
+                for line in status:
+                    if line.startswith('VmHWM:'):
+                        total += int(line.split()[1])
+            with open(f'/proc/{current}/task/{current}/children') as children:
+                pending.extend(int(child) for child in children.read().split())
+        except (FileNotFoundError, ProcessLookupError):
+            continue
+    return round(total / 1024, 1)
@@ -0,0 +1,154 @@
+"""
+Concurrent read/write throughput under two engine configurations.
+
+Each configuration gets a freshly seeded database. Separate reader and writer
+processes, like gunicorn workers, then hammer it through the Flask test client
+for a fixed time. "before" is the old behaviour (rollback journal, FULL sync,
+no mmap on SQLite; a plain pool without pre-ping or recycling on Postgres) and
+"after" is the configuration from the environment / App defaults.
+
+    python -m benchmarks.engine --readers 4 --writers 2 --duration 10
+    python -m benchmarks.engine --database-url postgresql://localhost/bench --reset
+"""
+
+from time import perf_counter
+import argparse
+import multiprocessing
+import os
+import sys
+import threading
+
+from benchmarks import common
+
+PROFILES = {
+    'sqlite': {
+        'before': {'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL', 'SQLITE_MMAP_SIZE': '0'},
+        'after': {},
+    },
+    'postgresql': {
+        'before': {'DB_POOL_SIZE': '5', 'DB_MAX_OVERFLOW': '10', 'DB_POOL_PRE_PING': 'false',
+                   'DB_POOL_RECYCLE': '-1'},
+        'after': {},
+    },
+}
+
+READS = ('/api/sessions?limit=100', '/api/items?limit=100', '/api/dashboard', '/api/notes?limit=50')
+
+
+def prepare(database_url, env, scale):
+    """Reset and seed the database under one profile (runs in its own process)"""
+    os.environ.update(env)
+    App = common.load_app(database_url, cache=False)
+    common.reset_database(App)
+    common.seed(App, common.scaled_counts(scale))
+
+
+def worker(database_url, env, scale, role, threads, duration, barrier, results):
+    """Run `threads` request loops of one role until the duration is up"""
+    os.environ.update(env)
+    App = common.load_app(database_url, cache=False)
+    counts = common.scaled_counts(scale)
+    client = App.app.test_client()
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+
+    def loop(offset):
+        i = offset
+        while perf_counter() < deadline:
+            started = perf_counter()
+            if role == 'read':
+                response = client.get(READS[i % len(READS)])
+            elif i % 2:
+                response = client.post('/api/notes', json={'title': f'Bench {i}', 'content': 'engine benchmark'})
+            else:
+                response = client.put(f'/api/items/{i % counts["items"] + 1}', json={'is_completed': i % 4 == 0})
+            response.get_data()
+            with lock:
+                latencies.append(perf_counter() - started)
+                errors[0] += response.status_code >= 500
+            i += threads
+
+    barrier.wait()
+    deadline = perf_counter() + duration
+    pool = [threading.Thread(target=loop, args=(n,)) for n in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    results.put((role, latencies, errors[0]))
+
+
+def run_profile(context, database_url, env, args):
+    process = context.Process(target=prepare, args=(database_url, env, args.scale))
+    process.start()
+    process.join()
+    if process.exitcode:
+        raise SystemExit('seeding failed')
+
+    roles = ['read'] * args.readers + ['write'] * args.writers
+    barrier = context.Barrier(len(roles))
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(database_url, env, args.scale, role, args.threads,
+                                             args.duration, barrier, results))
+        for role in roles
+    ]
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    summary = {}
+    for role in ('read', 'write'):
+        latencies = [value for r, values, _ in collected if r == role for value in values]
+        summary[role] = dict(
+            common.summarize(latencies, args.duration),
+            errors=sum(errors for r, _, errors in collected if r == role)
+        )
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--database-url', help='database to benchmark (default: a temporary SQLite file)')
+    parser.add_argument('--reset', action='store_true', help='drop and recreate every table at --database-url')
+    parser.add_argument('--scale', type=float, default=1.0, help='multiplier for the seeded row counts')
+    parser.add_argument('--readers', type=int, default=4, help='reader processes')
+    parser.add_argument('--writers', type=int, default=2, help='writer processes')
+    parser.add_argument('--threads', type=int, default=2, help='threads per process')
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds per configuration')
+    args = parser.parse_args(argv)
+
+    if args.database_url and not args.reset:
+        parser.error('--database-url needs --reset: the benchmark drops and reseeds every table')
+
+    context = multiprocessing.get_context('spawn')
+    dialect = 'postgresql' if args.database_url and args.database_url.startswith('postgres') else 'sqlite'
+    summaries = {}
+    for name, env in PROFILES[dialect].items():
+        database_url = args.database_url or common.temp_sqlite_url()
+        try:
+            summaries[name] = run_profile(context, database_url, env, args)
+        finally:
+            if not args.database_url:
+                common.remove_sqlite(database_url)
+
+    header = f"{'config':<8} {'role':<6} {'ops/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}"
+    print(f"{dialect}: {args.readers} reader(s), {args.writers} writer(s) x {args.threads} thread(s), "
+          f"{args.duration:g}s each")
+    print(header)
+    print('-' * len(header))
+    for name, summary in summaries.items():
+        for role, r in summary.items():
+            print(f"{name:<8} {role:<6} {r['rps']:>9.1f} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} "
+                  f"{r['p99_ms']:>9.2f} {r['errors']:>7}")
+    for role in ('read', 'write'):
+        before, after = summaries['before'][role]['rps'], summaries['after'][role]['rps']
+        if before:
+            print(f"{role} throughput: {after / before:.2f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
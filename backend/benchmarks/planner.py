@@ -0,0 +1,109 @@
+"""
+Planner latency for a full term of deadlines, sessions and recurrences.
+
+Seeds a fresh database with the usual benchmark data (a year of rows centred
+on today, so about half the deadlines are still open), then times
+/api/planner/preview over several horizons through the Flask test client, and
+the scheduling pass alone (schedule_blocks, no SQL) over the same inputs.
+Finally commits one term-long plan and checks that committing again adds
+nothing.
+
+    python -m benchmarks.planner --scale 5 --requests 50
+"""
+
+from datetime import datetime, timedelta, timezone
+from time import perf_counter
+import argparse
+import sys
+
+from benchmarks import common
+
+HORIZONS = {'week': 7, 'month': 31, 'term': 120}
+
+
+def plan_bodies(today):
+    """(name, body) preview requests"""
+    bodies = []
+    for name, days in HORIZONS.items():
+        window = {'start': today.isoformat(), 'end': (today + timedelta(days=days)).isoformat()}
+        bodies.append((name, window))
+    term = bodies[-1][1]
+    bodies.append(('term 30-min blocks', dict(term, block_minutes=30)))
+    bodies.append(('term weekday evenings', dict(term, availability=[
+        {'days': [0, 1, 2, 3, 4], 'start': '17:00', 'end': '22:00'},
+        {'days': [5, 6], 'start': '10:00', 'end': '18:00'},
+    ])))
+    return bodies
+
+
+def time_engine(App, body, iterations):
+    """Latencies of schedule_blocks alone, with the SQL done once up front"""
+    with App.app.test_request_context(json=body):
+        options = App.parse_plan_options()
+        deadlines = App.Deadline.query.filter(
+            App.Deadline.is_completed == False,
+            App.Deadline.due_date > options['start'],
+            App.Deadline.due_date <= options['end']
+        ).order_by(App.Deadline.due_date, App.Deadline.id).all()
+        work = App.remaining_work(deadlines, options['item_minutes'])
+        free = list(App.free_intervals(options['start'], options['end'], options['availability']))
+        latencies, blocks = [], 0
+        for _ in range(iterations):
+            remaining = dict(work)
+            started = perf_counter()
+            blocks = len(App.schedule_blocks(deadlines, remaining, iter(free), options['block']))
+            latencies.append(perf_counter() - started)
+    return latencies, len(deadlines), len(free), blocks
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--scale', type=float, default=1.0, help=f'multiplier for the seeded row counts {common.BASE_COUNTS}')
+    parser.add_argument('--seed', type=int, default=0, help='random seed for the generated data')
+    parser.add_argument('--requests', type=int, default=30, help='timed previews per horizon')
+    args = parser.parse_args(argv)
+
+    database_url = common.temp_sqlite_url()
+    App = common.load_app(database_url)
+    counts = common.scaled_counts(args.scale)
+    common.reset_database(App)
+    common.seed(App, counts, args.seed)
+    print(f"Seeded {counts}")
+
+    today = datetime.now(timezone.utc).replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0)
+    client = App.app.test_client()
+    header = (f"{'plan':<22} {'deadlines':>9} {'free':>6} {'blocks':>7} {'p50 ms':>9} {'p95 ms':>9} "
+              f"{'engine p50':>11} {'engine p95':>11}")
+    print(header)
+    print('-' * len(header))
+    try:
+        for name, body in plan_bodies(today):
+            latencies, blocks = [], 0
+            for _ in range(args.requests):
+                started = perf_counter()
+                response = client.post('/api/planner/preview', json=body)
+                payload = response.get_json()
+                latencies.append(perf_counter() - started)
+                if response.status_code != 200:
+                    raise SystemExit(f'{name}: {response.status_code} {payload}')
+                blocks = len(payload['sessions'])
+            engine, deadlines, free, _ = time_engine(App, body, args.requests)
+            request_stats = common.summarize(latencies, sum(latencies))
+            engine_stats = common.summarize(engine, sum(engine))
+            print(f"{name:<22} {deadlines:>9} {free:>6} {blocks:>7} {request_stats['p50_ms']:>9.2f} "
+                  f"{request_stats['p95_ms']:>9.2f} {engine_stats['p50_ms']:>11.3f} {engine_stats['p95_ms']:>11.3f}")
+
+        term = plan_bodies(today)[2][1]
+        started = perf_counter()
+        created = client.post('/api/planner/commit', json=term).get_json()['sessions']
+        elapsed = perf_counter() - started
+        again = client.post('/api/planner/commit', json=term).get_json()['sessions']
+        print(f"commit term: {len(created)} sessions in {elapsed * 1000:.1f} ms; "
+              f"committing again added {len(again)}")
+    finally:
+        common.remove_sqlite(database_url)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
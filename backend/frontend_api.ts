@@ -18,8 +18,11 @@ const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:5000/api'
 // TYPES
 // =============================================================================
 
+// Windowed lists also return occurrences of recurring sessions: their id is
+// "r<recurrence_id>:<start>" and recurrence_id is set
 export interface StudySession {
-  id?: number;
+  id?: number | string;
+  recurrence_id?: number;
   title: string;
   description?: string;
   subject?: string;
@@ -31,6 +34,24 @@ export interface StudySession {
   updated_at?: string;
 }
 
+// A weekly repeating session; GET /sessions expands it into occurrences
+export interface SessionRecurrence {
+  id?: number;
+  title: string;
+  description?: string;
+  subject?: string;
+  color?: string;
+  start_time: string;  // ISO format, first occurrence
+  end_time: string;    // ISO format
+  weekdays: number[];  // 0 = Monday
+  interval?: number;   // every N weeks
+  until?: string | null;
+  count?: number | null;
+  exceptions?: string[];  // skipped occurrence starts
+  created_at?: string;
+  updated_at?: string;
+}
+
 export interface Deadline {
   id?: number;
   title: string;
@@ -75,6 +96,11 @@ export interface Subject {
   created_at?: string;
 }
 
+export interface Page<T> {
+  items: T[];
+  next_cursor: string | null;
+}
+
 export interface ProgressStats {
   total: number;
   completed: number;
@@ -86,24 +112,104 @@ export interface ProgressStats {
   }>;
 }
 
+export interface Dashboard {
+  week: { start: string; end: string };
+  sessions: StudySession[];
+  deadlines: Deadline[];
+  notes: Note[];
+  subjects: Subject[];
+  items: StudyItem[];
+  progress: ProgressStats;
+}
+
+export interface PlanOptions {
+  start?: string;
+  end?: string;
+  deadline_ids?: number[];
+  item_minutes?: number;   // study time per open linked item
+  block_minutes?: number;  // longest planned session
+  day_start?: string;      // HH:MM, used when availability is not given
+  day_end?: string;
+  availability?: { days?: number[]; start: string; end: string }[];  // days: 0 = Monday
+  tz?: string;             // zone of the availability times; defaults to the browser's
+}
+
+export interface Plan {
+  sessions: (StudySession & { deadline_id: number })[];
+  unscheduled: { deadline_id: number; title: string; due_date: string; remaining_minutes: number }[];
+}
+
+export interface AnalyticsFigures {
+  planned_hours: number;   // all sessions
+  studied_hours: number;   // completed sessions
+  items_completed: number;
+}
+
+export interface Analytics {
+  bucket: 'day' | 'week' | 'month';
+  start: string;
+  end: string;
+  totals: AnalyticsFigures;
+  buckets: (AnalyticsFigures & { start: string; by_subject: Record<string, AnalyticsFigures> })[];
+}
+
+export interface CalendarImport {
+  created: { sessions: number; recurrences: number; deadlines: number };
+  skipped: number;  // cancelled events and events imported before
+  errors: { line: number; message: string }[];
+  error_count: number;
+}
+
+export interface SyncChanges {
+  token: string;
+  reset: boolean;  // true: reload everything, then sync from `token`
+  changes: Partial<{
+    sessions: StudySession[];
+    recurrences: SessionRecurrence[];
+    deadlines: Deadline[];
+    items: StudyItem[];
+    notes: Note[];
+    subjects: Subject[];
+  }>;
+  deleted: Partial<Record<'sessions' | 'recurrences' | 'deadlines' | 'items' | 'notes' | 'subjects', number[]>>;
+}
+
+export interface ChangeEvent {
+  resource: 'sessions' | 'recurrences' | 'deadlines' | 'items' | 'notes' | 'subjects';
+  op: 'created' | 'updated' | 'deleted';
+  id: number;
+}
+
 // =============================================================================
 // API HELPER
 // =============================================================================
 
+// When this client last wrote. Reads soon after send its age, so a backend
+// with a read replica serves them from the primary and they see the write.
+let lastWriteAt = 0;
+const LAST_WRITE_WINDOW_MS = 30_000;
+
 async function fetchAPI<T>(
   endpoint: string,
   options: RequestInit = {}
 ): Promise<T> {
   const url = `${API_BASE_URL}${endpoint}`;
+  const isWrite = (options.method || 'GET').toUpperCase() !== 'GET';
+  const writeAge = Date.now() - lastWriteAt;
   
   const response = await fetch(url, {
     headers: {
       'Content-Type': 'application/json',
+      ...(!isWrite && writeAge < LAST_WRITE_WINDOW_MS ? { 'X-Last-Write-Age': String(writeAge) } : {}),
       ...options.headers,
     },
     ...options,
   });
 
+  if (isWrite) {
+    lastWriteAt = Date.now();
+  }
+
   if (!response.ok) {
     const error = await response.json().catch(() => ({}));
     throw new Error(error.message || `API Error: ${response.status}`);
@@ -117,6 +223,40 @@ async function fetchAPI<T>(
   return response.json();
 }
 
+// IANA zone of the browser, so day windows (planner availability, dashboard week) are local time
+function browserTimeZone(): string {
+  return Intl.DateTimeFormat().resolvedOptions().timeZone;
+}
+
+// Largest page the backend serves (MAX_PAGE_LIMIT in App.py)
+const PAGE_LIMIT = 500;
+
+// One page of a cursor-paginated list endpoint; pass the previous page's
+// next_cursor to get the one after it
+function fetchPage<T>(endpoint: string, query: URLSearchParams, cursor?: string | null): Promise<Page<T>> {
+  query.set('limit', String(PAGE_LIMIT));
+  if (cursor) query.set('cursor', cursor);
+  return fetchAPI<Page<T>>(`${endpoint}?${query.toString()}`);
+}
+
+// Walk every page to collect all rows, one request per 500 rows. Only for
+// callers that really need a whole collection (exports, full reloads after a
+// sync reset); the hooks load a time window or one page at a time.
+async function fetchAllPages<T>(endpoint: string, query: URLSearchParams): Promise<T[]> {
+  const rows: T[] = [];
+  let cursor: string | null = null;
+
+  query.set('limit', String(PAGE_LIMIT));
+  do {
+    if (cursor) query.set('cursor', cursor);
+    const page = await fetchAPI<Page<T>>(`${endpoint}?${query.toString()}`);
+    rows.push(...page.items);
+    cursor = page.next_cursor;
+  } while (cursor);
+
+  return rows;
+}
+
 // =============================================================================
 // API METHODS
 // =============================================================================
@@ -126,14 +266,19 @@ export const api = {
   // STUDY SESSIONS
   // -------------------------------------------------------------------------
   sessions: {
-    getAll: (params?: { start?: string; end?: string }) => {
+    getAll: (params?: { start?: string; end?: string; archived?: boolean }) => {
       const query = new URLSearchParams();
       if (params?.start) query.set('start', params.start);
       if (params?.end) query.set('end', params.end);
-      const queryString = query.toString();
-      return fetchAPI<StudySession[]>(`/sessions${queryString ? `?${queryString}` : ''}`);
+      if (params?.archived) query.set('archived', 'true');
+      return fetchAllPages<StudySession>('/sessions', query);
     },
     
+    // Every session and recurring occurrence in a time window, in one request;
+    // the window bounds the response
+    getWindow: (params: { start: string; end: string }) =>
+      fetchAPI<StudySession[]>(`/sessions?${new URLSearchParams({ ...params, all: 'true' })}`),
+    
     getById: (id: number) => 
       fetchAPI<StudySession>(`/sessions/${id}`),
     
@@ -153,16 +298,43 @@ export const api = {
       fetchAPI<void>(`/sessions/${id}`, { method: 'DELETE' }),
   },
 
+  // -------------------------------------------------------------------------
+  // RECURRING SESSIONS
+  // -------------------------------------------------------------------------
+  recurrences: {
+    // Leave one occurrence out of the series (before replacing it with a one-off session)
+    skipOccurrence: (id: number, occurrence_start: string) =>
+      fetchAPI<SessionRecurrence>(`/recurrences/${id}/exceptions`, {
+        method: 'POST',
+        body: JSON.stringify({ occurrence_start }),
+      }),
+    
+    // Replace one occurrence with a one-off session in one transaction; fields
+    // left out are copied from the occurrence
+    detachOccurrence: (id: number, occurrence_start: string, session: Partial<StudySession> = {}) =>
+      fetchAPI<StudySession>(`/recurrences/${id}/detach`, {
+        method: 'POST',
+        body: JSON.stringify({ ...session, occurrence_start }),
+      }),
+  },
+
   // -------------------------------------------------------------------------
   // DEADLINES
   // -------------------------------------------------------------------------
   deadlines: {
-    getAll: (params?: { completed?: boolean; subject?: string }) => {
+    getAll: (params?: { completed?: boolean; subject?: string; archived?: boolean }) => {
       const query = new URLSearchParams();
       if (params?.completed !== undefined) query.set('completed', String(params.completed));
       if (params?.subject) query.set('subject', params.subject);
-      const queryString = query.toString();
-      return fetchAPI<Deadline[]>(`/deadlines${queryString ? `?${queryString}` : ''}`);
+      if (params?.archived) query.set('archived', 'true');
+      return fetchAllPages<Deadline>('/deadlines', query);
+    },
+    
+    getPage: (params?: { completed?: boolean; subject?: string; cursor?: string | null }) => {
+      const query = new URLSearchParams();
+      if (params?.completed !== undefined) query.set('completed', String(params.completed));
+      if (params?.subject) query.set('subject', params.subject);
+      return fetchPage<Deadline>('/deadlines', query, params?.cursor);
     },
     
     getById: (id: number) => 
@@ -188,13 +360,21 @@ export const api = {
   // STUDY ITEMS (Checklist)
   // -------------------------------------------------------------------------
   items: {
-    getAll: (params?: { completed?: boolean; subject?: string; deadline_id?: number }) => {
+    getAll: (params?: { completed?: boolean; subject?: string; deadline_id?: number; archived?: boolean }) => {
+      const query = new URLSearchParams();
+      if (params?.completed !== undefined) query.set('completed', String(params.completed));
+      if (params?.subject) query.set('subject', params.subject);
+      if (params?.deadline_id) query.set('deadline_id', String(params.deadline_id));
+      if (params?.archived) query.set('archived', 'true');
+      return fetchAllPages<StudyItem>('/items', query);
+    },
+    
+    getPage: (params?: { completed?: boolean; subject?: string; deadline_id?: number; cursor?: string | null }) => {
       const query = new URLSearchParams();
       if (params?.completed !== undefined) query.set('completed', String(params.completed));
       if (params?.subject) query.set('subject', params.subject);
       if (params?.deadline_id) query.set('deadline_id', String(params.deadline_id));
-      const queryString = query.toString();
-      return fetchAPI<StudyItem[]>(`/items${queryString ? `?${queryString}` : ''}`);
+      return fetchPage<StudyItem>('/items', query, params?.cursor);
     },
     
     create: (item: Omit<StudyItem, 'id' | 'created_at' | 'updated_at' | 'completed_at'>) =>
@@ -212,6 +392,13 @@ export const api = {
     delete: (id: number) =>
       fetchAPI<void>(`/items/${id}`, { method: 'DELETE' }),
     
+    // Move an item between two neighbours (omit one to drop it at that edge)
+    move: (id: number, position: { after_id?: number; before_id?: number }) =>
+      fetchAPI<StudyItem>(`/items/${id}/move`, {
+        method: 'POST',
+        body: JSON.stringify(position),
+      }),
+    
     // Toggle completion status
     toggleComplete: (id: number, is_completed: boolean) =>
       fetchAPI<StudyItem>(`/items/${id}`, {
@@ -233,8 +420,15 @@ export const api = {
       if (params?.subject) query.set('subject', params.subject);
       if (params?.session_id) query.set('session_id', String(params.session_id));
       if (params?.show_today) query.set('show_today', 'true');
-      const queryString = query.toString();
-      return fetchAPI<Note[]>(`/notes${queryString ? `?${queryString}` : ''}`);
+      return fetchAllPages<Note>('/notes', query);
+    },
+    
+    getPage: (params?: { subject?: string; session_id?: number; show_today?: boolean; cursor?: string | null }) => {
+      const query = new URLSearchParams();
+      if (params?.subject) query.set('subject', params.subject);
+      if (params?.session_id) query.set('session_id', String(params.session_id));
+      if (params?.show_today) query.set('show_today', 'true');
+      return fetchPage<Note>('/notes', query, params?.cursor);
     },
     
     create: (note: Omit<Note, 'id' | 'created_at' | 'updated_at'>) =>
@@ -270,6 +464,82 @@ export const api = {
       fetchAPI<void>(`/subjects/${id}`, { method: 'DELETE' }),
   },
 
+  // -------------------------------------------------------------------------
+  // DASHBOARD (one request for the whole main page)
+  // -------------------------------------------------------------------------
+  dashboard: {
+    // week: its first day (YYYY-MM-DD), default this week's Monday; days are
+    // local to the browser's time zone
+    get: (week?: string) => {
+      const query = new URLSearchParams({ tz: browserTimeZone() });
+      if (week) query.set('week', week);
+      return fetchAPI<Dashboard>(`/dashboard?${query}`);
+    },
+  },
+
+  // -------------------------------------------------------------------------
+  // CALENDAR (.ics feed to subscribe to, and timetable import)
+  // -------------------------------------------------------------------------
+  calendar: {
+    feedUrl: (types?: ('sessions' | 'deadlines')[]) =>
+      `${API_BASE_URL}/calendar.ics${types ? `?types=${types.join(',')}` : ''}`,
+    
+    import: (file: Blob) =>
+      fetchAPI<CalendarImport>('/calendar/import', {
+        method: 'POST',
+        headers: { 'Content-Type': 'text/calendar' },
+        body: file,
+      }),
+  },
+
+  // -------------------------------------------------------------------------
+  // ANALYTICS (hours studied and items completed per day, week or month)
+  // -------------------------------------------------------------------------
+  analytics: {
+    get: (params?: { start?: string; end?: string; bucket?: 'day' | 'week' | 'month'; subject?: string }) => {
+      const query = new URLSearchParams();
+      if (params?.start) query.set('start', params.start);
+      if (params?.end) query.set('end', params.end);
+      if (params?.bucket) query.set('bucket', params.bucket);
+      if (params?.subject) query.set('subject', params.subject);
+      return fetchAPI<Analytics>(`/analytics${query.toString() ? `?${query}` : ''}`);
+    },
+  },
+
+  // -------------------------------------------------------------------------
+  // PLANNER (study sessions scheduled from open deadlines)
+  // -------------------------------------------------------------------------
+  planner: {
+    preview: (options: PlanOptions = {}) =>
+      fetchAPI<Plan>('/planner/preview', {
+        method: 'POST',
+        body: JSON.stringify({ tz: browserTimeZone(), ...options }),
+      }),
+    
+    commit: (options: PlanOptions = {}) =>
+      fetchAPI<Plan>('/planner/commit', {
+        method: 'POST',
+        body: JSON.stringify({ tz: browserTimeZone(), ...options }),
+      }),
+  },
+
+  // -------------------------------------------------------------------------
+  // DELTA SYNC
+  // -------------------------------------------------------------------------
+  sync: (since?: string) =>
+    fetchAPI<SyncChanges>(`/sync${since ? `?since=${encodeURIComponent(since)}` : ''}`),
+
+  // -------------------------------------------------------------------------
+  // LIVE UPDATES (Server-Sent Events) - returns a function that unsubscribes
+  // -------------------------------------------------------------------------
+  subscribe: (onChange: (event: ChangeEvent) => void) => {
+    const source = new EventSource(`${API_BASE_URL}/events`);
+    source.addEventListener('change', (message) => {
+      onChange(JSON.parse((message as MessageEvent).data));
+    });
+    return () => source.close();
+  },
+
   // -------------------------------------------------------------------------
   // HEALTH CHECK
   // -------------------------------------------------------------------------
@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import App  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    """A fresh app on an in-memory SQLite database with the full schema"""
+    app = App.create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'RESPONSE_CACHE_SIZE': 0})
+    with app.app_context():
+        App.init_db()
+        yield app
+        App.db.session.remove()
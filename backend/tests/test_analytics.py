@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta, timezone
+
+import App
+
+
+def analytics(client, **args):
+    response = client.get('/api/analytics', query_string=args)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def hours(report):
+    return [(bucket['start'], bucket['planned_hours'], bucket['studied_hours']) for bucket in report['buckets']]
+
+
+def test_sessions_crossing_midnight_are_split_between_days(app):
+    client = app.test_client()
+    late = client.post('/api/sessions', json={'title': 'Late', 'subject': 'Math', 'start_time': '2030-01-07T23:00:00',
+                                              'end_time': '2030-01-08T01:30:00'}).get_json()
+    client.post('/api/sessions', json={'title': 'Essay', 'subject': 'English', 'start_time': '2030-01-08T10:00:00',
+                                       'end_time': '2030-01-08T11:00:00'})
+    client.put(f"/api/sessions/{late['id']}", json={'is_completed': True})
+
+    report = analytics(client, start='2030-01-07', end='2030-01-10')
+    assert hours(report) == [('2030-01-07', 1, 1), ('2030-01-08', 2.5, 1.5), ('2030-01-09', 0, 0)]
+    assert report['totals'] == {'planned_hours': 3.5, 'studied_hours': 2.5, 'items_completed': 0}
+    assert report['buckets'][1]['by_subject'] == {
+        'Math': {'planned_hours': 1.5, 'studied_hours': 1.5, 'items_completed': 0},
+        'English': {'planned_hours': 1, 'studied_hours': 0, 'items_completed': 0},
+    }
+    assert hours(analytics(client, start='2030-01-07', end='2030-01-10', subject='English')) == [
+        ('2030-01-07', 0, 0), ('2030-01-08', 1, 0), ('2030-01-09', 0, 0)
+    ]
+
+    # Moving a session takes its time off the old days; weeks start on Monday
+    client.put(f"/api/sessions/{late['id']}", json={'start_time': '2030-01-13T22:00:00',
+                                                    'end_time': '2030-01-14T02:00:00'})
+    weekly = analytics(client, start='2030-01-07', end='2030-01-21', bucket='week')
+    assert hours(weekly) == [('2030-01-07', 3, 2), ('2030-01-14', 2, 2)]
+
+    client.delete(f"/api/sessions/{late['id']}")
+    assert analytics(client, start='2030-01-07', end='2030-01-21', bucket='month')['totals']['planned_hours'] == 1
+    assert App.rebuild_stats() == []
+
+
+def test_item_completions_count_on_the_day_they_were_completed(app):
+    client = app.test_client()
+    item = client.post('/api/items', json={'title': 'Problems', 'subject': 'Math'}).get_json()
+    client.put(f"/api/items/{item['id']}", json={'is_completed': True})
+    client.post('/api/items', json={'title': 'Proofs', 'subject': 'Math'})
+
+    today = datetime.now(timezone.utc).date()
+    report = analytics(client, start=today.isoformat(), end=(today + timedelta(days=1)).isoformat())
+    assert report['totals']['items_completed'] == 1
+    assert report['buckets'][0]['by_subject']['Math']['items_completed'] == 1
+
+    client.put(f"/api/items/{item['id']}", json={'is_completed': False})
+    report = analytics(client, start=today.isoformat(), end=(today + timedelta(days=1)).isoformat())
+    assert report['totals']['items_completed'] == 0
+    assert App.rebuild_stats() == []
+
+
+def test_analytics_rejects_bad_ranges(app):
+    client = app.test_client()
+    assert client.get('/api/analytics', query_string={'bucket': 'year'}).status_code == 400
+    assert client.get('/api/analytics', query_string={'start': '2030-01-07', 'end': '2030-01-07'}).status_code == 400
@@ -0,0 +1,39 @@
+from datetime import datetime
+
+import App
+
+
+def test_archive_moves_old_rows_out_and_sync_drops_them(app):
+    client = app.test_client()
+    recent = client.post('/api/sessions', json={'title': 'Recent', 'start_time': '2030-01-07T09:00:00',
+                                                'end_time': '2030-01-07T10:00:00'}).get_json()['id']
+    old = [client.post('/api/sessions', json={'title': title, 'start_time': f'2020-01-0{day}T09:00:00',
+                                              'end_time': f'2020-01-0{day}T10:00:00'}).get_json()['id']
+           for day, title in ((6, 'Noted'), (7, 'Old'))]
+    client.post('/api/notes', json={'title': 'Follow up', 'content': 'on this session', 'session_id': old[0]})
+    deadline = client.post('/api/deadlines', json={'title': 'Old essay', 'due_date': '2020-01-08T09:00:00'})
+    deadline = deadline.get_json()['id']
+    item = client.post('/api/items', json={'title': 'Done', 'subject': 'Math', 'is_completed': True}).get_json()['id']
+    App.db.session.execute(App.db.update(App.StudyItem).values(completed_at=datetime(2020, 1, 7)))
+    App.db.session.commit()
+    token = client.get('/api/sync').get_json()['token']
+
+    result = app.test_cli_runner().invoke(args=['archive', '--days', '30'])
+    assert result.exit_code == 0, result.output
+
+    # The newest session and the newest item are archived too; the session a note points to stays
+    sync = client.get('/api/sync', query_string={'since': token}).get_json()
+    assert sync['deleted'] == {'items': [item], 'sessions': [old[1]], 'deadlines': [deadline]}
+    hot = client.get('/api/sessions', query_string={'all': 'true'}).get_json()
+    assert [row['id'] for row in hot] == [old[0], recent]
+    archived = client.get('/api/sessions', query_string={'all': 'true', 'archived': 'true'}).get_json()
+    assert [(row['id'], row['title']) for row in archived] == [(old[1], 'Old')]
+    # Progress still counts the archived item, and a rebuild agrees
+    progress = client.get('/api/items/progress').get_json()
+    assert (progress['total'], progress['completed']) == (1, 1)
+    assert App.rebuild_progress() == []
+
+    # Archived ids are not handed out again
+    again = client.post('/api/sessions', json={'title': 'New', 'start_time': '2030-01-08T09:00:00',
+                                               'end_time': '2030-01-08T10:00:00'}).get_json()['id']
+    assert again > old[1]
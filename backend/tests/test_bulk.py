@@ -0,0 +1,55 @@
+def test_bulk_and_single_create_store_the_same_times(app):
+    client = app.test_client()
+    session = {'title': 'Reading', 'start_time': '2030-01-07T10:00:00+02:00',
+               'end_time': '2030-01-07T11:00:00+02:00'}
+    single = client.post('/api/sessions', json=session).get_json()
+    bulk = client.post('/api/sessions/bulk', json=[dict(session, start_time='2030-01-08T10:00:00+02:00',
+                                                        end_time='2030-01-08T11:00:00+02:00')]).get_json()
+    assert single['start_time'] == '2030-01-07T08:00:00'
+    assert bulk['results'][0]['start_time'] == '2030-01-08T08:00:00'
+
+    deadline = {'title': 'Essay', 'due_date': '2030-01-07T10:00:00+02:00'}
+    assert client.post('/api/deadlines', json=deadline).get_json()['due_date'] == '2030-01-07T08:00:00'
+    assert client.post('/api/deadlines/bulk', json=[deadline]).get_json()['results'][0]['due_date'] == '2030-01-07T08:00:00'
+
+
+def test_bulk_rejects_empty_sessions(app):
+    response = app.test_client().post('/api/sessions/bulk', json=[
+        {'title': 'Nothing', 'start_time': '2030-01-07T10:00:00', 'end_time': '2030-01-07T10:00:00'}
+    ])
+    assert response.status_code == 400
+    assert response.get_json()['errors'] == [{'index': 0, 'message': 'end_time must be after start_time'}]
+
+
+def block(title, day, start, end):
+    return {'title': title, 'start_time': f'2030-01-{day:02}T{start}:00', 'end_time': f'2030-01-{day:02}T{end}:00'}
+
+
+def test_bulk_sessions_are_checked_for_overlaps(app):
+    client = app.test_client()
+    stored = client.post('/api/sessions', json=block('Stored', 7, '09:00', '10:00')).get_json()['id']
+
+    batch = [block('Late', 7, '09:30', '10:30'), block('Lunch', 7, '12:00', '13:00'),
+             block('Lunch too', 7, '12:30', '13:30'), block('Free', 7, '15:00', '16:00')]
+    response = client.post('/api/sessions/bulk', json=batch)
+    assert response.status_code == 409
+    errors = response.get_json()['errors']
+    assert [(error['index'], error['message']) for error in errors] == [
+        (0, "overlaps 'Stored'"), (1, "overlaps 'Lunch too'"), (2, "overlaps 'Lunch'")
+    ]
+    assert errors[0]['overlaps'] == [{'id': stored, 'title': 'Stored', 'start_time': '2030-01-07T09:00:00',
+                                      'end_time': '2030-01-07T10:00:00'}]
+    assert errors[1]['overlaps'][0]['index'] == 2
+    assert len(client.get('/api/sessions', query_string={'all': 'true'}).get_json()) == 1
+
+    created = client.post('/api/sessions/bulk', query_string={'allow_overlap': 'true'}, json=batch)
+    assert created.status_code == 201
+
+    # Rows of the batch are checked at their new times, so two sessions can swap
+    first, second = [client.post('/api/sessions', json=block(title, 8, start, end)).get_json()['id']
+                     for title, start, end in (('First', '09:00', '10:00'), ('Second', '11:00', '12:00'))]
+    swap = [dict(block('First', 8, '11:00', '12:00'), id=first), dict(block('Second', 8, '09:00', '10:00'), id=second)]
+    assert client.put('/api/sessions/bulk', json=swap).status_code == 200
+    clash = client.put('/api/sessions/bulk', json=[{'id': first, 'start_time': '2030-01-08T09:30:00'}])
+    assert clash.status_code == 409
+    assert clash.get_json()['errors'][0]['overlaps'][0]['id'] == second
@@ -0,0 +1,50 @@
+import App
+
+
+def test_cache_follows_writes_from_another_worker(tmp_path):
+    url = f'sqlite:///{tmp_path / "studyflow.db"}'
+    first, second = App.create_app({'SQLALCHEMY_DATABASE_URI': url}), App.create_app({'SQLALCHEMY_DATABASE_URI': url})
+    with first.app_context():
+        App.init_db()
+    deadline = {'title': 'Essay', 'due_date': '2030-01-01T09:00:00'}
+    first.test_client().post('/api/deadlines', json=deadline)
+
+    reader = second.test_client()
+    stale = reader.get('/api/deadlines')
+    assert len(stale.get_json()['items']) == 1
+    assert reader.get('/api/deadlines').get_json() == stale.get_json()
+
+    first.test_client().post('/api/deadlines', json=dict(deadline, title='Exam'))
+
+    fresh = reader.get('/api/deadlines', headers={'If-None-Match': stale.headers['ETag']})
+    assert fresh.status_code == 200
+    assert len(fresh.get_json()['items']) == 2
+    assert fresh.headers['ETag'] != stale.headers['ETag']
+    assert reader.get('/api/deadlines', headers={'If-None-Match': fresh.headers['ETag']}).status_code == 304
+
+
+def test_cache_hits_until_a_write_invalidates_the_namespace():
+    app = App.create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'RESPONSE_CACHE_SIZE': 8})
+    with app.app_context():
+        App.init_db()
+        client = app.test_client()
+        client.post('/api/deadlines', json={'title': 'Essay', 'due_date': '2030-01-01T09:00:00'})
+
+        first = client.get('/api/deadlines')
+        assert client.get('/api/deadlines').get_data() == first.get_data()
+        client.get('/api/deadlines', query_string={'completed': 'false'})  # its own entry
+        client.get('/api/subjects')
+        stats = client.get('/api/cache/stats').get_json()
+        assert stats['by_namespace']['deadlines'] == {'hits': 1, 'misses': 2}
+        assert stats['entries'] == 3
+
+        client.post('/api/deadlines', json={'title': 'Exam', 'due_date': '2030-01-02T09:00:00'})
+        assert client.get('/api/cache/stats').get_json()['entries'] == 1  # only subjects is left
+        assert [row['title'] for row in client.get('/api/deadlines').get_json()['items']] == ['Essay', 'Exam']
+        assert client.get('/api/cache/stats').get_json()['by_namespace']['deadlines'] == {'hits': 1, 'misses': 3}
+
+        # A failed write commits nothing, so nothing is invalidated
+        assert client.post('/api/deadlines/bulk', json=[{'title': 'No date'}]).status_code == 400
+        client.get('/api/deadlines')
+        assert client.get('/api/cache/stats').get_json()['by_namespace']['deadlines'] == {'hits': 2, 'misses': 3}
+        App.db.session.remove()
@@ -0,0 +1,57 @@
+import pytest
+
+import App
+
+
+def test_deadlines_export_without_dtend_and_import_back(app):
+    client = app.test_client()
+    client.post('/api/deadlines', json={'title': 'Essay', 'due_date': '2030-01-01T09:00:00'})
+    feed = client.get('/api/calendar.ics').get_data(as_text=True)
+    event = feed[feed.index('BEGIN:VEVENT'):feed.index('END:VEVENT')]
+    assert 'DTSTART:20300101T090000Z' in event
+    assert 'DTEND' not in event
+
+    client.delete('/api/deadlines/1')
+    response = client.post('/api/calendar/import', data=feed, content_type='text/calendar')
+    assert response.status_code == 201, response.get_json()
+    assert response.get_json()['created']['deadlines'] == 1
+
+
+def series_feed(*events):
+    series = ['BEGIN:VEVENT', 'UID:lecture-1@uni.example', 'DTSTART:20300107T090000Z', 'DTEND:20300107T100000Z',
+              'RRULE:FREQ=WEEKLY;COUNT=4', 'SUMMARY:Lecture', 'END:VEVENT']
+    moved = ['BEGIN:VEVENT', 'UID:lecture-1@uni.example', 'RECURRENCE-ID:20300114T090000Z',
+             'DTSTART:20300115T140000Z', 'DTEND:20300115T150000Z', 'SUMMARY:Lecture (moved)', 'END:VEVENT']
+    cancelled = ['BEGIN:VEVENT', 'UID:lecture-1@uni.example', 'RECURRENCE-ID:20300121T090000Z',
+                 'DTSTART:20300121T090000Z', 'DTEND:20300121T100000Z', 'STATUS:CANCELLED', 'END:VEVENT']
+    parts = {'series': series, 'moved': moved, 'cancelled': cancelled}
+    lines = ['BEGIN:VCALENDAR', 'VERSION:2.0'] + [line for event in events for line in parts[event]] + ['END:VCALENDAR']
+    return '\r\n'.join(lines) + '\r\n'
+
+
+def lecture_starts(client):
+    sessions = client.get('/api/sessions', query_string={'start': '2030-01-01', 'end': '2030-02-01'}).get_json()
+    return [(session['title'], session['start_time']) for session in sessions['items']]
+
+
+@pytest.mark.parametrize('order', [('moved', 'cancelled', 'series'), ('series', 'moved', 'cancelled')])
+def test_import_moves_overridden_occurrences_in_either_order(app, order):
+    client = app.test_client()
+    response = client.post('/api/calendar/import', data=series_feed(*order), content_type='text/calendar')
+    assert response.get_json()['created'] == {'sessions': 1, 'recurrences': 1, 'deadlines': 0}
+    assert response.get_json()['skipped'] == 0
+    expected = [('Lecture', '2030-01-07T09:00:00'), ('Lecture (moved)', '2030-01-15T14:00:00'),
+                ('Lecture', '2030-01-28T09:00:00')]
+    assert lecture_starts(client) == expected
+
+    again = client.post('/api/calendar/import', data=series_feed(*order), content_type='text/calendar')
+    assert again.get_json()['created'] == {'sessions': 0, 'recurrences': 0, 'deadlines': 0}
+    assert lecture_starts(client) == expected
+
+
+def test_import_applies_overrides_to_a_series_imported_earlier(app):
+    client = app.test_client()
+    client.post('/api/calendar/import', data=series_feed('series'), content_type='text/calendar')
+    response = client.post('/api/calendar/import', data=series_feed('moved'), content_type='text/calendar')
+    assert response.get_json()['created']['sessions'] == 1
+    assert ('Lecture', '2030-01-14T09:00:00') not in lecture_starts(client)
@@ -0,0 +1,30 @@
+def test_dashboard_returns_the_week_in_one_response(app):
+    client = app.test_client()
+    for day, hour in ((7, 3), (9, 14), (13, 23), (14, 3)):  # the last one falls in the next UTC week
+        client.post('/api/sessions', json={'title': f'Block {day}', 'start_time': f'2030-01-{day:02}T{hour:02}:00:00',
+                                           'end_time': f'2030-01-{day:02}T{hour:02}:30:00'})
+    client.post('/api/recurrences', json={'title': 'Lecture', 'start_time': '2030-01-01T11:00:00',
+                                          'end_time': '2030-01-01T12:00:00', 'weekdays': [1]})
+    done = client.post('/api/deadlines', json={'title': 'Quiz', 'due_date': '2030-01-05T09:00:00'}).get_json()
+    client.put(f"/api/deadlines/{done['id']}", json={'is_completed': True})
+    client.post('/api/deadlines', json={'title': 'Essay', 'due_date': '2030-01-10T09:00:00'})
+    client.post('/api/notes', json={'title': 'Now', 'content': 'visible'})
+    client.post('/api/notes', json={'title': 'Later', 'content': 'hidden', 'show_date': '2100-01-01T00:00:00'})
+    client.post('/api/subjects', json={'name': 'Math'})
+    client.post('/api/items', json={'title': 'Problems', 'subject': 'Math', 'is_completed': True})
+    client.post('/api/items', json={'title': 'Proofs', 'subject': 'Math'})
+
+    dashboard = client.get('/api/dashboard', query_string={'week': '2030-01-07'}).get_json()
+    assert set(dashboard) == {'week', 'sessions', 'deadlines', 'notes', 'subjects', 'items', 'progress'}
+    assert dashboard['week'] == {'start': '2030-01-07T00:00:00', 'end': '2030-01-14T00:00:00'}
+    assert [row['title'] for row in dashboard['sessions']] == ['Block 7', 'Lecture', 'Block 9', 'Block 13']
+    assert [row['title'] for row in dashboard['deadlines']] == ['Essay']
+    assert [row['title'] for row in dashboard['notes']] == ['Now']
+    assert [row['name'] for row in dashboard['subjects']] == ['Math']
+    assert [row['title'] for row in dashboard['items']] == ['Problems', 'Proofs']
+    assert (dashboard['progress']['total'], dashboard['progress']['completed']) == (2, 1)
+
+    # In New York (UTC-5) the week runs from 05:00 UTC: Block 7 is Sunday evening there, Block 14 is not
+    local = client.get('/api/dashboard', query_string={'week': '2030-01-07', 'tz': 'America/New_York'}).get_json()
+    assert local['week'] == {'start': '2030-01-07T05:00:00', 'end': '2030-01-14T05:00:00'}
+    assert [row['title'] for row in local['sessions']] == ['Lecture', 'Block 9', 'Block 13', 'Block 14']
@@ -0,0 +1,24 @@
+import App
+
+
+def test_failed_publish_does_not_fail_a_committed_write(app, monkeypatch):
+    def publish(events):
+        raise RuntimeError('broker down')
+
+    monkeypatch.setattr(app.extensions['studyflow']['event_broker'], 'publish', publish)
+    response = app.test_client().post('/api/deadlines', json={'title': 'Essay', 'due_date': '2030-01-01T09:00:00'})
+    assert response.status_code == 201
+    assert App.Deadline.query.count() == 1
+
+
+def test_database_broker_polls_without_writing(app, monkeypatch):
+    broker = App.DatabaseEventBroker(app)
+    broker._last_id = 0
+    subscription = App.EventBroker.subscribe(broker)  # without starting the poller thread
+    broker.publish([{'resource': 'notes', 'op': 'created', 'id': 1}])
+
+    writes = []
+    monkeypatch.setattr(App.db.engine, 'begin', lambda: writes.append(1))
+    broker._poll_once()
+    assert subscription.queue.get_nowait() == {'resource': 'notes', 'op': 'created', 'id': 1}
+    assert writes == []
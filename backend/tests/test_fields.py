@@ -0,0 +1,62 @@
+from datetime import datetime
+
+import App
+
+
+def test_fields_limit_columns_and_keep_paging(app):
+    client = app.test_client()
+    for n in range(3):
+        client.post('/api/notes', json={'title': f'Note {n}', 'content': 'long body ' * 50, 'subject': 'Math'})
+
+    first = client.get('/api/notes', query_string={'fields': 'title, id,title', 'limit': 2}).get_json()
+    assert first['items'] == [{'title': 'Note 2', 'id': 3}, {'title': 'Note 1', 'id': 2}]
+    # The cursor still carries the sort key, which was not asked for
+    rest = client.get('/api/notes', query_string={'fields': 'title', 'cursor': first['next_cursor']}).get_json()
+    assert rest == {'items': [{'title': 'Note 0'}], 'next_cursor': None}
+
+    assert client.get('/api/subjects', query_string={'fields': 'name'}).get_json() == []
+    for bad in ('content,nope', '', ' , '):
+        response = client.get('/api/notes', query_string={'fields': bad})
+        assert response.status_code == 400
+        assert 'fields must be a comma-separated list of' in response.get_json()['message']
+
+
+def test_fields_apply_to_recurring_occurrences(app):
+    client = app.test_client()
+    client.post('/api/sessions', json={'title': 'One-off', 'start_time': '2030-01-08T09:00:00',
+                                       'end_time': '2030-01-08T10:00:00'})
+    rule = client.post('/api/recurrences', json={'title': 'Lecture', 'start_time': '2030-01-07T11:00:00',
+                                                 'end_time': '2030-01-07T12:00:00', 'weekdays': [0]}).get_json()['id']
+
+    page = client.get('/api/sessions', query_string={'start': '2030-01-07', 'end': '2030-01-09',
+                                                     'fields': 'title,start_time'}).get_json()
+    assert page['items'] == [
+        {'recurrence_id': rule, 'title': 'Lecture', 'start_time': '2030-01-07T11:00:00'},
+        {'title': 'One-off', 'start_time': '2030-01-08T09:00:00'},
+    ]
+
+
+def test_archived_lists_apply_fields_like_hot_ones(app):
+    client = app.test_client()
+    for day in (6, 7):
+        client.post('/api/sessions', json={'title': f'Old {day}', 'description': 'long text',
+                                           'start_time': f'2020-01-0{day}T09:00:00',
+                                           'end_time': f'2020-01-0{day}T10:00:00'})
+    result = app.test_cli_runner().invoke(args=['archive', '--days', '30'])
+    assert result.exit_code == 0, result.output
+
+    full = client.get('/api/sessions', query_string={'archived': 'true'}).get_json()['items']
+    archived = App.ArchivedStudySession.query.order_by(App.ArchivedStudySession.id).all()
+    assert full == [row.to_dict() for row in archived]
+
+    narrow = client.get('/api/sessions', query_string={'archived': 'true', 'fields': 'id,title,archived_at',
+                                                       'limit': 1})
+    page = narrow.get_json()
+    assert [set(row) for row in page['items']] == [{'id', 'title', 'archived_at'}]
+    assert page['items'][0]['title'] == 'Old 6'
+    datetime.fromisoformat(page['items'][0]['archived_at'])
+
+    rest = client.get('/api/sessions', query_string={'archived': 'true', 'fields': 'title',
+                                                     'cursor': page['next_cursor']}).get_json()
+    assert rest == {'items': [{'title': 'Old 7'}], 'next_cursor': None}
+    assert client.get('/api/sessions', query_string={'archived': 'true', 'fields': 'sync_seq'}).status_code == 400
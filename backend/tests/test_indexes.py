@@ -0,0 +1,8 @@
+import App
+
+
+def test_hot_queries_are_planned_on_indexes(app):
+    results = App.explain_hot_queries()
+    assert results
+    unindexed = [f'{label}:\n{plan}' for label, index_used, plan in results if not index_used]
+    assert not unindexed, '\n\n'.join(unindexed)
@@ -0,0 +1,39 @@
+import App
+
+
+def checklist(client):
+    return [(row['id'], row['order']) for row in client.get('/api/items', query_string={'all': 'true'}).get_json()]
+
+
+def test_move_takes_the_midpoint_between_neighbours(app):
+    client = app.test_client()
+    first, second, third = [client.post('/api/items', json={'title': title}).get_json()['id']
+                            for title in ('Read', 'Summarise', 'Quiz')]
+    assert checklist(client) == [(first, 0), (second, App.ORDER_GAP), (third, 2 * App.ORDER_GAP)]
+
+    moved = client.post(f'/api/items/{third}/move', json={'after_id': first, 'before_id': second}).get_json()
+    assert moved['order'] == App.ORDER_GAP // 2
+    assert client.post(f'/api/items/{first}/move', json={'after_id': second}).get_json()['order'] == 2 * App.ORDER_GAP
+    assert [id for id, _ in checklist(client)] == [third, second, first]
+
+
+def test_move_respaces_the_list_once_the_gap_is_used_up(app):
+    client = app.test_client()
+    expected = [client.post('/api/items', json={'title': f'Step {n}'}).get_json()['id'] for n in range(4)]
+
+    # Moving the last item in right after the first halves the gap every time
+    def move_last_after_first():
+        last = expected.pop()
+        client.post(f'/api/items/{last}/move', json={'after_id': expected[0]})
+        expected.insert(1, last)
+        assert [id for id, _ in checklist(client)] == expected
+
+    moves = 0
+    while checklist(client)[1][1] > 1:
+        move_last_after_first()
+        moves += 1
+    assert moves == App.ORDER_GAP.bit_length() - 1
+
+    # No key is left between 0 and 1: the list is respaced, then the item goes in between
+    move_last_after_first()
+    assert [order for _, order in checklist(client)] == [0, App.ORDER_GAP // 2, App.ORDER_GAP, 2 * App.ORDER_GAP]
@@ -0,0 +1,59 @@
+import time
+
+import App
+
+
+def make_app(**config):
+    app = App.create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'RESPONSE_CACHE_SIZE': 0, **config})
+    with app.app_context():
+        App.init_db()
+    return app
+
+
+def test_metrics_are_served_per_route_in_prometheus_format():
+    client = make_app(METRICS_ENABLED=True).test_client()
+    client.post('/api/notes', json={'title': 'Note', 'content': 'text'})
+    client.get('/api/notes')
+    client.get('/api/notes')
+    client.delete('/api/notes/999')
+
+    response = client.get('/api/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    lines = response.get_data(as_text=True).splitlines()
+    assert 'studyflow_requests_total{method="GET",route="/api/notes",status="200"} 2' in lines
+    assert 'studyflow_requests_total{method="POST",route="/api/notes",status="201"} 1' in lines
+    assert 'studyflow_requests_total{method="DELETE",route="/api/notes/<int:id>",status="404"} 1' in lines
+    assert '# TYPE studyflow_request_duration_seconds histogram' in lines
+    assert 'studyflow_request_duration_seconds_count{method="GET",route="/api/notes"} 2' in lines
+    assert 'studyflow_request_duration_seconds_bucket{method="GET",route="/api/notes",le="+Inf"} 2' in lines
+    queries = [line for line in lines if line.startswith('studyflow_request_db_queries_sum{method="GET",route="/api/notes"}')]
+    assert float(queries[0].split()[-1]) > 0
+
+
+def test_metrics_and_profiler_are_off_by_default(tmp_path):
+    app = make_app(PROFILE_DIR=str(tmp_path))
+    client = app.test_client()
+    assert client.get('/api/metrics').status_code == 404
+    assert app.extensions['studyflow']['slow_request_profiler'] is None
+    client.get('/api/notes')
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_slow_requests_are_written_as_folded_stacks(tmp_path):
+    app = make_app(PROFILE_SLOW_MS=30, PROFILE_INTERVAL_MS=1, PROFILE_DIR=str(tmp_path))
+
+    @app.get('/api/slow')
+    def slow():
+        time.sleep(0.1)
+        return {}
+
+    client = app.test_client()
+    client.get('/api/slow')
+
+    [profile] = tmp_path.iterdir()
+    assert profile.name.endswith('ms.folded')
+    assert '-GET_api_slow-' in profile.name
+    stacks = profile.read_text().splitlines()
+    assert stacks and all(line.rsplit(' ', 1)[1].isdigit() for line in stacks)
+    assert any('slow (test_metrics.py' in line for line in stacks)
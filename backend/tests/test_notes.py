@@ -0,0 +1,12 @@
+def test_note_show_dates_are_stored_and_queried_as_naive_utc(app):
+    client = app.test_client()
+    note = client.post('/api/notes', json={'title': 'Revise', 'content': 'Chapter 3',
+                                           'show_date': '2030-01-07T01:00:00+02:00'}).get_json()
+    assert note['show_date'] == '2030-01-06T23:00:00'
+
+    updated = client.put(f"/api/notes/{note['id']}", json={'show_date': '2030-01-08T01:00:00+02:00'})
+    assert updated.get_json()['show_date'] == '2030-01-07T23:00:00'
+
+    upcoming = client.get('/api/notes/upcoming', query_string={'start': '2030-01-08T00:00:00+02:00',
+                                                               'end': '2030-01-08T02:00:00+02:00'})
+    assert [row['id'] for row in upcoming.get_json()['items']] == [note['id']]
@@ -0,0 +1,46 @@
+from datetime import datetime
+
+import App
+
+
+def walk(client, path, **params):
+    """Every page of a list endpoint, as a list of pages of ids"""
+    pages, cursor = [], None
+    while True:
+        page = client.get(path, query_string=dict(params, **({'cursor': cursor} if cursor else {}))).get_json()
+        pages.append([row['id'] for row in page['items']])
+        cursor = page['next_cursor']
+        if cursor is None:
+            return pages
+
+
+def test_cursor_pages_cover_ties_on_the_sort_key_once(app):
+    dues = [datetime(2030, 1, 8), *[datetime(2030, 1, 7)] * 4, datetime(2030, 1, 6)]
+    App.db.session.execute(App.db.insert(App.Deadline), [
+        {'title': f'Essay {n}', 'due_date': due} for n, due in enumerate(dues)
+    ])
+    created = datetime(2030, 1, 1)
+    App.db.session.execute(App.db.insert(App.Note), [
+        {'title': f'Note {n}', 'content': 'tie', 'created_at': created} for n in range(5)
+    ])
+    App.db.session.commit()
+    client = app.test_client()
+
+    # due_date ascending, ties (2-5) broken by id, with page breaks inside the tie
+    pages = walk(client, '/api/deadlines', limit=2)
+    assert pages == [[6, 2], [3, 4], [5, 1]]
+    assert [id for page in pages for id in page] == [
+        row['id'] for row in client.get('/api/deadlines', query_string={'all': 'true'}).get_json()
+    ]
+
+    # Newest first: every note has the same created_at, so only the id orders them
+    assert walk(client, '/api/notes', limit=2) == [[5, 4], [3, 2], [1]]
+
+
+def test_cursor_must_match_the_endpoint(app):
+    client = app.test_client()
+    client.post('/api/deadlines', json={'title': 'Essay', 'due_date': '2030-01-07T09:00:00'})
+    client.post('/api/deadlines', json={'title': 'Exam', 'due_date': '2030-01-08T09:00:00'})
+    cursor = client.get('/api/deadlines', query_string={'limit': 1}).get_json()['next_cursor']
+    assert client.get('/api/items', query_string={'cursor': cursor}).status_code == 400
+    assert client.get('/api/deadlines', query_string={'cursor': 'not-a-cursor'}).status_code == 400
@@ -0,0 +1,32 @@
+import App
+
+
+def test_deleting_planned_sessions_drops_their_links(app):
+    client = app.test_client()
+    client.post('/api/deadlines', json={'title': 'Essay', 'due_date': '2030-01-10T09:00:00', 'priority': 'high'})
+    plan = {'start': '2030-01-07T08:00:00', 'end': '2030-01-11T00:00:00', 'block_minutes': 60}
+    planned = client.post('/api/planner/commit', json=plan).get_json()['sessions']
+    first, second, third = [session['id'] for session in planned]
+
+    client.delete(f'/api/sessions/{first}')
+    client.delete('/api/sessions/bulk', json=[second])
+    assert [link.session_id for link in App.PlannedSession.query] == [third]
+
+    # A new manual session doesn't count as planned time for the deadline
+    manual = client.post('/api/sessions', json={'title': 'Gym', 'start_time': '2030-01-08T08:00:00',
+                                                'end_time': '2030-01-08T09:00:00'}).get_json()
+    assert App.db.session.get(App.PlannedSession, manual['id']) is None
+    assert len(client.post('/api/planner/preview', json=plan).get_json()['sessions']) == 2
+
+
+def test_plan_windows_are_local_to_tz(app):
+    client = app.test_client()
+    client.post('/api/deadlines', json={'title': 'Quiz', 'due_date': '2030-01-09T09:00:00', 'priority': 'low'})
+    plan = {'start': '2030-01-06T12:00:00', 'end': '2030-01-10T00:00:00', 'tz': 'Asia/Tokyo',
+            'availability': [{'start': '09:00', 'end': '10:00'}]}
+    sessions = client.post('/api/planner/preview', json=plan).get_json()['sessions']
+    # 09:00 in Tokyo (UTC+9) is midnight UTC
+    assert [(session['start_time'], session['end_time']) for session in sessions] == [
+        ('2030-01-07T00:00:00', '2030-01-07T01:00:00')
+    ]
+    assert client.post('/api/planner/preview', json=dict(plan, tz='Nowhere/Else')).status_code == 400
@@ -0,0 +1,29 @@
+import pytest
+from sqlalchemy import text
+
+import App
+
+
+def pragmas(app):
+    with app.app_context():
+        with App.db.engine.connect() as connection:
+            return {name: connection.execute(text(f'PRAGMA {name}')).scalar()
+                    for name in ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size')}
+
+
+def test_file_databases_get_the_configured_pragmas(tmp_path):
+    app = App.create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'study.db'}"})
+    assert pragmas(app) == {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 5000,
+                            'mmap_size': 256 * 1024 * 1024}
+
+    app = App.create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'other.db'}",
+                          'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL',
+                          'SQLITE_BUSY_TIMEOUT_MS': 250, 'SQLITE_MMAP_SIZE': 0})
+    assert pragmas(app) == {'journal_mode': 'delete', 'synchronous': 2, 'busy_timeout': 250, 'mmap_size': 0}
+
+
+def test_pragma_keywords_are_validated(tmp_path):
+    app = App.create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'study.db'}",
+                          'SQLITE_JOURNAL_MODE': 'WAL; DROP TABLE notes'})
+    with pytest.raises(ValueError, match='SQLITE_JOURNAL_MODE'):
+        pragmas(app)
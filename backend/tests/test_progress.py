@@ -0,0 +1,36 @@
+import App
+
+
+def stored_progress():
+    return {row.subject: (row.total, row.completed) for row in App.SubjectProgress.query if row.total}
+
+
+def test_progress_counters_follow_item_writes(app):
+    client = app.test_client()
+    ids = [client.post('/api/items', json={'title': title, 'subject': subject}).get_json()['id']
+           for title, subject in (('Limits', 'Math'), ('Series', 'Math'), ('Optics', 'Physics'), ('Misc', None))]
+    assert stored_progress() == {'Math': (2, 0), 'Physics': (1, 0), '': (1, 0)}
+
+    client.put(f'/api/items/{ids[0]}', json={'is_completed': True})
+    client.put(f'/api/items/{ids[2]}', json={'is_completed': True})
+    assert stored_progress() == {'Math': (2, 1), 'Physics': (1, 1), '': (1, 0)}
+
+    # Moving a completed item to another subject takes its completion along;
+    # reordering it doesn't touch the counters
+    client.put(f'/api/items/{ids[0]}', json={'subject': 'Physics'})
+    client.post(f'/api/items/{ids[0]}/move', json={'before_id': ids[1]})
+    assert stored_progress() == {'Math': (1, 0), 'Physics': (2, 2), '': (1, 0)}
+
+    client.delete(f'/api/items/{ids[2]}')
+    client.put(f'/api/items/{ids[3]}', json={'is_completed': True})
+    assert stored_progress() == {'Math': (1, 0), 'Physics': (1, 1), '': (1, 1)}
+
+    client.put('/api/items/bulk', json=[{'id': ids[1], 'is_completed': True}])
+    client.delete('/api/items/bulk', json=[ids[3]])
+    assert stored_progress() == {'Math': (1, 1), 'Physics': (1, 1)}
+
+    assert App.progress_drift(App.count_progress()) == []
+    progress = client.get('/api/items/progress').get_json()
+    assert (progress['total'], progress['completed'], progress['percentage']) == (2, 2, 100.0)
+    assert progress['by_subject'] == {'Math': {'total': 1, 'completed': 1, 'percentage': 100.0},
+                                      'Physics': {'total': 1, 'completed': 1, 'percentage': 100.0}}
@@ -0,0 +1,67 @@
+import App
+
+
+WEEKLY = {'title': 'Lecture', 'start_time': '2030-01-07T09:00:00', 'end_time': '2030-01-07T10:00:00',
+          'weekdays': [0]}
+
+
+def window(client, start='2030-01-01', end='2030-03-01'):
+    page = client.get('/api/sessions', query_string={'start': start, 'end': end}).get_json()
+    return [(row['id'], row['start_time']) for row in page['items']]
+
+
+def test_detach_replaces_an_occurrence_in_one_transaction(app):
+    client = app.test_client()
+    rule = client.post('/api/recurrences', json=dict(WEEKLY, count=3)).get_json()['id']
+    client.post('/api/sessions', json={'title': 'Lab', 'start_time': '2030-01-15T14:00:00',
+                                       'end_time': '2030-01-15T15:00:00'})
+
+    # Moving onto the lab conflicts: nothing is written, the occurrence stays
+    response = client.post(f'/api/recurrences/{rule}/detach', json={
+        'occurrence_start': '2030-01-14T09:00:00', 'start_time': '2030-01-15T14:30:00',
+        'end_time': '2030-01-15T15:30:00'})
+    assert response.status_code == 409
+    assert f'r{rule}:2030-01-14T09:00:00' in [id for id, _ in window(client)]
+    assert App.db.session.get(App.SessionRecurrence, rule).exceptions is None
+
+    # Completing it in place overlaps only the occurrence it replaces
+    detached = client.post(f'/api/recurrences/{rule}/detach', json={
+        'occurrence_start': '2030-01-14T09:00:00', 'is_completed': True})
+    assert detached.status_code == 201
+    session = detached.get_json()
+    assert (session['title'], session['start_time'], session['is_completed']) == \
+        ('Lecture', '2030-01-14T09:00:00', True)
+    assert [start for id, start in window(client) if id == session['id']] == ['2030-01-14T09:00:00']
+    assert f'r{rule}:2030-01-14T09:00:00' not in [id for id, _ in window(client)]
+
+    missing = client.post(f'/api/recurrences/{rule}/detach', json={'occurrence_start': '2030-01-14T10:00:00'})
+    assert missing.status_code == 404
+
+
+def starts(client, rule_id, start='2030-01-01', end='2030-03-01'):
+    return [start_time for id, start_time in window(client, start, end) if id.startswith(f'r{rule_id}:')]
+
+
+def test_expansion_honours_count_until_interval_and_exceptions(app):
+    client = app.test_client()
+
+    # Starts on a Wednesday: the Monday of that week is not an occurrence
+    counted = client.post('/api/recurrences', json=dict(WEEKLY, start_time='2030-01-09T09:00:00',
+                                                        end_time='2030-01-09T10:00:00', weekdays=[0, 2],
+                                                        count=4)).get_json()['id']
+    assert starts(client, counted) == ['2030-01-09T09:00:00', '2030-01-14T09:00:00',
+                                       '2030-01-16T09:00:00', '2030-01-21T09:00:00']
+    # Occurrences before the window still count towards `count`
+    assert starts(client, counted, start='2030-01-15') == ['2030-01-16T09:00:00', '2030-01-21T09:00:00']
+
+    fortnightly = client.post('/api/recurrences', json=dict(WEEKLY, interval=2,
+                                                            until='2030-02-04T09:00:00')).get_json()['id']
+    assert starts(client, fortnightly) == ['2030-01-07T09:00:00', '2030-01-21T09:00:00', '2030-02-04T09:00:00']
+
+    # A skipped occurrence is left out but still uses up one of `count`
+    skipped = client.post('/api/recurrences', json=dict(WEEKLY, title='Seminar', count=3)).get_json()['id']
+    client.post(f'/api/recurrences/{skipped}/exceptions', json={'occurrence_start': '2030-01-14T09:00:00'})
+    assert starts(client, skipped) == ['2030-01-07T09:00:00', '2030-01-21T09:00:00']
+
+    # An occurrence must end inside the window
+    assert starts(client, skipped, start='2030-01-07', end='2030-01-07T09:30:00') == []
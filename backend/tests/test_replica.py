@@ -0,0 +1,49 @@
+import App
+
+
+def make_app(primary, replica):
+    app = App.create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{primary}', 'DATABASE_READ_URL': f'sqlite:///{replica}',
+                          'RESPONSE_CACHE_SIZE': 0, 'READ_YOUR_WRITES_SECONDS': 5})
+    with app.app_context():
+        App.init_db()
+    return app
+
+
+def test_reads_go_to_the_replica_unless_the_client_wrote_recently(tmp_path):
+    app = make_app(tmp_path / 'primary.db', tmp_path / 'replica.db')
+    # The replica is a separate, empty copy of the schema here, so where a read ran shows in its result
+    with app.app_context():
+        App.db.metadata.create_all(App.db.engines['replica'])
+    client = app.test_client()
+    token = client.get('/api/sync').get_json()['token']
+
+    created = client.post('/api/notes', json={'title': 'Fresh', 'content': 'text'})
+    assert created.status_code == 201
+    assert 'X-Read-Source' not in created.headers
+
+    replica = client.get('/api/notes', query_string={'all': 'true'})
+    assert replica.headers['X-Read-Source'] == 'replica'
+    assert replica.get_json() == []
+
+    for age in ('0', '4999'):
+        primary = client.get('/api/notes', headers={'X-Last-Write-Age': age}, query_string={'all': 'true'})
+        assert primary.headers['X-Read-Source'] == 'primary'
+        assert [row['title'] for row in primary.get_json()] == ['Fresh']
+
+    for age in ('5000', 'soon'):
+        stale = client.get('/api/notes', headers={'X-Last-Write-Age': age}, query_string={'all': 'true'})
+        assert stale.headers['X-Read-Source'] == 'replica'
+
+    sync = client.get('/api/sync', query_string={'since': token})
+    assert sync.headers['X-Read-Source'] == 'primary'
+    assert [row['title'] for row in sync.get_json()['changes']['notes']] == ['Fresh']
+
+
+def test_reads_fall_back_to_the_primary_when_the_replica_is_down(tmp_path):
+    app = make_app(tmp_path / 'primary.db', tmp_path / 'missing' / 'replica.db')
+    client = app.test_client()
+    client.post('/api/notes', json={'title': 'Fresh', 'content': 'text'})
+
+    response = client.get('/api/notes', query_string={'all': 'true'})
+    assert response.headers['X-Read-Source'] == 'primary'
+    assert [row['title'] for row in response.get_json()] == ['Fresh']
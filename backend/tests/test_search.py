@@ -0,0 +1,8 @@
+def test_search_snippets_escape_the_stored_text(app):
+    client = app.test_client()
+    client.post('/api/notes', json={'title': 'Payload', 'content': 'x <img src=x onerror=alert(1)> & integrals'})
+
+    hits = client.get('/api/search', query_string={'q': 'integrals'}).get_json()['items']
+    assert len(hits) == 1
+    assert '<img' not in hits[0]['snippet']
+    assert '&lt;img src=x onerror=alert(1)&gt; &amp; <mark>integrals</mark>' in hits[0]['snippet']
@@ -0,0 +1,50 @@
+from datetime import datetime
+
+import App
+
+
+def test_bulk_writes_cannot_create_overlong_sessions(app):
+    client = app.test_client()
+    marathon = {'title': 'Marathon', 'start_time': '2030-01-07T00:00:00', 'end_time': '2030-01-09T00:00:00'}
+    response = client.post('/api/sessions/bulk', json=[marathon])
+    assert response.status_code == 400
+    assert response.get_json()['errors'][0]['index'] == 0
+
+    created = client.post('/api/sessions/bulk', json=[dict(marathon, end_time='2030-01-07T02:00:00')])
+    id = created.get_json()['results'][0]['id']
+    assert client.put('/api/sessions/bulk', json=[{'id': id, 'end_time': '2030-01-09T00:00:00'}]).status_code == 400
+    assert client.put('/api/sessions/bulk', json=[{'id': id, 'title': 'Long run'}]).status_code == 200
+
+
+def test_migrate_reports_overlong_sessions(app):
+    App.db.session.add(App.StudySession(title='Legacy', start_time=datetime(2020, 1, 1),
+                                        end_time=datetime(2020, 1, 3)))
+    App.db.session.commit()
+    result = app.test_cli_runner().invoke(args=['migrate'])
+    assert result.exit_code == 0
+    assert '1 session(s) are longer than MAX_SESSION_HOURS' in result.output
+
+
+def test_free_slots_etag_moves_with_now(app, monkeypatch):
+    client = app.test_client()
+    now = datetime(2030, 1, 7, 9, 30)
+    monkeypatch.setattr(App, 'free_slots_now', lambda: now)
+    first = client.get('/api/sessions/free-slots')
+    assert client.get('/api/sessions/free-slots', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    now += App.timedelta(minutes=1)
+    response = client.get('/api/sessions/free-slots', headers={'If-None-Match': first.headers['ETag']})
+    assert response.status_code == 200
+    assert response.get_json()[0]['start_time'] == '2030-01-07T09:31:00'
+
+
+def test_free_slots_use_the_callers_day(app):
+    client = app.test_client()
+    query = {'start': '2030-01-07T00:00:00', 'end': '2030-01-08T00:00:00', 'tz': 'America/New_York'}
+    slots = client.get('/api/sessions/free-slots', query_string=query).get_json()
+    # 08:00-22:00 in New York (UTC-5) is 13:00-03:00 UTC
+    assert [(slot['start_time'], slot['end_time']) for slot in slots] == [
+        ('2030-01-07T00:00:00', '2030-01-07T03:00:00'), ('2030-01-07T13:00:00', '2030-01-08T00:00:00')
+    ]
+    assert client.get('/api/sessions/free-slots', query_string=dict(query, tz='+05:30')).status_code == 200
+    assert client.get('/api/sessions/free-slots', query_string=dict(query, tz='Mars/Base')).status_code == 400
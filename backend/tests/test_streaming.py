@@ -0,0 +1,42 @@
+import json
+
+import App
+
+
+def ndjson(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_lists_stream_every_row_as_ndjson(app, monkeypatch):
+    monkeypatch.setattr(App, 'STREAM_BATCH_SIZE', 2)
+    client = app.test_client()
+    for n in range(5):
+        client.post('/api/notes', json={'title': f'Note {n}', 'content': 'x' * 100})
+
+    response = client.get('/api/notes', query_string={'stream': '1'})
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'application/x-ndjson'
+    assert ndjson(response) == client.get('/api/notes', query_string={'all': 'true'}).get_json()
+    assert [row['title'] for row in ndjson(response)] == [f'Note {n}' for n in reversed(range(5))]
+
+    by_header = client.get('/api/notes', headers={'Accept': 'application/x-ndjson'}, query_string={'fields': 'id,title'})
+    assert by_header.mimetype == 'application/x-ndjson'
+    assert [set(row) for row in ndjson(by_header)] == [{'id', 'title'}] * 5
+    assert client.get('/api/notes', headers={'Accept': 'application/json'}).get_json()['next_cursor'] is None
+
+
+def test_session_window_streams_occurrences_in_order(app):
+    client = app.test_client()
+    client.post('/api/sessions', json={'title': 'One-off', 'start_time': '2030-01-08T09:00:00',
+                                       'end_time': '2030-01-08T10:00:00'})
+    client.post('/api/recurrences', json={'title': 'Lecture', 'start_time': '2030-01-07T11:00:00',
+                                          'end_time': '2030-01-07T12:00:00', 'weekdays': [0, 2]})
+
+    response = client.get('/api/sessions', query_string={'start': '2030-01-07T00:00:00', 'end': '2030-01-10T00:00:00',
+                                                         'stream': 'true'})
+    assert [(row['title'], row['start_time']) for row in ndjson(response)] == [
+        ('Lecture', '2030-01-07T11:00:00'),
+        ('One-off', '2030-01-08T09:00:00'),
+        ('Lecture', '2030-01-09T11:00:00'),
+    ]
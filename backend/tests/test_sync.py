@@ -0,0 +1,85 @@
+from datetime import datetime
+
+import App
+
+
+def test_ids_of_deleted_rows_are_not_reused(app):
+    client = app.test_client()
+    session = {'title': 'Reading', 'start_time': '2030-01-07T10:00:00', 'end_time': '2030-01-07T11:00:00'}
+    client.post('/api/sessions', json=session)
+    later = dict(session, start_time='2030-01-08T10:00:00', end_time='2030-01-08T11:00:00')
+    newest = client.post('/api/sessions', json=later).get_json()['id']
+    token = client.get('/api/sync').get_json()['token']
+
+    client.delete(f'/api/sessions/{newest}')
+    created = client.post('/api/sessions', json=later).get_json()['id']
+    assert created != newest
+
+    sync = client.get('/api/sync', query_string={'since': token}).get_json()
+    assert sync['deleted'] == {'sessions': [newest]}
+    assert created in [row['id'] for row in sync['changes']['sessions']]
+
+
+def test_migrate_adds_autoincrement_to_existing_tables(app):
+    with App.db.engine.begin() as connection:
+        connection.exec_driver_sql('DROP TABLE notes')
+        connection.exec_driver_sql(
+            'CREATE TABLE notes (id INTEGER NOT NULL PRIMARY KEY, title VARCHAR(200) NOT NULL, content TEXT NOT NULL, '
+            'subject VARCHAR(100), session_id INTEGER, show_date DATETIME, created_at DATETIME, updated_at DATETIME)'
+        )
+        connection.exec_driver_sql("INSERT INTO notes (id, title, content) VALUES (1, 'Kept', 'old note')")
+        connection.exec_driver_sql("INSERT INTO tombstones (resource, row_id, deleted_at) "
+                                   "VALUES ('notes', 2, '2030-01-01 00:00:00')")
+
+    assert App.upgrade_autoincrement() == ['notes']
+    App.init_db()
+    assert App.upgrade_autoincrement() == []
+
+    client = app.test_client()
+    created = client.post('/api/notes', json={'title': 'Fresh', 'content': 'new note'}).get_json()
+    assert created['id'] == 3
+    assert [row['id'] for row in client.get('/api/notes').get_json()['items']] == [3, 1]
+    # The search triggers came back with the rebuilt table
+    assert [row['id'] for row in client.get('/api/search', query_string={'q': 'fresh'}).get_json()['items']] == [3]
+
+
+def test_sync_returns_changes_and_deletes_since_the_token(app):
+    client = app.test_client()
+    kept, dropped = [client.post('/api/deadlines', json={'title': title, 'due_date': '2030-01-07T09:00:00'})
+                     .get_json()['id'] for title in ('Essay', 'Exam')]
+    note = client.post('/api/notes', json={'title': 'Revise', 'content': 'Chapter 3'}).get_json()['id']
+    assert client.get('/api/sync').get_json()['reset'] is True
+    token = client.get('/api/sync').get_json()['token']
+
+    client.put(f'/api/deadlines/{kept}', json={'priority': 'high'})
+    client.delete(f'/api/deadlines/{dropped}')
+    item = client.post('/api/items', json={'title': 'Outline'}).get_json()['id']
+    client.delete('/api/items/bulk', json=[item])
+    client.delete(f'/api/notes/{note}')
+
+    sync = client.get('/api/sync', query_string={'since': token}).get_json()
+    assert sync['reset'] is False
+    changed = {resource: [row['id'] for row in rows] for resource, rows in sync['changes'].items()}
+    assert changed == {'deadlines': [kept]}
+    assert sync['changes']['deadlines'][0]['priority'] == 'high'
+    assert sync['deleted'] == {'deadlines': [dropped], 'items': [item], 'notes': [note]}
+    assert client.get('/api/sync', query_string={'since': 'garbage'}).status_code == 400
+
+
+def test_sync_token_follows_the_change_sequence_not_the_clock(app):
+    client = app.test_client()
+    client.post('/api/deadlines', json={'title': 'Essay', 'due_date': '2030-01-07T09:00:00'})
+    token = client.get('/api/sync').get_json()['token']
+
+    # A worker with a slow clock stamps an updated_at from before the token
+    App.db.session.execute(App.db.update(App.Deadline).values(title='Essay v2', updated_at=datetime(2000, 1, 1)))
+    App.db.session.commit()
+
+    sync = client.get('/api/sync', query_string={'since': token}).get_json()
+    assert [row['title'] for row in sync['changes']['deadlines']] == ['Essay v2']
+    assert 'sync_seq' not in sync['changes']['deadlines'][0]
+    assert client.get('/api/sync', query_string={'since': sync['token']}).get_json()['changes'] == {}
+
+    # Tokens from before the sequence (a bare timestamp) ask for a reload
+    old = App.encode_cursor([datetime(2030, 1, 1)])
+    assert client.get('/api/sync', query_string={'since': old}).get_json()['reset'] is True
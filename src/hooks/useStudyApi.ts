@@ -3,7 +3,8 @@
  * Uses React Query for data fetching, caching, and synchronization
  */
 
-import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
+import { useQuery, useInfiniteQuery, useMutation, useQueryClient, type QueryClient } from '@tanstack/react-query';
+import { format } from 'date-fns';
 import { api } from '@/lib/api';
 import type { StudySession, Deadline as ApiDeadline, StudyItem, Note as ApiNote, Subject } from '@/lib/api';
 import type { TimeBlock, Deadline, Note, Task, ClassSubject } from '@/types/study';
@@ -78,15 +79,65 @@ function apiNoteToNote(apiNote: ApiNote): Note {
   };
 }
 
+function subjectsToClasses(subjects: Subject[], items: StudyItem[]): ClassSubject[] {
+  return subjects.map(subject => ({
+    id: String(subject.id),
+    name: subject.name,
+    color: (subject.color as ClassSubject['color']) || 'purple',
+    tasks: items
+      .filter(item => item.subject === subject.name)
+      .map(item => ({
+        id: String(item.id),
+        title: item.title,
+        completed: item.is_completed || false,
+      })),
+  }));
+}
+
+// The main page reads everything through useDashboard, so a write refreshes
+// it along with the query for the collection it touched
+function invalidate(queryClient: QueryClient, key: string) {
+  queryClient.invalidateQueries({ queryKey: [key] });
+  queryClient.invalidateQueries({ queryKey: ['dashboard'] });
+}
+
 // =============================================================================
 // TIME BLOCKS (Study Sessions)
 // =============================================================================
 
+// The weekly calendar places blocks in the 7 days from today (see
+// timeBlockToApiSession), so only that window is loaded
+function calendarWindow() {
+  const start = new Date();
+  start.setHours(0, 0, 0, 0);
+  const end = new Date(start);
+  end.setDate(start.getDate() + 7);
+  return { start: start.toISOString(), end: end.toISOString() };
+}
+
+// Occurrences of recurring sessions (ids like "r12:2030-01-07T09:00:00") have
+// no row of their own. Editing one detaches it: the server skips it in its
+// series and saves a one-off session in the same transaction.
+function parseOccurrenceId(id: string): { recurrenceId: number; start: string } | null {
+  const match = /^r(\d+):(.+)$/.exec(id);
+  return match ? { recurrenceId: Number(match[1]), start: match[2] } : null;
+}
+
+function detachOccurrence(occurrence: { recurrenceId: number; start: string }, session: Partial<StudySession>) {
+  return api.recurrences.detachOccurrence(occurrence.recurrenceId, occurrence.start, session);
+}
+
+// Occurrences are only known from the last fetched window
+function cachedTimeBlocks(queryClient: QueryClient): TimeBlock[] | undefined {
+  return queryClient.getQueryData<DashboardData>(['dashboard'])?.timeBlocks
+    ?? queryClient.getQueryData<TimeBlock[]>(['timeBlocks']);
+}
+
 export function useTimeBlocks() {
   return useQuery({
     queryKey: ['timeBlocks'],
     queryFn: async () => {
-      const sessions = await api.sessions.getAll();
+      const sessions = await api.sessions.getWindow(calendarWindow());
       return sessions.map(apiSessionToTimeBlock);
     },
   });
@@ -101,7 +152,7 @@ export function useCreateTimeBlock() {
       return api.sessions.create(apiData);
     },
     onSuccess: () => {
-      queryClient.invalidateQueries({ queryKey: ['timeBlocks'] });
+      invalidate(queryClient, 'timeBlocks');
     },
   });
 }
@@ -112,10 +163,14 @@ export function useUpdateTimeBlock() {
   return useMutation({
     mutationFn: async (block: TimeBlock) => {
       const apiData = timeBlockToApiSession(block);
+      const occurrence = parseOccurrenceId(block.id);
+      if (occurrence) {
+        return detachOccurrence(occurrence, apiData);
+      }
       return api.sessions.update(parseInt(block.id), apiData);
     },
     onSuccess: () => {
-      queryClient.invalidateQueries({ queryKey: ['timeBlocks'] });
+      invalidate(queryClient, 'timeBlocks');
     },
   });
 }
@@ -125,10 +180,14 @@ export function useDeleteTimeBlock() {
   
   return useMutation({
     mutationFn: async (id: string) => {
+      const occurrence = parseOccurrenceId(id);
+      if (occurrence) {
+        return api.recurrences.skipOccurrence(occurrence.recurrenceId, occurrence.start);
+      }
       return api.sessions.delete(parseInt(id));
     },
     onSuccess: () => {
-      queryClient.invalidateQueries({ queryKey: ['timeBlocks'] });
+      invalidate(queryClient, 'timeBlocks');
     },
   });
 }
@@ -138,8 +197,13 @@ export function useMoveTimeBlock() {
   
   return useMutation({
     mutationFn: async ({ id, newDay, newHour }: { id: string; newDay: number; newHour: number }) => {
-      const currentSession = await api.sessions.getById(parseInt(id));
-      const currentBlock = apiSessionToTimeBlock(currentSession);
+      const occurrence = parseOccurrenceId(id);
+      const currentBlock = occurrence
+        ? cachedTimeBlocks(queryClient)?.find(block => block.id === id)
+        : apiSessionToTimeBlock(await api.sessions.getById(parseInt(id)));
+      if (!currentBlock) {
+        throw new Error('Session not found');
+      }
       
       const updatedBlock: TimeBlock = {
         ...currentBlock,
@@ -148,10 +212,13 @@ export function useMoveTimeBlock() {
       };
       
       const apiData = timeBlockToApiSession(updatedBlock);
+      if (occurrence) {
+        return detachOccurrence(occurrence, apiData);
+      }
       return api.sessions.update(parseInt(id), apiData);
     },
     onSuccess: () => {
-      queryClient.invalidateQueries({ queryKey: ['timeBlocks'] });
+      invalidate(queryClient, 'timeBlocks');
     },
   });
 }
@@ -161,10 +228,15 @@ export function useToggleTimeBlockComplete() {
   
   return useMutation({
     mutationFn: async ({ id, completed }: { id: string; completed: boolean }) => {
+      const occurrence = parseOccurrenceId(id);
+      if (occurrence) {
+        // Keeps the occurrence's times and details
+        return detachOccurrence(occurrence, { is_completed: completed });
+      }
       return api.sessions.update(parseInt(id), { is_completed: completed });
     },
     onSuccess: () => {
-      queryClient.invalidateQueries({ queryKey: ['timeBlocks'] });
+      invalidate(queryClient, 'timeBlocks');
     },
   });
 }
@@ -173,13 +245,14 @@ export function useToggleTimeBlockComplete() {
 // DEADLINES
 // =============================================================================
 
+// Open deadlines, soonest first, one page at a time (fetchNextPage for more)
 export function useDeadlines() {
-  return useQuery({
+  return useInfiniteQuery({
     queryKey: ['deadlines'],
-    queryFn: async () => {
-      const deadlines = await api.deadlines.getAll();
-      return deadlines.map(apiDeadlineToDeadline);
-    },
+    queryFn: ({ pageParam }) => api.deadlines.getPage({ completed: false, cursor: pageParam }),
+    initialPageParam: null as string | null,
+    getNextPageParam: (page) => page.next_cursor,
+    select: (data) => data.pages.flatMap(page => page.items.map(apiDeadlineToDeadline)),
   });
 }
 
@@ -192,7 +265,7 @@ export function useCreateDeadline() {
       return api.deadlines.create(apiData);
     },
     onSuccess: () => {
-      queryClient.invalidateQueries({ queryKey: ['deadlines'] });
+      invalidate(queryClient, 'deadlines');
     },
   });
 }
@@ -205,7 +278,7 @@ export function useDeleteDeadline() {
       return api.deadlines.delete(parseInt(id));
     },
     onSuccess: () => {
-      queryClient.invalidateQueries({ queryKey: ['deadlines'] });
+      invalidate(queryClient, 'deadlines');
     },
   });
 }
@@ -214,13 +287,14 @@ export function useDeleteDeadline() {
 // NOTES
 // =============================================================================
 
+// Newest notes first, one page at a time (fetchNextPage for more)
 export function useNotes() {
-  return useQuery({
+  return useInfiniteQuery({
     queryKey: ['notes'],
-    queryFn: async () => {
-      const notes = await api.notes.getAll();
-      return notes.map(apiNoteToNote);
-    },
+    queryFn: ({ pageParam }) => api.notes.getPage({ cursor: pageParam }),
+    initialPageParam: null as string | null,
+    getNextPageParam: (page) => page.next_cursor,
+    select: (data) => data.pages.flatMap(page => page.items.map(apiNoteToNote)),
   });
 }
 
@@ -232,7 +306,7 @@ export function useCreateNote() {
       return api.notes.create({ title: 'Note', content });
     },
     onSuccess: () => {
-      queryClient.invalidateQueries({ queryKey: ['notes'] });
+      invalidate(queryClient, 'notes');
     },
   });
 }
@@ -245,7 +319,7 @@ export function useDeleteNote() {
       return api.notes.delete(parseInt(id));
     },
     onSuccess: () => {
-      queryClient.invalidateQueries({ queryKey: ['notes'] });
+      invalidate(queryClient, 'notes');
     },
   });
 }
@@ -254,30 +328,24 @@ export function useDeleteNote() {
 // CLASSES (Subjects) & TASKS (Study Items)
 // =============================================================================
 
+// Subjects with their tasks. Subjects come with the first page; items are
+// paged in checklist order (fetchNextPage for more)
 export function useClasses() {
-  return useQuery({
+  return useInfiniteQuery({
     queryKey: ['classes'],
-    queryFn: async () => {
+    queryFn: async ({ pageParam }) => {
       const [subjects, items] = await Promise.all([
-        api.subjects.getAll(),
-        api.items.getAll(),
+        pageParam ? [] : api.subjects.getAll(),
+        api.items.getPage({ cursor: pageParam }),
       ]);
-      
-      const classes: ClassSubject[] = subjects.map(subject => ({
-        id: String(subject.id),
-        name: subject.name,
-        color: (subject.color as ClassSubject['color']) || 'purple',
-        tasks: items
-          .filter(item => item.subject === subject.name)
-          .map(item => ({
-            id: String(item.id),
-            title: item.title,
-            completed: item.is_completed || false,
-          })),
-      }));
-      
-      return classes;
+      return { subjects, items };
     },
+    initialPageParam: null as string | null,
+    getNextPageParam: (page) => page.items.next_cursor,
+    select: (data) => subjectsToClasses(
+      data.pages[0].subjects,
+      data.pages.flatMap(page => page.items.items),
+    ),
   });
 }
 
@@ -292,7 +360,7 @@ export function useCreateClass() {
       });
     },
     onSuccess: () => {
-      queryClient.invalidateQueries({ queryKey: ['classes'] });
+      invalidate(queryClient, 'classes');
     },
   });
 }
@@ -309,7 +377,7 @@ export function useCreateTask() {
       });
     },
     onSuccess: () => {
-      queryClient.invalidateQueries({ queryKey: ['classes'] });
+      invalidate(queryClient, 'classes');
     },
   });
 }
@@ -322,7 +390,7 @@ export function useToggleTask() {
       return api.items.toggleComplete(parseInt(id), completed);
     },
     onSuccess: () => {
-      queryClient.invalidateQueries({ queryKey: ['classes'] });
+      invalidate(queryClient, 'classes');
     },
   });
 }
@@ -335,7 +403,7 @@ export function useDeleteTask() {
       return api.items.delete(parseInt(id));
     },
     onSuccess: () => {
-      queryClient.invalidateQueries({ queryKey: ['classes'] });
+      invalidate(queryClient, 'classes');
     },
   });
 }
@@ -349,4 +417,33 @@ export function useProgress() {
     queryKey: ['progress'],
     queryFn: () => api.items.getProgress(),
   });
-}
\ No newline at end of file
+}
+
+// =============================================================================
+// DASHBOARD
+// =============================================================================
+
+export interface DashboardData {
+  timeBlocks: TimeBlock[];
+  deadlines: Deadline[];
+  classes: ClassSubject[];
+  notes: Note[];
+}
+
+// Everything the main page shows in one request: the calendar's 7 days from
+// today (the calendarWindow() range), open deadlines, classes with their
+// tasks, and the notes visible today
+export function useDashboard() {
+  return useQuery({
+    queryKey: ['dashboard'],
+    queryFn: async (): Promise<DashboardData> => {
+      const dashboard = await api.dashboard.get(format(new Date(), 'yyyy-MM-dd'));
+      return {
+        timeBlocks: dashboard.sessions.map(apiSessionToTimeBlock),
+        deadlines: dashboard.deadlines.map(apiDeadlineToDeadline),
+        classes: subjectsToClasses(dashboard.subjects, dashboard.items),
+        notes: dashboard.notes.map(apiNoteToNote),
+      };
+    },
+  });
+}
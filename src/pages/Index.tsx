@@ -5,21 +5,18 @@ import { Sidebar } from "@/components/Sidebar";
 import { AddTimeBlockModal } from "@/components/AddTimeBlockModal";
 import { GraduationCap, Loader2 } from "lucide-react";
 import {
-  useTimeBlocks,
+  useDashboard,
   useCreateTimeBlock,
   useUpdateTimeBlock,
   useDeleteTimeBlock,
   useMoveTimeBlock,
   useToggleTimeBlockComplete,
-  useDeadlines,
   useCreateDeadline,
   useDeleteDeadline,
-  useClasses,
   useCreateClass,
   useCreateTask,
   useToggleTask,
   useDeleteTask,
-  useNotes,
   useCreateNote,
   useDeleteNote,
 } from "@/hooks/useStudyApi";
@@ -30,12 +27,13 @@ const Index = () => {
   const [editModalOpen, setEditModalOpen] = useState(false);
 
   // ==========================================================================
-  // API Queries - Fetch data from backend
+  // API Queries - Fetch data from backend (one dashboard request)
   // ==========================================================================
-  const { data: timeBlocks = [], isLoading: loadingBlocks } = useTimeBlocks();
-  const { data: deadlines = [], isLoading: loadingDeadlines } = useDeadlines();
-  const { data: classes = [], isLoading: loadingClasses } = useClasses();
-  const { data: notes = [], isLoading: loadingNotes } = useNotes();
+  const { data: dashboard, isLoading } = useDashboard();
+  const timeBlocks = dashboard?.timeBlocks ?? [];
+  const deadlines = dashboard?.deadlines ?? [];
+  const classes = dashboard?.classes ?? [];
+  const notes = dashboard?.notes ?? [];
 
   // ==========================================================================
   // API Mutations - Save changes to backend
@@ -155,8 +153,6 @@ const Index = () => {
   // ==========================================================================
   // Loading State
   // ==========================================================================
-  const isLoading = loadingBlocks || loadingDeadlines || loadingClasses || loadingNotes;
-
   if (isLoading) {
     return (
       <div className="min-h-screen bg-background flex items-center justify-center">